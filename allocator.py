@@ -0,0 +1,230 @@
+import argparse
+import time
+import numpy as np
+import metrics
+from log_trade import log_trade
+
+FEE_BUFFER = 0.005  # share of cash held back for fees and price moves
+MAX_SYMBOL_EXPOSURE = 0.25  # of equity in any one symbol, what is already held included
+MAX_EXPOSURE = 0.95  # of equity in positions overall
+MIN_ORDER = 1.00  # dollars; smaller buys are dropped
+
+# Sizes a whole cycle's trades at once. Each signal becomes an intent (buy a
+# share of cash or buying power, or a fixed notional; sell the whole
+# position) and allocate() sizes every buy in one numpy pass against a
+# single account snapshot: each strategy's own share first, then the
+# per-symbol and overall exposure caps, then the cash left after the fee
+# buffer, scaled down pro rata wherever a cap binds. The sized batch goes to
+# the order gateway in one submit_many(), so no order in it can be refused
+# for cash another one took.
+
+
+def _normalize(symbol):
+    return symbol.replace("/", "")
+
+
+def intent(strategy, symbol, side, close, pct=0.0, notional=None, basis="cash", adds=False):
+    # adds: buy even when the symbol is already held
+    return {"strategy": strategy, "symbol": symbol, "side": side, "close": close, "pct": pct,
+            "notional": notional, "basis": basis, "adds": adds}
+
+
+def strategy_intent(module, signal, candles):
+    # A strategy module's signal, with the sizing its PARAMS and attributes ask for
+    return intent(module.STRATEGY, module.SYMBOL, signal, candles[-1]["close"],
+                  pct=module.PARAMS.get("allocation_pct", 0.0), notional=module.PARAMS.get("notional"),
+                  basis=getattr(module, "SIZE_FROM", "cash"), adds=getattr(module, "ADDS_TO_POSITION", False))
+
+
+def allocate(intents, account, positions, fee_buffer=FEE_BUFFER, symbol_cap=MAX_SYMBOL_EXPOSURE,
+             total_cap=MAX_EXPOSURE, min_order=MIN_ORDER):
+    # Returns one entry per intent: the intent with "order" (None when
+    # nothing is placed) and "note" (why it was dropped or trimmed). Sells
+    # only need the positions (account may be None); what they free up is
+    # left for the next cycle's snapshot
+    held = {_normalize(p.symbol): p for p in positions}
+    sized = [dict(item, order=None, note="") for item in intents]
+
+    # === SELLS: the whole position, once per symbol ===
+    selling = set()
+    for item in sized:
+        if item["side"] != "sell":
+            continue
+        key = _normalize(item["symbol"])
+        if key not in held:
+            item["note"] = "nothing held"
+        elif key in selling:
+            item["note"] = "sold by another strategy"
+        else:
+            selling.add(key)
+            item["order"] = {"symbol": item["symbol"], "qty": held[key].qty, "side": "sell",
+                             "type": "market", "time_in_force": "gtc"}
+
+    # === BUYS: one vectorized pass ===
+    buys = [item for item in sized if item["side"] == "buy"]
+    if not buys:
+        return sized
+    cash, buying_power = float(account.cash), float(account.buying_power)
+    equity = float(account.equity)
+    symbols, codes = np.unique([_normalize(item["symbol"]) for item in buys], return_inverse=True)
+    pct = np.array([item["pct"] or 0.0 for item in buys])
+    notional = np.array([np.nan if item["notional"] is None else float(item["notional"]) for item in buys])
+    base = np.where([item["basis"] == "buying_power" for item in buys], buying_power, cash)
+    adds = np.array([item["adds"] for item in buys])
+    holding = np.array([symbol in held for symbol in symbols])
+    held_value = np.array([float(held[symbol].market_value) if symbol in held else 0.0 for symbol in symbols])
+
+    asked = np.where(np.isnan(notional), pct * base, notional)
+    want = np.where(holding[codes] & ~adds, 0.0, asked)
+
+    # Per symbol: what is held plus every buy of it stays under the cap
+    room = np.maximum(symbol_cap * equity - held_value, 0.0)
+    wanted = np.bincount(codes, weights=want, minlength=len(symbols))
+    scale = np.minimum(1.0, np.divide(room, wanted, out=np.ones_like(room), where=wanted > 0))
+    want = want * scale[codes]
+
+    # Overall: under the exposure cap and within the cash past the fee buffer
+    budget = min(min(cash, buying_power) * (1 - fee_buffer),
+                 max(total_cap * equity - float(sum(float(p.market_value) for p in held.values())), 0.0))
+    total = want.sum()
+    if total > budget:
+        want = want * (budget / total)
+    amount = np.floor(want * 100) / 100  # whole cents, rounded down
+    amount[amount < min_order] = 0.0
+
+    for i, item in enumerate(buys):
+        if holding[codes[i]] and not adds[i]:
+            item["note"] = "already held"
+        elif amount[i] == 0:
+            item["note"] = f"${asked[i]:.2f} cut below the ${min_order:.2f} minimum"
+        else:
+            if amount[i] < round(asked[i], 2):
+                item["note"] = f"trimmed from ${asked[i]:.2f}"
+            item["order"] = {"symbol": item["symbol"], "notional": float(amount[i]), "side": "buy",
+                             "type": "market", "time_in_force": "gtc"}
+    return sized
+
+
+def execute(broker, intents, verbose=True):
+    # Sizes intents against one snapshot of the broker's account and
+    # submits them as one batch; returns the sized intents, each placed one
+    # with its OrderResult under "result"
+    with metrics.span("allocate"):
+        account = broker.account() if any(item["side"] == "buy" for item in intents) else None
+        sized = allocate(intents, account, broker.positions())
+    placing = [item for item in sized if item["order"] is not None]
+    if verbose:
+        for item in sized:
+            if item["order"] is None:
+                print(f"⏸️ {item['side'].upper()} {item['symbol']} for {item['strategy']} skipped: {item['note']}")
+    for item, result in zip(placing, broker.submit_many([item["order"] for item in placing])):
+        item["result"] = result
+        order = item["order"]
+        amount = order.get("notional") or order.get("qty")
+        if result.ok:
+            log_trade(item["symbol"], item["side"], item["strategy"], item["close"], amount, order_id=result.order.id)
+            if verbose:
+                size = f"${amount:.2f}" if item["side"] == "buy" else f"{amount}"
+                note = f" ({item['note']})" if item["note"] else ""
+                print(f"✅ {item['side'].upper()} {item['symbol']} {size} for {item['strategy']}{note}")
+        elif verbose:
+            print(f"❌ {item['side'].upper()} {item['symbol']} for {item['strategy']} failed: {result.error}")
+    return sized
+
+
+def placed(sized):
+    # strategy -> side of every order that went through
+    return {item["strategy"]: item["side"] for item in sized if "result" in item and item["result"].ok}
+
+
+def trade(broker, module, signal, candles):
+    # One strategy's signal on its own (a strategy script's run()); returns
+    # the side placed, or None
+    if signal is None:
+        return None
+    return placed(execute(broker, [strategy_intent(module, signal, candles)])).get(module.STRATEGY)
+
+
+def print_allocation(sized):
+    for item in sized:
+        order = item["order"]
+        size = "-" if order is None else (f"${order['notional']:.2f}" if "notional" in order else f"{order['qty']} qty")
+        print(f"• {item['side']:<4} {item['symbol']:<12} {item['strategy']:<24} {size:>12}  {item['note']}")
+
+
+# === BENCHMARK ===
+
+def _rejected_for_funds(results):
+    return sum(1 for result in results if not result.ok and "insufficient" in str(result.error).lower())
+
+
+def benchmark(signals=200, cash=1_000.0, notional=10.0, latency=0.0):
+    # Against fake_alpaca.py: `signals` buys of a fixed notional on one
+    # account that cannot pay for all of them, placed as the strategies
+    # place them (each sized on its own) and through the allocator
+    import os
+    import fake_alpaca
+    from alpaca_trade_api.rest import REST
+    from broker_state import BrokerState
+    from order_gateway import OrderGateway
+    server = fake_alpaca.serve(latency=latency, assets=signals, cash=cash)
+    url = f"http://127.0.0.1:{server.server_port}"
+    symbols = server.fake.symbols[:signals]
+    intents = [intent(f"bench_{i % 5}", symbol, "buy", 1.0, notional=notional) for i, symbol in enumerate(symbols)]
+    orders = [{"symbol": symbol, "notional": notional, "side": "buy", "type": "market", "time_in_force": "gtc"}
+              for symbol in symbols]
+    gateway_options = dict(rate=1e9, burst=1e9)
+    os.environ.setdefault("APCA_API_DATA_URL", url)
+
+    broker = BrokerState(REST("bench-each", "bench", url), gateway=OrderGateway(REST("bench-each", "bench", url),
+                                                                               **gateway_options))
+    start = time.perf_counter()
+    results = broker.submit_many(orders)
+    each = time.perf_counter() - start
+    print(f"🧮 Sized one by one: {sum(r.ok for r in results)}/{len(orders)} placed, "
+          f"{_rejected_for_funds(results)} rejected for funds, {each:.2f}s")
+
+    api = REST("bench-batch", "bench", url)
+    broker = BrokerState(api, gateway=OrderGateway(api, **gateway_options))
+    account, positions = broker.account(), broker.positions()
+    start = time.perf_counter()
+    sized = allocate(intents, account, positions)
+    sizing = time.perf_counter() - start
+    placing = [item["order"] for item in sized if item["order"] is not None]
+    results = broker.submit_many(placing)
+    batch = time.perf_counter() - start
+    spent = sum(order["notional"] for order in placing)
+    print(f"🧮 Allocated: {sum(r.ok for r in results)}/{len(orders)} placed (${spent:,.2f} of ${cash:,.2f} cash), "
+          f"{_rejected_for_funds(results)} rejected for funds, {batch:.2f}s (sizing {sizing * 1000:.2f} ms)")
+
+    # The sizing pass on its own, for a large batch
+    many = [intent(f"bench_{i % 5}", f"SYN{i:05d}/USD", "buy", 1.0, pct=0.01) for i in range(100_000)]
+    start = time.perf_counter()
+    allocate(many, account, positions)
+    print(f"⚡ {len(many):,} intents sized in {(time.perf_counter() - start) * 1000:.0f} ms")
+    server.shutdown()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Cycle-wide position sizing")
+    parser.add_argument("--bench", action="store_true", help="compare one-by-one sizing with the allocator on a fake API")
+    parser.add_argument("--signals", type=int, default=200)
+    parser.add_argument("--cash", type=float, default=1_000.0)
+    args = parser.parse_args()
+    if args.bench:
+        benchmark(args.signals, args.cash)
+        return
+
+    from client import get_api
+    from runner import StrategyRunner
+    runner = StrategyRunner(get_api())
+    candles = runner.update()
+    intents = [strategy_intent(module, "buy", candles[module.SYMBOL]) for module in runner.modules
+               if candles[module.SYMBOL]]
+    print("🧪 What every strategy would get if all of them bought now:")
+    print_allocation(allocate(intents, runner.broker.account(), runner.broker.positions()))
+    runner.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,252 @@
+import argparse
+import json
+import os
+import shutil
+import tempfile
+import time
+import numpy as np
+import pandas as pd
+from bar_store import BarStore
+from journal import JOURNAL_PATH, connect, migrate
+
+STATE_FILE = "data/state/analytics.json"
+CHUNK_ROWS = 250_000  # fill events (by sequence number) per pass
+LEVELS = ("strategy", "symbol", "pair", "portfolio")
+SUMS = ("realized", "fees", "turnover", "qty", "cost", "fills", "sells", "wins")
+# Running totals per strategy and symbol, summed inside SQLite so the events
+# never become Python objects; columns in SUMS order, then the event count
+SUM_QUERY = ("SELECT strategy, symbol, SUM(realized_pnl), SUM(fee), "
+             "SUM(CASE WHEN kind = 'fill' THEN qty * price ELSE 0 END), "
+             "SUM(CASE WHEN side = 'sell' THEN -qty ELSE qty END), SUM(cost_delta), SUM(kind = 'fill'), "
+             "SUM(kind = 'fill' AND side = 'sell'), SUM(kind = 'fill' AND side = 'sell' AND realized_pnl > 0), "
+             "COUNT(*) FROM fills WHERE seq > ? AND seq <= ? GROUP BY strategy, symbol")
+# Only events that change realized PnL can move a drawdown
+CURVE_QUERY = ("SELECT strategy, symbol, realized_pnl FROM fills "
+               "WHERE seq > ? AND seq <= ? AND realized_pnl != 0 ORDER BY seq")
+
+# Running totals per group, kept between refreshes; each refresh reads only
+# fill events past the stored sequence number, CHUNK_ROWS at a time: the
+# sums come back from SQLite one row per strategy and symbol, and the
+# realized-PnL curve is folded in with grouped NumPy/pandas reductions.
+# Drawdown is measured on each group's cumulative realized PnL, in dollars.
+
+
+def _empty():
+    group = {name: 0.0 for name in SUMS}
+    group.update(equity=0.0, peak=0.0, max_drawdown=0.0)
+    return group
+
+
+def _levels(strategies, symbols):
+    # level -> (group code of each row, group names); the strings are
+    # factorized once and every level below is integer codes
+    strategy_codes, strategy_names = pd.factorize(np.array(strategies, dtype=object))
+    symbol_codes, symbol_names = pd.factorize(np.array(symbols, dtype=object))
+    pair_codes, pairs = pd.factorize(strategy_codes * len(symbol_names) + symbol_codes)
+    return {
+        "strategy": (strategy_codes, list(strategy_names)),
+        "symbol": (symbol_codes, list(symbol_names)),
+        "pair": (pair_codes, [f"{strategy_names[c // len(symbol_names)]}|{symbol_names[c % len(symbol_names)]}"
+                              for c in pairs]),
+        "portfolio": (np.zeros(len(strategy_codes), dtype=np.intp), ["all"]),
+    }
+
+
+class Analytics:
+    def __init__(self, path=JOURNAL_PATH, state_file=STATE_FILE, chunk_rows=CHUNK_ROWS):
+        self.path = path
+        self.state_file = state_file
+        self.chunk_rows = chunk_rows
+        self.state = self._load()
+
+    def _load(self):
+        if os.path.exists(self.state_file):
+            with open(self.state_file) as file:
+                return json.load(file)
+        return {"seq": 0, "groups": {level: {} for level in LEVELS}}
+
+    def save(self):
+        os.makedirs(os.path.dirname(self.state_file) or ".", exist_ok=True)
+        tmp = f"{self.state_file}.tmp"
+        with open(tmp, "w") as file:
+            json.dump(self.state, file)
+        os.replace(tmp, self.state_file)
+
+    def reset(self):
+        self.state = {"seq": 0, "groups": {level: {} for level in LEVELS}}
+
+    # === REFRESH ===
+
+    def refresh(self):
+        conn = connect(self.path)
+        migrate(conn)
+        processed = 0
+        try:
+            last = conn.execute("SELECT MAX(seq) FROM fills").fetchone()[0] or 0
+            while self.state["seq"] < last:
+                start, end = self.state["seq"], min(self.state["seq"] + self.chunk_rows, last)
+                pairs = conn.execute(SUM_QUERY, (start, end)).fetchall()
+                self._apply(pairs, conn.execute(CURVE_QUERY, (start, end)).fetchall())
+                self.state["seq"] = end
+                processed += sum(row[-1] for row in pairs)
+        finally:
+            conn.close()
+        self.save()
+        return processed
+
+    def _apply(self, pairs, curve):
+        # pairs: (strategy, symbol, *SUMS, count) rows; curve: (strategy,
+        # symbol, realized_pnl) of the events that moved realized PnL, in order
+        if not pairs:
+            return
+        strategies, symbols, *columns = zip(*pairs)
+        sums = np.array(columns[:len(SUMS)], dtype=float)
+        for level, (codes, names) in _levels(strategies, symbols).items():
+            groups = self.state["groups"].setdefault(level, {})
+            totals = [np.bincount(codes, weights=column, minlength=len(names)) for column in sums]
+            for i, name in enumerate(names):
+                group = groups.setdefault(name, _empty())
+                for field, total in zip(SUMS, totals):
+                    group[field] += float(total[i])
+        if not curve:
+            return
+
+        strategies, symbols, realized = zip(*curve)
+        realized = np.array(realized, dtype=float)
+        order = np.arange(len(realized))
+        for level, (codes, names) in _levels(strategies, symbols).items():
+            groups = self.state["groups"][level]
+            n = len(names)
+            # Realized-PnL curve per group, continuing from the stored totals
+            carried = np.array([[groups[name]["equity"], groups[name]["peak"]] for name in names])
+            equity = carried[codes, 0] + pd.Series(realized).groupby(codes).cumsum().to_numpy()
+            peak = np.maximum(carried[codes, 1], pd.Series(equity).groupby(codes).cummax().to_numpy())
+            drawdown = np.zeros(n)
+            np.maximum.at(drawdown, codes, peak - equity)
+            last = np.zeros(n, dtype=np.intp)
+            np.maximum.at(last, codes, order)
+            for i, name in enumerate(names):
+                group = groups[name]
+                group["equity"] = float(equity[last[i]])
+                group["peak"] = float(peak[last[i]])
+                group["max_drawdown"] = max(group["max_drawdown"], float(drawdown[i]))
+
+    # === REPORT ===
+
+    def report(self, level="strategy", store=None):
+        # Open positions are marked at the last stored minute close
+        store = store or BarStore()
+        pairs = self.state["groups"].get("pair", {})
+        closes = {}
+        marks = {}
+        for name, group in pairs.items():
+            strategy, symbol = name.split("|", 1)
+            if group["qty"] <= 1e-12:
+                continue
+            if symbol not in closes:
+                last = store.arrays(symbol, "1Min", limit=1)["close"]
+                closes[symbol] = float(last[-1]) if len(last) else None
+            if closes[symbol] is None:
+                continue
+            exposure = group["qty"] * closes[symbol]
+            target = {"strategy": strategy, "symbol": symbol, "pair": name, "portfolio": "all"}[level]
+            mark = marks.setdefault(target, [0.0, 0.0])
+            mark[0] += exposure
+            mark[1] += exposure - group["cost"]
+
+        rows = []
+        for name, group in sorted(self.state["groups"].get(level, {}).items()):
+            exposure, unrealized = marks.get(name, (0.0, 0.0))
+            rows.append({
+                level: name,
+                "realized": group["realized"],
+                "unrealized": unrealized,
+                "fees": group["fees"],
+                "win_rate": group["wins"] / group["sells"] if group["sells"] else None,
+                "max_drawdown": group["max_drawdown"],
+                "exposure": exposure,
+                "turnover": group["turnover"],
+                "fills": int(group["fills"]),
+            })
+        return rows
+
+
+def print_report(rows, level):
+    print(f"{level:<22} {'realized':>11} {'unrealized':>11} {'fees':>9} {'win rate':>9} "
+          f"{'max dd':>9} {'exposure':>11} {'turnover':>12} {'fills':>7}")
+    for row in rows:
+        win_rate = f"{row['win_rate']:.0%}" if row["win_rate"] is not None else "-"
+        print(f"{row[level]:<22} {row['realized']:>11.2f} {row['unrealized']:>11.2f} {row['fees']:>9.2f} "
+              f"{win_rate:>9} {row['max_drawdown']:>9.2f} {row['exposure']:>11.2f} {row['turnover']:>12.2f} "
+              f"{row['fills']:>7}")
+
+
+# === BENCHMARK ===
+
+def synthetic_journal(path, rows, seed=0):
+    rng = np.random.default_rng(seed)
+    strategies = np.array(["btc_high_risk", "eth_semi_risky", "shib_daytrade", "sol_daytrade", "sol_momentum_trend"])
+    symbols = np.array(["BTC/USD", "ETH/USD", "SHIB/USD", "SOL/USD", "SOL/USD"])
+    conn = connect(path)
+    migrate(conn)
+    batch = 500_000
+    for start in range(0, rows, batch):
+        n = min(batch, rows - start)
+        pick = rng.integers(0, len(strategies), n)
+        side = np.where(rng.random(n) < 0.5, "buy", "sell")
+        qty = rng.random(n)
+        price = 100 * np.exp(rng.normal(0, 0.01, n))
+        realized = np.where(side == "sell", rng.normal(0, 1, n), 0.0)
+        cost = np.where(side == "buy", qty * price, -qty * price)
+        with conn:
+            conn.executemany(
+                "INSERT INTO fills (timestamp, trade_id, strategy, symbol, side, kind, qty, price, fee, "
+                "realized_pnl, cost_delta) VALUES (NULL, NULL, ?, ?, ?, 'fill', ?, ?, ?, ?, ?)",
+                zip(strategies[pick].tolist(), symbols[pick].tolist(), side.tolist(), qty.tolist(),
+                    price.tolist(), (qty * price * 0.0025).tolist(), realized.tolist(), cost.tolist()))
+    conn.close()
+
+
+def benchmark(rows):
+    scratch = tempfile.mkdtemp(prefix="analytics-")
+    try:
+        path = os.path.join(scratch, "journal.db")
+        print(f"🏗️ Writing {rows:,} synthetic fill events...")
+        synthetic_journal(path, rows)
+        size = os.path.getsize(path) / 1e6
+        analytics = Analytics(path, os.path.join(scratch, "analytics.json"))
+        start = time.perf_counter()
+        processed = analytics.refresh()
+        elapsed = time.perf_counter() - start
+        print(f"📊 Full pass: {processed:,} events ({size:,.0f} MB journal) in {elapsed:.2f}s "
+              f"({processed / elapsed:,.0f} events/s, {size / elapsed:,.0f} MB/s)")
+        synthetic_journal(path, rows // 100, seed=1)
+        start = time.perf_counter()
+        processed = Analytics(path, os.path.join(scratch, "analytics.json")).refresh()
+        print(f"🔁 Incremental refresh: {processed:,} new events in {time.perf_counter() - start:.3f}s")
+    finally:
+        shutil.rmtree(scratch, ignore_errors=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="PnL and portfolio analytics over the trade journal")
+    parser.add_argument("--by", choices=LEVELS, default="strategy", help="grouping for the report")
+    parser.add_argument("--rebuild", action="store_true", help="recompute from the first fill event")
+    parser.add_argument("--bench", type=int, metavar="ROWS", help="time a pass over a synthetic journal")
+    args = parser.parse_args()
+
+    if args.bench:
+        benchmark(args.bench)
+        return
+
+    analytics = Analytics()
+    if args.rebuild:
+        analytics.reset()
+    start = time.perf_counter()
+    processed = analytics.refresh()
+    print(f"📊 Processed {processed:,} new fill event(s) in {time.perf_counter() - start:.2f}s\n")
+    print_report(analytics.report(args.by), args.by)
+
+
+if __name__ == "__main__":
+    main()
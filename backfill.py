@@ -0,0 +1,235 @@
+import argparse
+import importlib
+import json
+import math
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+import numpy as np
+import pandas as pd
+from alpaca_trade_api.rest import TimeFrame
+from bar_store import COLUMNS, BarStore
+from rate_limit import TokenBucket
+
+BACKFILL_DIR = "data/backfill"
+CHUNK = "7D"  # time span per request chunk (10,080 minutes, two full pages)
+MAX_WORKERS = 8
+DATA_RATE = 200 / 60  # market data requests per second
+DATA_BURST = 10
+PAGE_LIMIT = 10_000  # bars per page, Alpaca's maximum
+MAX_GAP_MINUTES = 60  # longer stretches without a bar are reported
+MINUTE = pd.Timedelta(minutes=1)
+BAR_BYTES = sum(dtype.itemsize for dtype in COLUMNS.values())
+
+# Downloads [start, end) of minute bars as symbol x time chunks, each saved as
+# its own compressed .npz (one array per column) and recorded in
+# checkpoint.json, so an interrupted run picks up with the chunks it lacks.
+# merge() folds the chunks into the bar store afterwards.
+
+
+def chunk_ranges(start, end, chunk=CHUNK):
+    # Edges on a grid of whole chunks from the epoch, so the same span always
+    # gets the same chunk keys whatever "now" is; only the partial chunks at
+    # either end move with start and end
+    step = pd.Timedelta(chunk).value
+    first = -(-start.value // step) * step
+    edges = [start] + [pd.Timestamp(value, tz="UTC") for value in range(first, end.value, step) if value > start.value]
+    edges.append(end)
+    return list(zip(edges[:-1], edges[1:]))
+
+
+def _utc_minute(value):
+    value = pd.Timestamp(value)
+    return (value.tz_localize("UTC") if value.tz is None else value.tz_convert("UTC")).floor("min")
+
+
+def _key(start, end):
+    return f"{start:%Y%m%dT%H%M}_{end:%Y%m%dT%H%M}"
+
+
+class Backfill:
+    def __init__(self, api, symbols, start, end, root=BACKFILL_DIR, chunk=CHUNK,
+                 max_workers=MAX_WORKERS, rate=DATA_RATE, burst=DATA_BURST):
+        self.api = api
+        self.symbols = list(dict.fromkeys(symbols))
+        self.start = _utc_minute(start)
+        self.end = _utc_minute(end)
+        self.root = root
+        self.ranges = chunk_ranges(self.start, self.end, chunk)
+        self.max_workers = max_workers
+        self.bucket = TokenBucket(rate, burst)
+        self.checkpoint_file = os.path.join(root, "checkpoint.json")
+        self.done = self._load_checkpoint()
+        self._lock = threading.Lock()
+        self.requests = 0
+
+    # === CHECKPOINT ===
+
+    def _load_checkpoint(self):
+        if not os.path.exists(self.checkpoint_file):
+            return {}
+        with open(self.checkpoint_file) as file:
+            return json.load(file).get("done", {})
+
+    def _save_checkpoint(self):
+        # Called with self._lock held
+        os.makedirs(self.root, exist_ok=True)
+        tmp = f"{self.checkpoint_file}.tmp"
+        with open(tmp, "w") as file:
+            json.dump({"done": self.done}, file)
+        os.replace(tmp, self.checkpoint_file)
+
+    def chunk_file(self, symbol, start, end):
+        return os.path.join(self.root, symbol.replace("/", "-"), f"{_key(start, end)}.npz")
+
+    def pending(self):
+        return [
+            (symbol, start, end)
+            for symbol in self.symbols
+            for start, end in self.ranges
+            if _key(start, end) not in self.done.get(symbol, {})
+        ]
+
+    # === DOWNLOAD ===
+
+    def _fetch(self, symbol, start, end):
+        minutes = int((end - start) / MINUTE)
+        pages = max(1, math.ceil(minutes / PAGE_LIMIT))
+        for _ in range(pages):
+            self.bucket.acquire()  # one token per page: a chunk may need more pages than the burst holds
+        # `end` is inclusive on Alpaca's side; a limit of the whole span
+        # lets the client ask for full 10,000-bar pages
+        bars = self.api.get_crypto_bars([symbol], TimeFrame.Minute, start=start.isoformat(),
+                                        end=(end - MINUTE).isoformat(), limit=minutes).df
+        timestamps = pd.DatetimeIndex(bars.index).as_unit("ns").asi8 if not bars.empty \
+            else np.empty(0, dtype=np.int64)
+        keep = (timestamps >= start.value) & (timestamps < end.value)
+        data = {"timestamp": timestamps[keep]}
+        for column in list(COLUMNS)[1:]:
+            data[column] = bars[column].to_numpy(dtype=COLUMNS[column])[keep] if not bars.empty \
+                else np.empty(0, dtype=COLUMNS[column])
+
+        path = self.chunk_file(symbol, start, end)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(f"{path}.tmp", "wb") as file:
+            np.savez_compressed(file, **data)
+        os.replace(f"{path}.tmp", path)
+
+        count = len(data["timestamp"])
+        with self._lock:
+            self.requests += pages
+            self.done.setdefault(symbol, {})[_key(start, end)] = count
+            self._save_checkpoint()
+        return count, os.path.getsize(path)
+
+    def run(self):
+        tasks = self.pending()
+        total = len(self.symbols) * len(self.ranges)
+        print(f"⬇️ Backfilling {len(self.symbols)} symbol(s) from {self.start:%Y-%m-%d %H:%M} to "
+              f"{self.end:%Y-%m-%d %H:%M}: {len(tasks)} of {total} chunk(s) to fetch")
+        bars = written = 0
+        finished = 0
+        begin = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            futures = [pool.submit(self._fetch, *task) for task in tasks]
+            for future in as_completed(futures):
+                count, size = future.result()
+                bars += count
+                written += size
+                finished += 1
+                if finished % max(1, len(tasks) // 10) == 0 or finished == len(tasks):
+                    elapsed = time.perf_counter() - begin
+                    print(f"• {finished}/{len(tasks)} chunks, {bars:,} bars ({bars / elapsed:,.0f} bars/s)")
+        elapsed = time.perf_counter() - begin
+        raw_mb = bars * BAR_BYTES / 1e6
+        if tasks:
+            print(f"✅ {bars:,} bars in {elapsed:.1f}s over {self.requests} request(s): {bars / elapsed:,.0f} bars/s, "
+                  f"{raw_mb / elapsed:.2f} MB/s ({raw_mb:.1f} MB raw → {written / 1e6:.1f} MB compressed)")
+        return bars
+
+    # === VERIFY / MERGE ===
+
+    def load(self, symbol):
+        parts = {column: [] for column in COLUMNS}
+        for start, end in self.ranges:
+            path = self.chunk_file(symbol, start, end)
+            if not os.path.exists(path):
+                continue
+            with np.load(path) as chunk:
+                for column in COLUMNS:
+                    parts[column].append(chunk[column])
+        return {
+            column: np.concatenate(values) if values else np.empty(0, dtype=COLUMNS[column])
+            for column, values in parts.items()
+        }
+
+    def verify(self, symbol, max_gap=MAX_GAP_MINUTES):
+        # Every chunk fetched and on disk, timestamps strictly increasing, and
+        # no stretch longer than max_gap minutes without a bar
+        problems = []
+        missing = [_key(s, e) for s, e in self.ranges
+                   if _key(s, e) not in self.done.get(symbol, {})
+                   or (self.done[symbol][_key(s, e)] and not os.path.exists(self.chunk_file(symbol, s, e)))]
+        if missing:
+            problems.append(f"{len(missing)} chunk(s) not downloaded")
+        timestamps = self.load(symbol)["timestamp"]
+        steps = np.diff(timestamps)
+        if (steps <= 0).any():
+            problems.append(f"{int((steps <= 0).sum())} out-of-order or duplicate bar(s)")
+        edges = np.concatenate([[self.start.value], timestamps, [self.end.value]])
+        gaps = np.diff(edges) // MINUTE.value - 1
+        long_gaps = np.flatnonzero(gaps >= max_gap)
+        expected = int((self.end - self.start) / MINUTE)
+        coverage = len(timestamps) / expected if expected else 1.0
+        status = "✅" if not problems and not len(long_gaps) else "⚠️"
+        print(f"{status} {symbol}: {len(timestamps):,} bars, {coverage:.1%} of minutes covered"
+              + (f", {len(long_gaps)} gap(s) of {max_gap}+ min (longest {int(gaps.max())} min "
+                 f"after {pd.Timestamp(int(edges[gaps.argmax()]), tz='UTC'):%Y-%m-%d %H:%M})" if len(long_gaps) else "")
+              + (f" — {'; '.join(problems)}" if problems else ""))
+        return not problems
+
+    def merge(self, store=None):
+        store = store or BarStore()
+        for symbol in self.symbols:
+            added = store.merge(symbol, "1Min", self.load(symbol))
+            print(f"🗄️ {symbol}: {added:,} new bar(s) merged into the bar store")
+
+
+def strategy_symbols():
+    from market_data import collect_symbols
+    from runner import STRATEGIES
+    return collect_symbols([importlib.import_module(name) for name in STRATEGIES])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Download historical minute bars into compressed chunks")
+    parser.add_argument("symbols", nargs="*", help="symbols to fetch (default: every strategy's symbol)")
+    parser.add_argument("--start", help="first minute (UTC); default --days before --end")
+    parser.add_argument("--end", help="stop before this minute (UTC); default now")
+    parser.add_argument("--days", type=float, default=365)
+    parser.add_argument("--chunk", default=CHUNK, help="time span per request chunk (e.g. 7D, 12h)")
+    parser.add_argument("--workers", type=int, default=MAX_WORKERS)
+    parser.add_argument("--rate", type=float, default=DATA_RATE, help="requests per second")
+    parser.add_argument("--root", default=BACKFILL_DIR)
+    parser.add_argument("--max-gap", type=int, default=MAX_GAP_MINUTES, help="report gaps of this many minutes")
+    parser.add_argument("--merge", action="store_true", help="merge the downloaded bars into the bar store")
+    args = parser.parse_args()
+
+    from client import get_api
+    end = pd.Timestamp(args.end) if args.end else pd.Timestamp.now(tz="UTC").floor("min")
+    start = pd.Timestamp(args.start) if args.start else end - pd.Timedelta(days=args.days)
+    backfill = Backfill(get_api(), args.symbols or strategy_symbols(), start, end, root=args.root,
+                        chunk=args.chunk, max_workers=args.workers, rate=args.rate)
+    backfill.run()
+    ok = all([backfill.verify(symbol, args.max_gap) for symbol in backfill.symbols])
+    if args.merge:
+        if ok:
+            backfill.merge()
+        else:
+            print("❌ Not merging: fix the problems above (re-run to fetch missing chunks) first.")
+            raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
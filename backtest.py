@@ -0,0 +1,183 @@
+import argparse
+import importlib
+import time
+import numpy as np
+import pandas as pd
+from bar_store import BarStore
+from panel import RULES, TIMEFRAME
+from resample import resample
+from runner import STRATEGIES
+
+FEE_RATE = 0.0025  # Alpaca crypto taker fee per side
+SLIPPAGE = 0.0005  # fraction of price lost on every fill
+INITIAL_CASH = 10_000.0
+BARS_PER_SECOND_TARGET = 5_000_000  # minute bars per second, per strategy
+
+
+# === DATA ===
+
+def load_minutes(symbol, start=None, end=None, store=None):
+    minutes = (store or BarStore()).arrays(symbol, "1Min", start=start)
+    if end is not None:
+        stop = int(np.searchsorted(minutes["timestamp"], pd.Timestamp(end).value, side="left"))
+        minutes = {column: values[:stop] for column, values in minutes.items()}
+    return minutes
+
+
+# === SIMULATION ===
+
+def positions_from_signals(buy, sell):
+    # Holding state after each candle: the latest buy/sell event wins, a buy
+    # while holding or a sell while flat changes nothing
+    event = np.where(buy, 1, np.where(sell, 0, -1)).astype(np.int8)
+    index = np.where(event >= 0, np.arange(len(event)), -1)
+    np.maximum.accumulate(index, out=index)
+    return np.where(index >= 0, event[np.maximum(index, 0)], 0).astype(np.int8)
+
+
+def simulate(candles, buy, sell, allocation_pct=None, notional=None,
+             fee=FEE_RATE, slippage=SLIPPAGE, initial_cash=INITIAL_CASH):
+    n = len(candles["close"])
+    opens, closes = candles["open"], candles["close"]
+
+    # A signal on candle t's close is filled at candle t+1's open
+    held = np.zeros(n, dtype=np.int8)
+    held[1:] = positions_from_signals(buy, sell)[:-1]
+    change = np.diff(held, prepend=np.int8(0))
+    entries = np.flatnonzero(change == 1)
+    exits = np.flatnonzero(change == -1)
+    closed = len(exits)
+
+    entry_price = opens[entries] * (1 + slippage)
+    exit_price = opens[exits] * (1 - slippage)
+    gross = exit_price / entry_price[:closed]
+    net = (1 - fee) ** 2 * gross - 1  # return on the dollars put in
+
+    # Dollars put into each trade and equity after each closed trade
+    if notional is not None:
+        invested = np.full(len(entries), float(notional))
+        realized = initial_cash + np.concatenate([[0.0], np.cumsum(notional * net)])
+    else:
+        realized = initial_cash * np.concatenate([[1.0], np.cumprod(1 + allocation_pct * net)])
+        invested = allocation_pct * realized[:len(entries)]
+    pnl = invested[:closed] * net
+
+    # Mark to market: open trades at the candle close, flat periods at the
+    # equity left by the last closed trade
+    trade = np.cumsum(change == 1) - 1
+    done = np.searchsorted(exits, np.arange(n), side="right")
+    equity = realized[done].copy()
+    inside = held == 1
+    if inside.any():
+        k = trade[inside]
+        equity[inside] = realized[k] + invested[k] * ((1 - fee) * closes[inside] / entry_price[k] - 1)
+
+    fees = invested * fee
+    fees[:closed] += invested[:closed] * (1 - fee) * gross * fee
+
+    timestamps = pd.DatetimeIndex(np.asarray(candles["timestamp"]).view("datetime64[ns]"), tz="UTC")
+    trades = pd.DataFrame({
+        "entry_time": timestamps[entries],
+        "exit_time": timestamps[exits].append(pd.DatetimeIndex([pd.NaT] * (len(entries) - closed), tz="UTC")),
+        "entry_price": entry_price,
+        "exit_price": np.concatenate([exit_price, np.full(len(entries) - closed, np.nan)]),
+        "invested": invested,
+        "fees": fees,
+        "pnl": np.concatenate([pnl, np.full(len(entries) - closed, np.nan)]),
+    })
+    equity = pd.Series(equity, index=timestamps, name="equity")
+    return trades, equity
+
+
+def summarize(trades, equity, initial_cash=INITIAL_CASH):
+    closed = trades["pnl"].dropna()
+    peak = np.maximum.accumulate(equity.to_numpy()) if len(equity) else np.array([initial_cash])
+    drawdown = (equity.to_numpy() / peak - 1).min() if len(equity) else 0.0
+    return {
+        "trades": len(trades),
+        "win_rate": float((closed > 0).mean()) if len(closed) else 0.0,
+        "pnl": float(closed.sum()),
+        "return": float(equity.iloc[-1] / initial_cash - 1) if len(equity) else 0.0,
+        "max_drawdown": float(drawdown),
+        "fees": float(trades["fees"].sum()),
+    }
+
+
+def backtest(module, minutes, params=None, timeframe=TIMEFRAME, **costs):
+    params = dict(module.PARAMS, **(params or {}))
+    candles = resample(minutes, timeframe)
+    buy, sell = RULES[module.RULE](candles, params)
+    trades, equity = simulate(candles, buy, sell,
+                              allocation_pct=params.get("allocation_pct"),
+                              notional=params.get("notional"), **costs)
+    return trades, equity, summarize(trades, equity)
+
+
+# === CLI ===
+
+def synthetic_minutes(count, seed=0):
+    rng = np.random.default_rng(seed)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.001, count)))
+    open_ = np.concatenate([[close[0]], close[:-1]])
+    return {
+        "timestamp": pd.Timestamp("2020-01-01", tz="UTC").value + np.arange(count, dtype=np.int64) * 60_000_000_000,
+        "open": open_,
+        "high": np.maximum(open_, close),
+        "low": np.minimum(open_, close),
+        "close": close,
+        "volume": rng.random(count),
+    }
+
+
+def benchmark(years=2.0):
+    count = int(years * 365 * 24 * 60)
+    minutes = synthetic_minutes(count)
+    print(f"🏁 Benchmarking {len(STRATEGIES)} strategies over {count:,} synthetic minute bars ({years:g} years)...")
+    slowest = None
+    for name in STRATEGIES:
+        module = importlib.import_module(name)
+        start = time.perf_counter()
+        trades, equity, stats = backtest(module, minutes)
+        elapsed = time.perf_counter() - start
+        rate = count / elapsed
+        slowest = rate if slowest is None else min(slowest, rate)
+        print(f"• {name:<15} {elapsed:.3f}s  {rate:,.0f} bars/s  {stats['trades']} trades")
+    ok = slowest >= BARS_PER_SECOND_TARGET
+    print(f"{'✅' if ok else '❌'} Slowest strategy: {slowest:,.0f} bars/s (target {BARS_PER_SECOND_TARGET:,})")
+    return ok
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Vectorized backtest of the strategy rules")
+    parser.add_argument("strategies", nargs="*", default=STRATEGIES, help="strategy modules (default: all)")
+    parser.add_argument("--start", help="first minute to use (UTC)")
+    parser.add_argument("--end", help="stop before this minute (UTC)")
+    parser.add_argument("--timeframe", default=TIMEFRAME)
+    parser.add_argument("--fee", type=float, default=FEE_RATE)
+    parser.add_argument("--slippage", type=float, default=SLIPPAGE)
+    parser.add_argument("--bench", action="store_true", help="check throughput on synthetic data")
+    parser.add_argument("--years", type=float, default=2.0, help="years of synthetic data for --bench")
+    args = parser.parse_args()
+
+    if args.bench:
+        raise SystemExit(0 if benchmark(args.years) else 1)
+
+    store = BarStore()
+    for name in args.strategies:
+        module = importlib.import_module(name)
+        minutes = load_minutes(module.SYMBOL, args.start, args.end, store)
+        if len(minutes["timestamp"]) == 0:
+            print(f"⚠️ No stored bars for {module.SYMBOL}. Run the bot or a backfill first.")
+            continue
+        start = time.perf_counter()
+        trades, equity, stats = backtest(module, minutes, timeframe=args.timeframe,
+                                         fee=args.fee, slippage=args.slippage)
+        elapsed = time.perf_counter() - start
+        print(f"\n📈 {module.STRATEGY} on {module.SYMBOL} ({len(minutes['timestamp']):,} minute bars, {elapsed:.3f}s)")
+        print(f"• Trades:       {stats['trades']} (win rate {stats['win_rate']:.0%})")
+        print(f"• Return:       {stats['return']:.2%}  (PnL ${stats['pnl']:.2f}, fees ${stats['fees']:.2f})")
+        print(f"• Max drawdown: {stats['max_drawdown']:.2%}")
+
+
+if __name__ == "__main__":
+    main()
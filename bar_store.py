@@ -0,0 +1,127 @@
+import os
+import threading
+import numpy as np
+import pandas as pd
+
+# One raw little-endian file per column, appended in timestamp order
+COLUMNS = {
+    "timestamp": np.dtype("<i8"),  # bar open time, ns since epoch (UTC)
+    "open": np.dtype("<f8"),
+    "high": np.dtype("<f8"),
+    "low": np.dtype("<f8"),
+    "close": np.dtype("<f8"),
+    "volume": np.dtype("<f8"),
+}
+
+
+class BarStore:
+    def __init__(self, root="data/bars"):
+        self.root = root
+        self._locks = {}
+        self._locks_guard = threading.Lock()
+
+    def _lock(self, symbol, timeframe):
+        with self._locks_guard:
+            return self._locks.setdefault((symbol, timeframe), threading.Lock())
+
+    def path(self, symbol, timeframe):
+        return os.path.join(self.root, symbol.replace("/", "-"), timeframe)
+
+    def _column_file(self, symbol, timeframe, column):
+        return os.path.join(self.path(symbol, timeframe), f"{column}.bin")
+
+    def symbols(self):
+        if not os.path.isdir(self.root):
+            return []
+        return sorted(name.replace("-", "/") for name in os.listdir(self.root))
+
+    def length(self, symbol, timeframe):
+        # A crash mid-append can leave columns of different lengths;
+        # only rows present in every column count
+        lengths = []
+        for column, dtype in COLUMNS.items():
+            file = self._column_file(symbol, timeframe, column)
+            lengths.append(os.path.getsize(file) // dtype.itemsize if os.path.exists(file) else 0)
+        return min(lengths)
+
+    def last_timestamp(self, symbol, timeframe):
+        n = self.length(symbol, timeframe)
+        if n == 0:
+            return None
+        file = self._column_file(symbol, timeframe, "timestamp")
+        return int(np.memmap(file, dtype=COLUMNS["timestamp"], mode="r", offset=(n - 1) * 8, shape=(1,))[0])
+
+    def append(self, symbol, timeframe, frame):
+        if frame.empty:
+            return 0
+        timestamps = pd.DatetimeIndex(frame.index).as_unit("ns").asi8
+        with self._lock(symbol, timeframe):
+            os.makedirs(self.path(symbol, timeframe), exist_ok=True)
+            n = self.length(symbol, timeframe)
+            last = self.last_timestamp(symbol, timeframe)
+            keep = np.ones(len(timestamps), dtype=bool) if last is None else timestamps > last
+            if not keep.any():
+                return 0
+            data = {"timestamp": timestamps[keep]}
+            for column in list(COLUMNS)[1:]:
+                data[column] = frame[column].to_numpy(dtype=COLUMNS[column])[keep]
+            for column, dtype in COLUMNS.items():
+                file = self._column_file(symbol, timeframe, column)
+                with open(file, "ab") as f:
+                    f.truncate(n * dtype.itemsize)
+                    f.write(np.ascontiguousarray(data[column], dtype=dtype).tobytes())
+            return int(keep.sum())
+
+    def merge(self, symbol, timeframe, bars):
+        # Folds bars from any period (e.g. a backfill) into the store; where
+        # both have a bar for the same minute the stored one is kept. Older
+        # bars mean rewriting the columns, so run this while the bot is
+        # stopped; newer-only bars are a plain append.
+        timestamps = np.asarray(bars["timestamp"], dtype=COLUMNS["timestamp"])
+        if len(timestamps) == 0:
+            return 0
+        with self._lock(symbol, timeframe):
+            os.makedirs(self.path(symbol, timeframe), exist_ok=True)
+            n = self.length(symbol, timeframe)
+            last = self.last_timestamp(symbol, timeframe)
+            if (last is None or timestamps[0] > last) and (np.diff(timestamps) > 0).all():
+                for column, dtype in COLUMNS.items():
+                    with open(self._column_file(symbol, timeframe, column), "ab") as f:
+                        f.truncate(n * dtype.itemsize)
+                        f.write(np.ascontiguousarray(bars[column], dtype=dtype).tobytes())
+                return len(timestamps)
+            existing = {column: np.array(values) for column, values in self.arrays(symbol, timeframe).items()}
+            combined = np.concatenate([existing["timestamp"], timestamps])
+            # np.unique keeps the first occurrence, i.e. the stored bar
+            merged_ts, first = np.unique(combined, return_index=True)
+            added = len(merged_ts) - len(existing["timestamp"])
+            if added == 0:
+                return 0
+            for column, dtype in COLUMNS.items():
+                values = np.concatenate([existing[column], np.asarray(bars[column], dtype=dtype)])[first]
+                file = self._column_file(symbol, timeframe, column)
+                with open(f"{file}.tmp", "wb") as f:
+                    f.write(np.ascontiguousarray(values, dtype=dtype).tobytes())
+                os.replace(f"{file}.tmp", file)
+            return added
+
+    def arrays(self, symbol, timeframe, start=None, limit=None):
+        # Read-only memory-mapped views, sliced by timestamp without copying
+        n = self.length(symbol, timeframe)
+        if n == 0:
+            return {column: np.empty(0, dtype=dtype) for column, dtype in COLUMNS.items()}
+        columns = {
+            column: np.memmap(self._column_file(symbol, timeframe, column), dtype=dtype, mode="r", shape=(n,))
+            for column, dtype in COLUMNS.items()
+        }
+        lo = 0
+        if start is not None:
+            lo = int(np.searchsorted(columns["timestamp"], pd.Timestamp(start).value, side="left"))
+        if limit is not None:
+            lo = max(lo, n - limit)
+        return {column: values[lo:] for column, values in columns.items()}
+
+    def read(self, symbol, timeframe, start=None, limit=None):
+        data = self.arrays(symbol, timeframe, start=start, limit=limit)
+        index = pd.DatetimeIndex(np.asarray(data["timestamp"]).view("datetime64[ns]"), tz="UTC", name="timestamp")
+        return pd.DataFrame({column: np.array(data[column]) for column in list(COLUMNS)[1:]}, index=index)
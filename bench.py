@@ -0,0 +1,178 @@
+import argparse
+import contextlib
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+from datetime import datetime
+
+BASELINE_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "bench_baseline.json")
+SIZES = (5, 50, 500)
+LATENCY = 0.05  # seconds per fake API response
+TOLERANCE = 0.25  # slower/larger than baseline by more than this is a regression
+COMPARED = ("wall_s", "cpu_s", "requests", "peak_mb")
+SLACK = {"wall_s": 0.2, "cpu_s": 0.1, "requests": 0, "peak_mb": 5.0}  # smaller changes never count
+# The fake server and the worker both run on this clock, so every run syncs
+# the same bars and trades on the same signals; with the real clock the
+# request counts moved with the signals of the hour and whether a minute
+# ticked over between the cold and warm cycles
+CLOCK = datetime.fromisoformat("2026-03-02T15:37:30+00:00")  # signals that buy in both cycles
+
+
+def universe(n):
+    # The strategies' own symbols first, padded with synthetic ones
+    import importlib
+    from market_data import collect_symbols
+    from runner import STRATEGIES
+    symbols = collect_symbols([importlib.import_module(name) for name in STRATEGIES])
+    return (symbols + [f"SYN{i:03d}/USD" for i in range(n)])[:max(n, len(symbols))]
+
+
+def _server_stats(url):
+    with urllib.request.urlopen(f"{url}/_stats") as response:
+        return json.load(response)
+
+
+def _cpu():
+    usage = resource.getrusage(resource.RUSAGE_SELF)
+    return usage.ru_utime + usage.ru_stime
+
+
+# === WORKER (one fresh interpreter per universe size) ===
+
+def _measure(runner, url):
+    import metrics
+    metrics.reset()
+    before = _server_stats(url)
+    cpu = _cpu()
+    start = time.perf_counter()
+    with open(os.devnull, "w") as quiet, contextlib.redirect_stdout(quiet):
+        runner.run_cycle()
+    wall = time.perf_counter() - start
+    after = _server_stats(url)
+
+    stages = {}
+    for (stage, _strategy, _symbol), histogram in metrics._series.items():
+        stages[stage] = stages.get(stage, 0.0) + histogram.total
+    return {
+        "wall_s": round(wall, 4),
+        "cpu_s": round(_cpu() - cpu, 4),
+        "requests": after["total"] - before["total"],
+        "bars": after["bars"] - before["bars"],
+        "stages_s": {stage: round(total, 4) for stage, total in sorted(stages.items())},
+    }
+
+
+def worker(n, url):
+    # Cold cycle starts from an empty bar store; the warm one right after it
+    # is the steady state of a running bot
+    os.environ.update({"APCA_API_KEY_ID": "bench", "APCA_API_SECRET_KEY": "bench",
+                       "APCA_API_BASE_URL": url, "APCA_API_DATA_URL": url})
+    import market_data
+    market_data.utc_now = lambda: CLOCK
+    with tempfile.TemporaryDirectory(prefix="bench-") as scratch:
+        os.chdir(scratch)
+        from client import get_api
+        from runner import StrategyRunner
+        runner = StrategyRunner(get_api())
+        runner.symbols = universe(n)
+        result = {"symbols": len(runner.symbols)}
+        result["cold"] = _measure(runner, url)
+        runner.decisions.clear()  # a live cycle always has a new candle to decide on
+        result["warm"] = _measure(runner, url)
+        runner.close()
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024  # KiB on Linux
+        result["cold"]["peak_mb"] = result["warm"]["peak_mb"] = round(peak, 1)
+    print(json.dumps(result), file=sys.__stdout__)
+
+
+# === HARNESS ===
+
+def run(sizes=SIZES, latency=LATENCY):
+    import fake_alpaca
+    pinned = int(CLOCK.timestamp()) * 10**9
+    server = fake_alpaca.serve(latency=latency, now_ns=lambda: pinned)
+    fake_alpaca.check(server)
+    url = f"http://127.0.0.1:{server.server_port}"
+    here = os.path.dirname(os.path.abspath(__file__))
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, [here, os.environ.get("PYTHONPATH")])))
+
+    results = {}
+    for n in sizes:
+        print(f"🏁 {n} symbol(s)...", flush=True)
+        out = subprocess.run([sys.executable, os.path.join(here, "bench.py"), "--worker", str(n), "--url", url],
+                             capture_output=True, text=True, env=env)
+        if out.returncode != 0:
+            print(out.stderr)
+            raise SystemExit(f"❌ Benchmark worker for {n} symbols failed")
+        results[str(n)] = json.loads(out.stdout.strip().splitlines()[-1])
+    server.shutdown()
+    return {"latency_s": latency, "clock": CLOCK.isoformat(), "python": sys.version.split()[0], "results": results}
+
+
+def compare(current, baseline, tolerance=TOLERANCE):
+    regressions = 0
+    print(f"\n{'symbols':>7} {'phase':<5} " + " ".join(f"{m:>20}" for m in COMPARED))
+    for n, result in current["results"].items():
+        for phase in ("cold", "warm"):
+            cells = []
+            for metric in COMPARED:
+                now = result[phase][metric]
+                then = baseline.get("results", {}).get(n, {}).get(phase, {}).get(metric) if baseline else None
+                if not then:
+                    cells.append(f"{now:>20}")
+                    continue
+                ratio = now / then
+                worse = ratio > 1 + tolerance and now - then > SLACK[metric]
+                better = ratio < 1 - tolerance and then - now > SLACK[metric]
+                mark = "❌" if worse else "✅" if better else "  "
+                regressions += worse
+                cells.append(f"{now:>9} ({ratio:>5.2f}x){mark}")
+            print(f"{n:>7} {phase:<5} " + " ".join(cells))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Cycle benchmark against the local fake Alpaca server")
+    parser.add_argument("--sizes", type=int, nargs="+", default=list(SIZES), help="universe sizes to run")
+    parser.add_argument("--latency", type=float, default=LATENCY, help="fake API latency in seconds")
+    parser.add_argument("--baseline", default=BASELINE_FILE)
+    parser.add_argument("--save-baseline", action="store_true", help="record this run as the new baseline")
+    parser.add_argument("--worker", type=int, help=argparse.SUPPRESS)
+    parser.add_argument("--url", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        worker(args.worker, args.url)
+        return
+
+    current = run(args.sizes, args.latency)
+    baseline = None
+    if os.path.exists(args.baseline):
+        with open(args.baseline) as file:
+            baseline = json.load(file)
+        if baseline.get("latency_s") != current["latency_s"]:
+            print(f"⚠️ Baseline was recorded with {baseline.get('latency_s')}s latency; ratios are not comparable.")
+        if baseline.get("clock") != current["clock"]:
+            print(f"⚠️ Baseline was recorded at {baseline.get('clock') or 'the wall clock'}; request counts are not comparable.")
+    regressions = compare(current, baseline)
+
+    if args.save_baseline:
+        with open(args.baseline, "w") as file:
+            json.dump(current, file, indent=2)
+        print(f"\n💾 Baseline saved to {args.baseline}")
+    elif baseline is None:
+        print(f"\nℹ️ No baseline at {args.baseline}. Run with --save-baseline to record one.")
+    elif regressions:
+        print(f"\n❌ {regressions} metric(s) regressed by more than {TOLERANCE:.0%}")
+        raise SystemExit(1)
+    else:
+        print("\n✅ No regressions against the baseline")
+
+
+if __name__ == "__main__":
+    main()
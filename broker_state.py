@@ -0,0 +1,76 @@
+import threading
+import metrics
+from order_gateway import OrderGateway
+
+
+def _normalize(symbol):
+    # Positions come back as "BTCUSD" while orders and bars use "BTC/USD"
+    return symbol.replace("/", "")
+
+
+# Account and positions snapshotted once per cycle and shared by every
+# strategy; our own orders invalidate or patch the snapshot
+class BrokerState:
+    def __init__(self, api, gateway=None):
+        self.api = api
+        self.gateway = gateway or OrderGateway(api)
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.RLock()
+        self._account = None
+        self._positions = None
+
+    def begin_cycle(self):
+        with self._lock:
+            self._account = None
+            self._positions = None
+
+    def account(self):
+        with self._lock, metrics.span("account_fetch"):
+            if self._account is None:
+                self.misses += 1
+                self._account = self.api.get_account()
+            else:
+                self.hits += 1
+            return self._account
+
+    def positions(self):
+        with self._lock:
+            if self._positions is None:
+                self.misses += 1
+                self._positions = {_normalize(p.symbol): p for p in self.api.list_positions()}
+            else:
+                self.hits += 1
+            return list(self._positions.values())
+
+    def position(self, symbol):
+        with self._lock, metrics.span("position_lookup", symbol=symbol):
+            self.positions()
+            return self._positions.get(_normalize(symbol))
+
+    def submit_order(self, **order):
+        result = self.gateway.submit(**order)
+        with self._lock:
+            self._account = None
+            if order.get("side") == "sell" and order.get("qty") is not None and self._positions is not None:
+                # Selling the whole position: drop it rather than refetch
+                held = self._positions.get(_normalize(order["symbol"]))
+                if held is not None and float(held.qty) == float(order["qty"]):
+                    del self._positions[_normalize(order["symbol"])]
+                    return result
+            self._positions = None
+        return result
+
+    def submit_many(self, orders):
+        results = self.gateway.submit_many(orders)
+        self.begin_cycle()
+        return results
+
+    def on_trade_update(self, update):
+        if getattr(update, "event", None) in ("fill", "partial_fill"):
+            self.begin_cycle()
+
+    def stats(self):
+        total = self.hits + self.misses
+        rate = self.hits / total * 100 if total else 0.0
+        return f"{self.hits} hit(s), {self.misses} miss(es) ({rate:.0f}% served from cache)"
@@ -0,0 +1,68 @@
+import os
+import pickle
+import time
+import zlib
+import numpy as np
+from indicators import IndicatorEngine
+from ring_buffer import BarRing
+
+CHECKPOINT_FILE = "data/state/checkpoint.bin"
+VERSION = 1
+TAIL_BARS = 120  # minute bars kept per symbol; older ones are read back from the bar store
+LEVEL = 1  # zlib level; the minute columns barely compress past this
+
+# Everything a restarted runner would otherwise rebuild or forget, as one
+# zlib-compressed pickle: the newest minute bars of each symbol's ring (the
+# last one is where the next sync resumes), the indicator engine's state,
+# and the candle each strategy last decided on with the action it took.
+# Written atomically after every cycle; only this process writes it.
+
+
+def snapshot(runner):
+    return {
+        "version": VERSION,
+        "saved_at": time.time(),
+        "engine": runner.engine.to_dict(),
+        "history": {symbol: {column: np.array(values) for column, values in ring.last(TAIL_BARS).items()}
+                    for symbol, ring in runner.history.items()},
+        "last_bar": {symbol: ring.last_timestamp() for symbol, ring in runner.history.items()},
+        "decisions": dict(runner.decisions),
+    }
+
+
+def save(runner, path=CHECKPOINT_FILE):
+    data = zlib.compress(pickle.dumps(snapshot(runner), protocol=pickle.HIGHEST_PROTOCOL), LEVEL)
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(f"{path}.tmp", "wb") as file:
+        file.write(data)
+    os.replace(f"{path}.tmp", path)
+    return len(data)
+
+
+def load(path=CHECKPOINT_FILE):
+    if not os.path.exists(path):
+        return None
+    try:
+        with open(path, "rb") as file:
+            state = pickle.loads(zlib.decompress(file.read()))
+    except Exception as e:
+        print(f"⚠️ Ignoring unreadable checkpoint {path}: {e}")
+        return None
+    if state.get("version") != VERSION:
+        print(f"⚠️ Ignoring checkpoint {path} from another version")
+        return None
+    return state
+
+
+def restore(runner, state):
+    # The engine is only taken over if it tracks the same indicators; the
+    # bar rings and decisions stand on their own
+    engine = IndicatorEngine.from_dict(state["engine"])
+    if engine.ema_windows == runner.engine.ema_windows and engine.rsi_window == runner.engine.rsi_window:
+        runner.engine = engine
+    for symbol, bars in state["history"].items():
+        if symbol in runner.symbols:
+            ring = runner.history[symbol] = BarRing()
+            ring.extend(bars)
+    runner.decisions.update(state["decisions"])
+    return state
@@ -0,0 +1,33 @@
+import os
+import threading
+
+_api = None
+_lock = threading.Lock()
+
+
+# One warm REST client per process, shared by every strategy. The Alpaca
+# package (which pulls in pandas and aiohttp) is only imported here, so
+# importing this module costs nothing until a client is needed
+def get_api():
+    global _api
+    with _lock:
+        if _api is None:
+            from dotenv import load_dotenv
+            from alpaca_trade_api.rest import REST
+            load_dotenv()
+            _api = REST(
+                os.getenv("APCA_API_KEY_ID"),
+                os.getenv("APCA_API_SECRET_KEY"),
+                os.getenv("APCA_API_BASE_URL")
+            )
+    return _api
+
+
+# A forked worker process must not share the parent's keep-alive connections
+def _forget_api():
+    global _api, _lock
+    _api = None
+    _lock = threading.Lock()
+
+
+os.register_at_fork(after_in_child=_forget_api)
@@ -0,0 +1,350 @@
+import argparse
+import json
+import threading
+import time
+import uuid
+import zlib
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+import numpy as np
+
+# Local stand-in for the Alpaca REST endpoints the bot calls: account,
+# positions, orders (market orders fill at once at the last close), account
+# activities (FILL and CFEE), assets, clock and crypto bars. Bars are a
+# deterministic function of symbol and minute, so any range asked for is
+# consistent with every other one. Point the bot at it with APCA_API_BASE_URL
+# and APCA_API_DATA_URL; the websocket side is replay_server.py.
+
+INITIAL_CASH = 100_000.0
+FEE_RATE = 0.0025  # posted as a CFEE activity after every fill
+PAGE_LIMIT = 10_000  # Alpaca's maximum page size
+DEFAULT_LIMIT = 1000  # what Alpaca returns when no limit is sent
+MINUTE_NS = 60 * 1_000_000_000
+LISTED = ("BTC/USD", "ETH/USD", "SHIB/USD", "SOL/USD")  # padded with SYN###/USD up to `assets`
+
+
+def _minute_ns(value):
+    return int(np.datetime64(value.replace("Z", "").split("+")[0], "ns").astype(np.int64)) // MINUTE_NS * MINUTE_NS
+
+
+def _iso(ns):
+    return np.datetime_as_string(np.asarray(ns, dtype="datetime64[ns]"), unit="s")
+
+
+def synthetic_closes(symbol, minutes):
+    # Slow and fast waves plus hashed noise, all keyed on the absolute minute
+    seed = zlib.crc32(symbol.encode())
+    m = np.asarray(minutes, dtype=np.int64)
+    noise = ((m * 2654435761 + seed) % 2 ** 32) / 2 ** 32 - 0.5
+    phase = seed % 1000
+    base = 1 + seed % 500
+    return base * np.exp(0.03 * np.sin((m + phase) / 720.0) + 0.004 * np.sin((m + phase) / 37.0) + 0.001 * noise)
+
+
+def synthetic_minute_arrays(symbol, start_ns, end_ns):
+    # Every minute in [start_ns, end_ns), as bar store style column arrays
+    first, last = start_ns // MINUTE_NS, max(start_ns // MINUTE_NS, end_ns // MINUTE_NS)
+    m = np.arange(first, last, dtype=np.int64)
+    close = synthetic_closes(symbol, m)
+    open_ = synthetic_closes(symbol, m - 1)
+    return {
+        "timestamp": m * MINUTE_NS,
+        "open": open_,
+        "high": np.maximum(open_, close) * 1.0002,
+        "low": np.minimum(open_, close) * 0.9998,
+        "close": close,
+        "volume": 1 + (m * 40503 % 97) / 10,
+    }
+
+
+def synthetic_minute_bars(symbol, start_ns, end_ns):
+    # The same minutes as Alpaca bar dicts
+    bars = synthetic_minute_arrays(symbol, start_ns, end_ns)
+    if not len(bars["timestamp"]):
+        return []
+    stamps = _iso(bars["timestamp"])
+    return [
+        {"t": f"{t}Z", "o": o, "h": h, "l": l, "c": c, "v": v, "n": 1, "vw": c}
+        for t, o, h, l, c, v in zip(stamps.tolist(), bars["open"].tolist(), bars["high"].tolist(),
+                                    bars["low"].tolist(), bars["close"].tolist(), bars["volume"].tolist())
+    ]
+
+
+# One trading account's cash, positions, orders and activity
+class FakeAccount:
+    def __init__(self, cash=INITIAL_CASH):
+        self.cash = cash
+        self.positions = {}  # "BTCUSD" -> {"symbol", "qty", "cost"}
+        self.orders = {}
+        self.by_client_id = {}
+        self.activities = []
+
+
+class FakeAlpaca:
+    def __init__(self, latency=0.0, cash=INITIAL_CASH, assets=len(LISTED), now_ns=time.time_ns):
+        self.latency = latency  # seconds added to every response
+        self.now_ns = now_ns  # epoch ns; bench.py pins it so every run sees the same market
+        self.initial_cash = cash
+        self.symbols = (list(LISTED) + [f"SYN{i:03d}/USD" for i in range(assets)])[:max(assets, len(LISTED))]
+        self.accounts = {}  # API key ID -> FakeAccount, so each key trades its own account
+        self.requests = {}
+        self.bars_served = 0
+        self._lock = threading.Lock()
+
+    def _now(self):
+        return datetime.fromtimestamp(self.now_ns() / 1e9, timezone.utc).isoformat()
+
+    def book(self, key_id):
+        with self._lock:
+            if key_id not in self.accounts:
+                self.accounts[key_id] = FakeAccount(self.initial_cash)
+            return self.accounts[key_id]
+
+    def count(self, endpoint):
+        with self._lock:
+            self.requests[endpoint] = self.requests.get(endpoint, 0) + 1
+
+    def stats(self):
+        with self._lock:
+            return {"requests": dict(self.requests), "total": sum(self.requests.values()),
+                    "bars": self.bars_served, "accounts": len(self.accounts),
+                    "orders": sum(len(account.orders) for account in self.accounts.values())}
+
+    # === ENDPOINTS ===
+
+    def account(self, key_id=None):
+        book = self.book(key_id)
+        with self._lock:
+            equity = book.cash + sum(p["cost"] for p in book.positions.values())
+            return {"id": f"fake-account-{key_id}", "status": "ACTIVE", "currency": "USD",
+                    "cash": f"{book.cash:.2f}", "buying_power": f"{book.cash:.2f}",
+                    "non_marginable_buying_power": f"{book.cash:.2f}",
+                    "equity": f"{equity:.2f}", "portfolio_value": f"{equity:.2f}"}
+
+    def list_positions(self, key_id=None):
+        book = self.book(key_id)
+        with self._lock:
+            return [self._position(p) for p in book.positions.values()]
+
+    def _position(self, p):
+        price = float(synthetic_closes(p["symbol"], [self.now_ns() // MINUTE_NS - 1])[0])
+        return {"symbol": p["symbol"].replace("/", ""), "asset_class": "crypto", "qty": repr(p["qty"]),
+                "avg_entry_price": repr(p["cost"] / p["qty"]), "current_price": repr(price),
+                "market_value": repr(price * p["qty"]), "cost_basis": repr(p["cost"])}
+
+    def assets(self):
+        return [{"id": str(uuid.uuid5(uuid.NAMESPACE_OID, symbol)), "class": "crypto", "exchange": "CRYPTO",
+                 "symbol": symbol, "name": symbol, "status": "active", "tradable": True,
+                 "marginable": False, "shortable": False, "easy_to_borrow": False, "fractionable": True}
+                for symbol in self.symbols]
+
+    def clock(self):
+        now = self._now()
+        return {"timestamp": now, "is_open": True, "next_open": now, "next_close": now}
+
+    def submit_order(self, body, key_id=None):
+        book = self.book(key_id)
+        symbol = body["symbol"]
+        client_id = body.get("client_order_id") or str(uuid.uuid4())
+        price = float(synthetic_closes(symbol, [self.now_ns() // MINUTE_NS - 1])[0])
+        with self._lock:
+            if client_id in book.by_client_id:
+                return 422, {"code": 42210000, "message": "client_order_id must be unique"}
+            key = symbol.replace("/", "")
+            held = book.positions.get(key)
+            if body.get("notional") is not None:
+                qty = float(body["notional"]) / price
+            else:
+                qty = float(body["qty"])
+            if body["side"] == "buy":
+                if qty * price > book.cash + 1e-9:
+                    return 403, {"code": 40310000, "message": "insufficient balance for USD"}
+                book.cash -= qty * price
+                held = book.positions.setdefault(key, {"symbol": symbol, "qty": 0.0, "cost": 0.0})
+                held["qty"] += qty
+                held["cost"] += qty * price
+            else:
+                if held is None or qty > held["qty"] + 1e-12:
+                    return 403, {"code": 40310000, "message": f"insufficient balance for {key}"}
+                book.cash += qty * price
+                held["cost"] *= 1 - qty / held["qty"]
+                held["qty"] -= qty
+                if held["qty"] <= 1e-12:
+                    del book.positions[key]
+            now = self._now()
+            order = {"id": str(uuid.uuid4()), "client_order_id": client_id, "symbol": symbol,
+                     "asset_class": "crypto", "side": body["side"], "type": body.get("type", "market"),
+                     "time_in_force": body.get("time_in_force"), "qty": repr(qty),
+                     "notional": body.get("notional"), "filled_qty": repr(qty),
+                     "filled_avg_price": repr(price), "status": "filled",
+                     "submitted_at": now, "filled_at": now, "created_at": now}
+            book.orders[order["id"]] = order
+            self._post_fill(book, order, key, qty, price, now)
+            book.by_client_id[client_id] = order
+            return 200, order
+
+    def _post_fill(self, book, order, key, qty, price, now):
+        # Called with self._lock held; IDs sort in posting order, like Alpaca's
+        seq = len(book.activities)
+        book.activities.append({
+            "id": f"{seq:012d}::{uuid.uuid4()}", "activity_type": "FILL", "transaction_time": now,
+            "type": "fill", "price": repr(price), "qty": repr(qty), "side": order["side"],
+            "symbol": order["symbol"], "leaves_qty": "0", "order_id": order["id"], "cum_qty": repr(qty),
+            "order_status": "filled"})
+        fee = qty * FEE_RATE
+        book.activities.append({
+            "id": f"{seq + 1:012d}::{uuid.uuid4()}", "activity_type": "CFEE", "date": now[:10],
+            "net_amount": "0" if order["side"] == "buy" else repr(-fee * price),
+            "qty": repr(-fee) if order["side"] == "buy" else "0", "price": repr(price), "symbol": key,
+            "description": "Crypto fee", "status": "executed"})
+
+    def list_activities(self, query, path, key_id=None):
+        book = self.book(key_id)
+        types = query["activity_types"][0].split(",") if "activity_types" in query else None
+        if types is None and not path.endswith("/activities"):
+            types = [path.rsplit("/", 1)[-1]]
+        with self._lock:
+            items = [a for a in book.activities if types is None or a["activity_type"] in types]
+        if query.get("direction", ["desc"])[0] != "asc":
+            items = items[::-1]
+        token = query.get("page_token", [None])[0]
+        if token is not None:
+            ids = [a["id"] for a in items]
+            items = items[ids.index(token) + 1:] if token in ids else []
+        return items[:int(query.get("page_size", [100])[0])]
+
+    def order_by_client_id(self, client_id, key_id=None):
+        book = self.book(key_id)
+        with self._lock:
+            order = book.by_client_id.get(client_id)
+        return (200, order) if order else (404, {"code": 40410000, "message": "order not found"})
+
+    def bars(self, query):
+        symbols = sorted(query["symbols"][0].split(","))
+        now = self.now_ns() // MINUTE_NS * MINUTE_NS
+        start = _minute_ns(query["start"][0]) if "start" in query else now - DEFAULT_LIMIT * MINUTE_NS
+        end = min(_minute_ns(query["end"][0]) + MINUTE_NS, now + MINUTE_NS) if "end" in query else now + MINUTE_NS
+        limit = min(int(query.get("limit", [DEFAULT_LIMIT])[0]), PAGE_LIMIT)
+        offset = int(query.get("page_token", ["0"])[0])
+
+        # Pages run through the symbols in order, `limit` bars at a time
+        minutes = max(0, (end - start) // MINUTE_NS)
+        page, position, last = {}, offset, min(offset + limit, minutes * len(symbols))
+        while position < last:
+            index, skip = divmod(position, minutes)
+            take = min(minutes - skip, last - position)
+            begin = start + skip * MINUTE_NS
+            page[symbols[index]] = synthetic_minute_bars(symbols[index], begin, begin + take * MINUTE_NS)
+            position += take
+        with self._lock:
+            self.bars_served += last - offset
+        more = last < minutes * len(symbols)
+        return {"bars": page, "next_page_token": str(last) if more else None}
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive, like the real API
+
+    def _send(self, status, payload):
+        body = json.dumps(payload).encode()
+        if self.server.fake.latency:
+            time.sleep(self.server.fake.latency)
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        fake = self.server.fake
+        url = urlparse(self.path)
+        query = parse_qs(url.query)
+        path = url.path.rstrip("/")
+        if path == "/_stats":
+            self._send(200, fake.stats())
+            return
+        fake.count(path.rsplit("/", 1)[-1])
+        key_id = self.headers.get("APCA-API-KEY-ID")
+        if path.endswith("/bars"):
+            self._send(200, fake.bars(query))
+        elif path.endswith("/account"):
+            self._send(200, fake.account(key_id))
+        elif path.endswith("/positions"):
+            self._send(200, fake.list_positions(key_id))
+        elif "/account/activities" in path:
+            self._send(200, fake.list_activities(query, path, key_id))
+        elif path.endswith("/assets"):
+            self._send(200, fake.assets())
+        elif path.endswith("/clock"):
+            self._send(200, fake.clock())
+        elif path.endswith("/orders:by_client_order_id"):
+            self._send(*fake.order_by_client_id(query["client_order_id"][0], key_id))
+        else:
+            self._send(404, {"code": 40410000, "message": f"not found: {path}"})
+
+    def do_POST(self):
+        fake = self.server.fake
+        path = urlparse(self.path).path.rstrip("/")
+        body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+        fake.count(path.rsplit("/", 1)[-1])
+        if path.endswith("/orders"):
+            self._send(*fake.submit_order(body, self.headers.get("APCA-API-KEY-ID")))
+        else:
+            self._send(404, {"code": 40410000, "message": f"not found: {path}"})
+
+    def log_message(self, *args):
+        pass
+
+
+class _Server(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 128  # many clients connecting at once (the default of 5 drops SYNs)
+
+
+def serve(port=0, latency=0.0, host="127.0.0.1", assets=len(LISTED), cash=INITIAL_CASH, now_ns=time.time_ns):
+    # Starts the server on a daemon thread; server.fake holds its state
+    server = _Server((host, port), _Handler)
+    server.fake = FakeAlpaca(latency=latency, cash=cash, assets=assets, now_ns=now_ns)
+    threading.Thread(target=server.serve_forever, name="fake-alpaca", daemon=True).start()
+    return server
+
+
+def check(server):
+    # The endpoints bot.py touches on start-up, read the way the SDK reads them
+    from alpaca_trade_api.rest import REST
+    api = REST("check", "check", f"http://127.0.0.1:{server.server_port}")
+    clock = api.get_clock()
+    if not clock.is_open or clock.timestamp is None:
+        raise RuntimeError(f"fake /clock is not an Alpaca clock: {clock}")
+    if float(api.get_account().cash) != server.fake.initial_cash:
+        raise RuntimeError("fake /account does not report the starting cash")
+    return clock
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local fake of the Alpaca REST API")
+    parser.add_argument("--port", type=int, default=8766)
+    parser.add_argument("--latency", type=float, default=0.05, help="seconds added to every response")
+    parser.add_argument("--assets", type=int, default=len(LISTED), help="tradable pairs listed under /assets")
+    parser.add_argument("--cash", type=float, default=INITIAL_CASH, help="starting cash of every account")
+    parser.add_argument("--check", action="store_true", help="check the clock and account endpoints through the SDK and exit")
+    args = parser.parse_args()
+
+    server = serve(args.port, args.latency, assets=args.assets, cash=args.cash)
+    if args.check:
+        print(f"✅ Fake clock at {check(server).timestamp}, market open")
+        server.shutdown()
+        return
+    url = f"http://127.0.0.1:{server.server_port}"
+    print(f"🧪 Fake Alpaca on {url} ({args.latency * 1000:.0f} ms latency)")
+    print(f"→ APCA_API_BASE_URL={url} APCA_API_DATA_URL={url}", flush=True)
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,211 @@
+import argparse
+import contextlib
+import io
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+import allocator
+import metrics
+from broker_state import BrokerState
+from log_trade import strategy_label, trading_account
+
+MAX_WORKERS = 32
+LATENCY = 0.05  # seconds per fake API response in the benchmark
+BENCH_ACCOUNTS = (1, 2, 4, 8)
+
+# Runs the strategies for several Alpaca accounts (say a paper and a live
+# sub-account, each with its own .env file) off one set of market data. The
+# runner syncs the bars and updates the indicators once per cycle, and each
+# strategy's decide() runs once; only the sizing (allocator.py, against that
+# account's snapshot) and the orders run per account. Every account has its
+# own BrokerState (account and positions cache, order gateway and rate
+# limit); the accounts are snapshotted together and their orders go out
+# concurrently, so one more account adds about one order round trip to a
+# cycle, not a strategy run.
+
+
+def account_name(path):
+    # ".env" is the main account; ".env.live" or "live.env" is "live"
+    name = os.path.basename(path).replace(".env", "").strip("._-")
+    return name or None
+
+
+class Account:
+    def __init__(self, name, api):
+        self.name = name  # None for the main account
+        self.label = name or "main"
+        self.api = api
+        self.broker = BrokerState(api)
+
+
+def load_account(path):
+    from dotenv import dotenv_values
+    from alpaca_trade_api.rest import REST
+    values = dotenv_values(path)
+    missing = [key for key in ("APCA_API_KEY_ID", "APCA_API_SECRET_KEY") if not values.get(key)]
+    if missing:
+        raise ValueError(f"{path} has no {', '.join(missing)}")
+    api = REST(values["APCA_API_KEY_ID"], values["APCA_API_SECRET_KEY"], values.get("APCA_API_BASE_URL"))
+    return Account(account_name(path), api)
+
+
+class FanOut:
+    def __init__(self, runner, accounts, max_workers=None):
+        self.runner = runner  # market data, indicators, decisions and checkpoint
+        self.accounts = list(accounts)
+        labels = [account.label for account in self.accounts]
+        if len(set(labels)) < len(labels):
+            raise ValueError(f"account names must differ: {', '.join(labels)}")
+        workers = max_workers or min(MAX_WORKERS, len(self.accounts))
+        self.executor = ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix="fanout")
+        self._output = None
+
+    def decide(self, candles):
+        # Once per strategy, whatever the number of accounts
+        signals = {}
+        for module in self.runner.undecided(self.runner.modules, candles):
+            print(f"\n🌀 {module.__name__}")
+            with metrics.labels(strategy=module.STRATEGY, symbol=module.SYMBOL), metrics.span("decide"):
+                signals[module] = module.decide(candles[module.SYMBOL])
+        return signals
+
+    def _snapshot(self, account):
+        account.broker.begin_cycle()
+        try:
+            account.broker.account()
+            account.broker.positions()
+        except Exception as e:
+            print(f"⚠️ Could not load account {account.label}: {e}")
+
+    def _execute(self, account, intents):
+        self._output.capture()
+        start = time.perf_counter()
+        actions = {}
+        try:
+            with trading_account(account.name), metrics.labels(strategy=strategy_label("allocator", account.name)), \
+                    metrics.span("execute"):
+                actions = allocator.placed(allocator.execute(account.broker, intents))
+        except Exception as e:
+            print(f"❌ Orders for {account.label} failed: {e}")
+        return actions, self._output.release(), time.perf_counter() - start
+
+    def apply(self, signals, candles):
+        # Every account snapshotted at once, then each account's trades sized
+        # together (allocator.py) and placed, the accounts at once; returns
+        # account -> strategy -> action
+        intents = [allocator.strategy_intent(module, signal, candles[module.SYMBOL])
+                   for module, signal in signals.items() if signal]
+        if not intents:
+            return {}
+        self._output = self.runner.capture_output()
+        list(self.executor.map(self._snapshot, self.accounts))
+        futures = [(account, self.executor.submit(self._execute, account, intents)) for account in self.accounts]
+        actions = {}
+        for account, future in futures:
+            placed, output, elapsed = future.result()
+            actions[account.label] = {module.STRATEGY: placed.get(module.STRATEGY) for module in signals}
+            print(f"\n👤 {account.label} ({elapsed:.2f}s)")
+            print(output, end="")
+        return actions
+
+    def run_cycle(self):
+        start = time.perf_counter()
+        with metrics.span("cycle"):
+            candles = self.runner.update()
+            signals = self.decide(candles)
+            actions = self.apply(signals, candles)
+            for module in signals:
+                if candles[module.SYMBOL]:
+                    # What each account's allocator actually placed, not the signal
+                    self.runner.decisions[module.STRATEGY] = {
+                        "candle": candles[module.SYMBOL][-1]["timestamp"],
+                        "action": {account.label: actions.get(account.label, {}).get(module.STRATEGY)
+                                   for account in self.accounts}}
+        self.runner.save_checkpoint()
+        traded = sum(1 for account in actions.values() for action in account.values() if action)
+        print(f"\n👥 {len(self.accounts)} account(s): {len(signals)} decision(s), {traded} order(s)")
+        for account in self.accounts:
+            print(f"🗃️ Broker cache {account.label}: {account.broker.stats()}")
+        return time.perf_counter() - start
+
+    def close(self):
+        self.executor.shutdown(wait=True)
+
+
+def benchmark(counts=BENCH_ACCOUNTS, latency=LATENCY):
+    # Against fake_alpaca.py, where every API key is its own account: the
+    # cost of a cycle's market data and decisions, then of applying a buy on
+    # every strategy to 1..N accounts
+    import tempfile
+    import fake_alpaca
+    server = fake_alpaca.serve(latency=latency)
+    url = f"http://127.0.0.1:{server.server_port}"
+    os.environ.update({"APCA_API_KEY_ID": "bench", "APCA_API_SECRET_KEY": "bench",
+                       "APCA_API_BASE_URL": url, "APCA_API_DATA_URL": url})
+    from alpaca_trade_api.rest import REST
+    from client import get_api
+    from runner import StrategyRunner
+    with tempfile.TemporaryDirectory(prefix="fanout-") as scratch:
+        os.chdir(scratch)
+        runner = StrategyRunner(get_api(), checkpoint_file=None)
+        quiet = io.StringIO()
+        with contextlib.redirect_stdout(quiet):
+            runner.update()  # first sync of an empty bar store
+            start = time.perf_counter()
+            candles = runner.update()
+            signals = {module: module.decide(candles[module.SYMBOL]) for module in runner.modules}
+        shared = time.perf_counter() - start
+        print(f"📡 Market data and {len(signals)} decision(s), once per cycle: {shared:.2f}s "
+              f"({latency * 1000:.0f} ms per API response)")
+
+        signals = {module: "buy" for module in runner.modules}
+        results = []
+        for count in counts:
+            accounts = [Account(f"bench{count}-{i}", REST(f"bench{count}-{i}", "bench", url)) for i in range(count)]
+            fanout = FanOut(runner, accounts)
+            before = server.fake.stats()["orders"]
+            start = time.perf_counter()
+            with contextlib.redirect_stdout(quiet):
+                fanout.apply(signals, candles)
+            elapsed = time.perf_counter() - start
+            fanout.close()
+            results.append((count, elapsed))
+            print(f"👥 {count} account(s): {server.fake.stats()['orders'] - before} order(s) in {elapsed:.2f}s")
+        runner.close()
+    if len(results) > 1:
+        (first, first_s), (last, last_s) = results[0], results[-1]
+        print(f"➕ Each account past the first: {(last_s - first_s) / (last - first) * 1000:.0f} ms "
+              f"(a separate strategy run per account would add {shared + first_s:.2f}s)")
+    server.shutdown()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the strategies for several accounts off one market data pass")
+    parser.add_argument("accounts", nargs="*", help=".env files, one per account (e.g. .env.paper .env.live)")
+    parser.add_argument("--every", type=float, help="keep running, a cycle every N seconds")
+    parser.add_argument("--bench", action="store_true", help="time the fan-out against a local fake API")
+    args = parser.parse_args()
+
+    if args.bench:
+        benchmark()
+        return
+    if not args.accounts:
+        parser.error("give at least one .env file")
+
+    from client import get_api
+    from runner import StrategyRunner
+    runner = StrategyRunner(get_api())
+    fanout = FanOut(runner, [load_account(path) for path in args.accounts])
+    try:
+        while True:
+            print(f"\n⏱️ Cycle took {fanout.run_cycle():.2f}s")
+            if not args.every:
+                return
+            time.sleep(args.every)
+    finally:
+        fanout.close()
+        runner.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,167 @@
+import json
+import math
+import os
+from collections import deque
+
+EMA_WINDOWS = (5, 9, 20, 21, 50)
+RSI_WINDOW = 14
+TAIL = 4  # closed candles kept per symbol (the SOL rules look 3 back)
+CANDLE_FIELDS = ("open", "high", "low", "close", "volume")
+
+
+# Same recursion as ta.trend.ema_indicator: ewm(span=window, adjust=False),
+# seeded with the first close and NaN until `window` values were seen
+class EMA:
+    def __init__(self, window, value=None, count=0):
+        self.window = window
+        self.alpha = 2 / (window + 1)
+        self.value = value
+        self.count = count
+
+    def update(self, x):
+        self.value = x if self.value is None else self.alpha * x + (1 - self.alpha) * self.value
+        self.count += 1
+        return self.current()
+
+    def current(self):
+        return self.value if self.count >= self.window else math.nan
+
+    def state(self):
+        return {"window": self.window, "value": self.value, "count": self.count}
+
+
+# Same as ta.momentum.RSIIndicator: Wilder smoothing (alpha = 1/window) of
+# gains and losses, where the first bar contributes a zero gain and loss
+class RSI:
+    def __init__(self, window, prev_close=None, up=None, down=None, count=0):
+        self.window = window
+        self.alpha = 1 / window
+        self.prev_close = prev_close
+        self.up = up
+        self.down = down
+        self.count = count
+
+    def update(self, close):
+        diff = 0.0 if self.prev_close is None else close - self.prev_close
+        gain = diff if diff > 0 else 0.0
+        loss = -diff if diff < 0 else 0.0
+        if self.up is None:
+            self.up, self.down = gain, loss
+        else:
+            self.up = self.alpha * gain + (1 - self.alpha) * self.up
+            self.down = self.alpha * loss + (1 - self.alpha) * self.down
+        self.prev_close = close
+        self.count += 1
+        return self.current()
+
+    def current(self):
+        if self.count < self.window:
+            return math.nan
+        if self.down == 0:
+            return 100.0
+        return 100 - 100 / (1 + self.up / self.down)
+
+    def state(self):
+        return {"window": self.window, "prev_close": self.prev_close, "up": self.up,
+                "down": self.down, "count": self.count}
+
+
+class IndicatorEngine:
+    def __init__(self, ema_windows=EMA_WINDOWS, rsi_window=RSI_WINDOW, tail=TAIL):
+        self.ema_windows = tuple(ema_windows)
+        self.rsi_window = rsi_window
+        self.tail_size = tail
+        self._symbols = {}
+
+    def _state(self, symbol):
+        state = self._symbols.get(symbol)
+        if state is None:
+            state = {
+                "last": None,
+                "ema": {window: EMA(window) for window in self.ema_windows},
+                "rsi": RSI(self.rsi_window),
+                "tail": deque(maxlen=self.tail_size),
+            }
+            self._symbols[symbol] = state
+        return state
+
+    def last_timestamp(self, symbol):
+        state = self._symbols.get(symbol)
+        return None if state is None else state["last"]
+
+    def update(self, symbol, timestamp, candle):
+        # One closed candle, O(1); candles at or before the last one are ignored
+        state = self._state(symbol)
+        if state["last"] is not None and timestamp <= state["last"]:
+            return None
+        close = float(candle["close"])
+        row = {"timestamp": timestamp}
+        row.update({field: float(candle[field]) for field in CANDLE_FIELDS})
+        for window, ema in state["ema"].items():
+            row[f"EMA{window}"] = ema.update(close)
+        row["RSI"] = state["rsi"].update(close)
+        state["last"] = timestamp
+        state["tail"].append(row)
+        return row
+
+    def update_candles(self, symbol, candles):
+        # Candle arrays as produced by resample.resample()
+        count = 0
+        columns = [candles[field].tolist() for field in CANDLE_FIELDS]
+        for timestamp, *values in zip(candles["timestamp"].tolist(), *columns):
+            candle = dict(zip(CANDLE_FIELDS, values))
+            if self.update(symbol, timestamp, candle) is not None:
+                count += 1
+        return count
+
+    def tail(self, symbol):
+        state = self._symbols.get(symbol)
+        # Copies, so callers can annotate rows without touching engine state
+        return [] if state is None else [dict(row) for row in state["tail"]]
+
+    def to_dict(self):
+        return {
+            "ema_windows": list(self.ema_windows),
+            "rsi_window": self.rsi_window,
+            "tail": self.tail_size,
+            "symbols": {
+                symbol: {
+                    "last": state["last"],
+                    "ema": [ema.state() for ema in state["ema"].values()],
+                    "rsi": state["rsi"].state(),
+                    "tail": list(state["tail"]),
+                }
+                for symbol, state in self._symbols.items()
+            },
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        engine = cls(data["ema_windows"], data["rsi_window"], data["tail"])
+        for symbol, saved in data["symbols"].items():
+            engine._symbols[symbol] = {
+                "last": saved["last"],
+                "ema": {item["window"]: EMA(**item) for item in saved["ema"]},
+                "rsi": RSI(**saved["rsi"]),
+                "tail": deque(saved["tail"], maxlen=engine.tail_size),
+            }
+        return engine
+
+    def save(self, path):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        tmp = path + ".tmp"
+        with open(tmp, "w") as f:
+            json.dump(self.to_dict(), f)
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path, **kwargs):
+        if not os.path.exists(path):
+            return cls(**kwargs)
+        with open(path) as f:
+            engine = cls.from_dict(json.load(f))
+        # A checkpoint taken with other windows can't be resumed
+        wanted = cls(**kwargs)
+        if engine.ema_windows != wanted.ema_windows or engine.rsi_window != wanted.rsi_window:
+            return wanted
+        return engine
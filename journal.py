@@ -0,0 +1,328 @@
+import argparse
+import atexit
+import csv
+import os
+import queue
+import sqlite3
+import threading
+import time
+from datetime import datetime, timezone
+
+JOURNAL_PATH = "data/journal.db"
+LEGACY_CSV = "trade_log.csv"
+CSV_COLUMNS = ["timestamp", "symbol", "side", "strategy", "price", "amount", "outcome"]
+BATCH_SIZE = 1000  # rows per write transaction
+FLUSH_POLL = 1.0  # seconds between checks that the writer is still alive
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS trades (
+    id        INTEGER PRIMARY KEY,
+    timestamp TEXT NOT NULL,
+    symbol    TEXT NOT NULL,
+    side      TEXT NOT NULL,
+    strategy  TEXT NOT NULL,
+    price     REAL,
+    amount    REAL,
+    outcome   TEXT NOT NULL DEFAULT 'pending'
+);
+CREATE INDEX IF NOT EXISTS trades_by_symbol ON trades (symbol, timestamp);
+CREATE INDEX IF NOT EXISTS trades_by_strategy ON trades (strategy, timestamp);
+CREATE INDEX IF NOT EXISTS trades_by_timestamp ON trades (timestamp);
+CREATE TABLE IF NOT EXISTS meta (
+    key   TEXT PRIMARY KEY,
+    value TEXT
+);
+CREATE TABLE IF NOT EXISTS fills (
+    seq          INTEGER PRIMARY KEY,  -- append order, the analytics cursor
+    timestamp    TEXT,
+    trade_id     INTEGER,
+    strategy     TEXT NOT NULL,
+    symbol       TEXT NOT NULL,
+    side         TEXT NOT NULL,
+    kind         TEXT NOT NULL,        -- 'fill' or 'fee'
+    qty          REAL NOT NULL,
+    price        REAL NOT NULL,
+    fee          REAL NOT NULL,
+    realized_pnl REAL NOT NULL,        -- change in realized PnL
+    cost_delta   REAL NOT NULL         -- change in the position's cost basis
+);
+"""
+
+# Columns added after the first release, applied to older journals on open
+MIGRATIONS = [
+    ("order_id", "TEXT"),
+    ("fill_price", "REAL"),
+    ("filled_qty", "REAL"),
+    ("fees", "REAL"),
+    ("realized_pnl", "REAL"),
+]
+INSERT = ("INSERT INTO trades (timestamp, symbol, side, strategy, price, amount, outcome, order_id) "
+          "VALUES (?, ?, ?, ?, ?, ?, ?, ?)")
+
+_journal = None
+_journal_lock = threading.Lock()
+
+
+def utc_now():
+    # Same layout as the original trade_log.csv rows (naive UTC ISO-8601)
+    return datetime.now(timezone.utc).replace(tzinfo=None).isoformat()
+
+
+def connect(path):
+    conn = sqlite3.connect(path, timeout=30)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.row_factory = sqlite3.Row
+    return conn
+
+
+def migrate(conn):
+    conn.executescript(SCHEMA)
+    existing = {row[1] for row in conn.execute("PRAGMA table_info(trades)")}
+    with conn:
+        for column, kind in MIGRATIONS:
+            if column not in existing:
+                conn.execute(f"ALTER TABLE trades ADD COLUMN {column} {kind}")
+        conn.execute("CREATE INDEX IF NOT EXISTS trades_by_order ON trades (order_id)")
+
+
+# Trades are queued by the callers and written in batches by one background
+# thread, so logging never waits on disk and concurrent strategies never
+# contend for the file
+class Journal:
+    def __init__(self, path=JOURNAL_PATH):
+        self.path = path
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        created = not os.path.exists(path)
+        conn = connect(path)
+        migrate(conn)
+        conn.close()
+        if created and path == JOURNAL_PATH and os.path.exists(LEGACY_CSV):
+            self.import_csv(LEGACY_CSV)
+
+        self._queue = queue.Queue()
+        self._writer = threading.Thread(target=self._write_loop, name="journal-writer", daemon=True)
+        self._writer.start()
+
+    def record(self, symbol, side, strategy, price, amount, outcome="pending", timestamp=None, order_id=None):
+        self._queue.put((timestamp or utc_now(), symbol, side, strategy,
+                         None if price is None else float(price),
+                         None if amount is None else float(amount), outcome,
+                         None if order_id is None else str(order_id)))
+
+    def _write_loop(self):
+        conn = connect(self.path)
+        unwritten = []  # rows of a failed write, tried again with the next batch
+        while True:
+            item = self._queue.get()
+            rows, waiters, stop = unwritten, [], False
+            while True:
+                if item is None:
+                    stop = True
+                elif isinstance(item, threading.Event):
+                    waiters.append(item)
+                else:
+                    rows.append(item)
+                if len(rows) >= BATCH_SIZE:
+                    break
+                try:
+                    item = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+            error = None
+            if rows:
+                try:
+                    try:
+                        with conn:
+                            conn.executemany(INSERT, rows)
+                    except (sqlite3.IntegrityError, sqlite3.DataError):
+                        # A bad row fails the whole batch: write the rows one by
+                        # one and drop only the ones that can never be written
+                        error = self._write_each(conn, rows)
+                    rows = []
+                except sqlite3.Error as e:
+                    # Locked, busy or full: keep the rows and let anyone flushing know
+                    error = e
+                    print(f"❌ Journal write of {len(rows)} trade(s) failed, keeping them for the next try: {e}")
+            unwritten = rows
+            for waiter in waiters:
+                waiter.error = error
+                waiter.set()
+            if stop:
+                if unwritten:
+                    print(f"❌ Journal closed with {len(unwritten)} trade(s) not written")
+                conn.close()
+                return
+
+    def _write_each(self, conn, rows):
+        # Returns the last row's error, if any were dropped; a transient
+        # error rolls all of them back and is raised
+        error = None
+        with conn:
+            for row in rows:
+                try:
+                    conn.execute(INSERT, row)
+                except (sqlite3.IntegrityError, sqlite3.DataError) as e:
+                    error = e
+                    print(f"❌ Journal dropped a trade that can never be written ({e}): {row}")
+        return error
+
+    def flush(self):
+        # Returns once everything queued so far is on disk; raises if it
+        # could not be written or the writer is gone
+        if not self._writer.is_alive():
+            raise RuntimeError("journal writer is not running")
+        done = threading.Event()
+        self._queue.put(done)
+        while not done.wait(FLUSH_POLL):
+            if not self._writer.is_alive():
+                raise RuntimeError("journal writer stopped before the flush")
+        if done.error is not None:
+            raise RuntimeError(f"journal write failed: {done.error}") from done.error
+
+    def close(self):
+        if self._writer.is_alive():
+            self._queue.put(None)
+            self._writer.join()
+
+    # === QUERIES ===
+
+    def trades(self, symbol=None, strategy=None, since=None, until=None, outcome=None, limit=None):
+        where, args = [], []
+        for column, op, value in (("symbol", "=", symbol), ("strategy", "=", strategy),
+                                  ("timestamp", ">=", since), ("timestamp", "<", until),
+                                  ("outcome", "=", outcome)):
+            if value is not None:
+                where.append(f"{column} {op} ?")
+                args.append(value)
+        sql = "SELECT * FROM trades"
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        sql += " ORDER BY timestamp, id"
+        if limit is not None:
+            sql += " LIMIT ?"
+            args.append(limit)
+        self.flush()
+        conn = connect(self.path)
+        try:
+            return [dict(row) for row in conn.execute(sql, args)]
+        finally:
+            conn.close()
+
+    def get_meta(self, key, default=None):
+        conn = connect(self.path)
+        try:
+            row = conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+            return default if row is None else row[0]
+        finally:
+            conn.close()
+
+    def count(self):
+        self.flush()
+        conn = connect(self.path)
+        try:
+            return conn.execute("SELECT COUNT(*) FROM trades").fetchone()[0]
+        finally:
+            conn.close()
+
+    def export_csv(self, path, **filters):
+        rows = self.trades(**filters)
+        with open(path, mode="w", newline="") as file:
+            writer = csv.writer(file)
+            writer.writerow(CSV_COLUMNS)
+            for row in rows:
+                writer.writerow([row[column] for column in CSV_COLUMNS])
+        return len(rows)
+
+    def import_csv(self, path):
+        with open(path, newline="") as file:
+            rows = [tuple(row[column] for column in CSV_COLUMNS) + (None,) for row in csv.DictReader(file)]
+        conn = connect(self.path)
+        with conn:
+            conn.executemany(INSERT, rows)
+        conn.close()
+        return len(rows)
+
+
+def get_journal():
+    global _journal
+    with _journal_lock:
+        if _journal is None:
+            _journal = Journal()
+            atexit.register(_journal.close)
+    return _journal
+
+
+def use_journal(journal):
+    # Points get_journal() (and so log_trade) at another journal, e.g. a
+    # simulator replay's; returns the one it replaces
+    global _journal
+    with _journal_lock:
+        previous, _journal = _journal, journal
+    return previous
+
+
+def benchmark(path, rows, writers):
+    journal = Journal(path)
+    per_writer = rows // writers
+
+    def write():
+        for i in range(per_writer):
+            journal.record("BTC/USD", "buy" if i % 2 else "sell", f"bench_{i % 8}", 100.0 + i % 50, 1.0)
+
+    start = time.perf_counter()
+    threads = [threading.Thread(target=write) for _ in range(writers)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    queued = time.perf_counter() - start
+    journal.flush()
+    written = time.perf_counter() - start
+
+    start = time.perf_counter()
+    hits = len(journal.trades(strategy="bench_3", limit=1000))
+    query = time.perf_counter() - start
+    journal.close()
+    total = per_writer * writers
+    print(f"📝 {total:,} rows from {writers} writer(s): queued in {queued:.2f}s, "
+          f"on disk in {written:.2f}s ({total / written:,.0f} rows/s)")
+    print(f"🔎 Indexed strategy query ({hits} rows) in {query * 1000:.1f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Trade journal tools")
+    sub = parser.add_subparsers(dest="command", required=True)
+    export = sub.add_parser("export", help="write the journal in the trade_log.csv layout")
+    export.add_argument("path", nargs="?", default=LEGACY_CSV)
+    imp = sub.add_parser("import", help="append rows from a trade_log.csv file")
+    imp.add_argument("path")
+    query = sub.add_parser("query", help="print matching trades")
+    query.add_argument("--symbol")
+    query.add_argument("--strategy")
+    query.add_argument("--since")
+    query.add_argument("--limit", type=int, default=50)
+    bench = sub.add_parser("bench", help="measure write throughput on a scratch journal")
+    bench.add_argument("--rows", type=int, default=1_000_000)
+    bench.add_argument("--writers", type=int, default=8)
+    bench.add_argument("--path", default="data/journal_bench.db")
+    args = parser.parse_args()
+
+    if args.command == "bench":
+        if os.path.exists(args.path):
+            os.remove(args.path)
+        benchmark(args.path, args.rows, args.writers)
+        return
+
+    journal = get_journal()
+    if args.command == "export":
+        print(f"💾 Exported {journal.export_csv(args.path)} trade(s) to {args.path}")
+    elif args.command == "import":
+        print(f"📥 Imported {journal.import_csv(args.path)} trade(s) from {args.path}")
+    else:
+        for row in journal.trades(symbol=args.symbol, strategy=args.strategy, since=args.since, limit=args.limit):
+            print(", ".join(str(row[column]) for column in CSV_COLUMNS))
+
+
+if __name__ == "__main__":
+    main()
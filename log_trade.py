@@ -1,15 +1,32 @@
-import csv
-from datetime import datetime
-
-def log_trade(symbol, side, strategy, price, amount, outcome="pending"):
-    with open("trade_log.csv", mode="a", newline="") as file:
-        writer = csv.writer(file)
-        writer.writerow([
-            datetime.utcnow().isoformat(),
-            symbol,
-            side,
-            strategy,
-            price,
-            amount,
-            outcome
-        ])
+import threading
+from contextlib import contextmanager
+import metrics
+from journal import get_journal
+
+_local = threading.local()
+
+
+def strategy_label(strategy, account=None):
+    # Trades for an account other than the main one are booked as
+    # "strategy@account", so reconcile.py and analytics.py keep each
+    # account's positions and PnL apart
+    return strategy if account is None else f"{strategy}@{account}"
+
+
+@contextmanager
+def trading_account(account):
+    # Trades this thread logs inside the block belong to that account (fanout.py)
+    previous = getattr(_local, "account", None)
+    _local.account = account
+    try:
+        yield
+    finally:
+        _local.account = previous
+
+
+def log_trade(symbol, side, strategy, price, amount, outcome="pending", order_id=None):
+    # Queued for the journal's background writer; see journal.py. The
+    # order ID lets reconcile.py fill in the outcome later.
+    strategy = strategy_label(strategy, getattr(_local, "account", None))
+    with metrics.span("log_trade", strategy=strategy, symbol=symbol):
+        get_journal().record(symbol, side, strategy, price, amount, outcome, order_id=order_id)
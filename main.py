@@ -1,6 +1,10 @@
 
+import argparse
 import time
 import subprocess
+import metrics
+import prefork
+from scheduler import SETTLE, Scheduler, period
 
 # Strategy scripts to run in sequence
 strategies = [
@@ -11,9 +15,19 @@ strategies = [
     "sol_strategy.py"
 ]
 
-def run_strategy(script_name):
+CYCLE_CADENCE = "15min"  # on the candle boundaries resample("15min") produces
+RECONCILE_CADENCE = "5min"
+STATE_CADENCE = "1min"  # checkpoint and metrics file
+
+def run_strategy(script_name, prefork_socket=None):
     print(f"\n🌀 Running: {script_name}")
     try:
+        if prefork_socket:
+            # Same script on a warm prefork.py worker: no interpreter start-up or imports
+            code = prefork.run(script_name, path=prefork_socket)
+            if code:
+                print(f"⚠️ {script_name} exited with status {code}")
+            return
         result = subprocess.run(["python", script_name], capture_output=True, text=True)
         print(result.stdout)
         if result.stderr:
@@ -21,10 +35,114 @@ def run_strategy(script_name):
     except Exception as e:
         print(f"❌ Failed to run {script_name}: {e}")
 
-print("🚀 Starting automated crypto bot loop...")
-
-while True:
+def run_subprocess_cycle(prefork_socket=None):
+    start = time.perf_counter()
     for script in strategies:
-        run_strategy(script)
-    print("\n⏳ Sleeping for 15 minutes before next run...")
-    time.sleep(900)  # Sleep for 15 minutes
+        run_strategy(script, prefork_socket)
+    return time.perf_counter() - start
+
+def make_runner():
+    from client import get_api
+    from runner import StrategyRunner
+    return StrategyRunner(get_api())
+
+def compare():
+    print("📏 Timing one subprocess cycle vs one in-process cycle...")
+    subprocess_time = run_subprocess_cycle()
+    runner = make_runner()
+    in_process_time = runner.run_cycle()
+    runner.close()
+    print(f"\n⏱️ Subprocess cycle: {subprocess_time:.2f}s")
+    print(f"⏱️ In-process cycle: {in_process_time:.2f}s ({subprocess_time / in_process_time:.1f}x faster)")
+
+def cadence_override(value):
+    # --cadence STRATEGY=FREQ, checked before anything starts
+    strategy, sep, cadence = value.partition("=")
+    if not sep or not strategy:
+        raise argparse.ArgumentTypeError(f"expected STRATEGY=FREQ, got {value!r}")
+    try:
+        period(cadence)
+    except ValueError as e:
+        raise argparse.ArgumentTypeError(str(e))
+    return strategy, cadence
+
+def main():
+    parser = argparse.ArgumentParser(description="Automated crypto bot loop")
+    parser.add_argument("--subprocess", action="store_true", help="run each strategy script in its own interpreter (legacy mode)")
+    parser.add_argument("--prefork", nargs="?", const=prefork.SOCKET_PATH, metavar="SOCKET",
+                        help="with --subprocess, run the scripts on a warm `prefork.py serve` worker")
+    parser.add_argument("--compare", action="store_true", help="time one subprocess cycle against one in-process cycle and exit")
+    parser.add_argument("--stream", action="store_true", help="trade on 15-minute candle closes built from streamed minute bars")
+    parser.add_argument("--stream-url", help="market data stream URL (e.g. http://127.0.0.1:8765 for replay_server.py)")
+    parser.add_argument("--metrics-port", type=int, help="serve Prometheus metrics on this port (always written to data/metrics.prom)")
+    parser.add_argument("--cadence", action="append", default=[], type=cadence_override, metavar="STRATEGY=FREQ",
+                        help="run a strategy every FREQ (e.g. sol_strategy=5min) instead of every 15min")
+    parser.add_argument("--settle", type=float, default=SETTLE, help="seconds after a bar boundary before running")
+    parser.add_argument("--accounts", nargs="+", metavar="ENV_FILE",
+                        help="trade every account given by these .env files off one market data pass (see fanout.py)")
+    args = parser.parse_args()
+
+    if args.metrics_port:
+        metrics.serve(args.metrics_port)
+        print(f"📊 Metrics at http://localhost:{args.metrics_port}/metrics")
+
+    if args.compare:
+        compare()
+        return
+
+    if args.stream:
+        from stream import StreamRunner
+        print("🚀 Starting streaming crypto bot...")
+        StreamRunner(make_runner(), stream_url=args.stream_url).run()
+        return
+
+    print("🚀 Starting automated crypto bot loop...")
+    scheduler = Scheduler(settle=args.settle)
+    runner = fanout = None
+    if args.subprocess:
+        scheduler.add("cycle", CYCLE_CADENCE, lambda: print(f"\n⏱️ Cycle took {run_subprocess_cycle(args.prefork):.2f}s"))
+    elif args.accounts:
+        from fanout import FanOut, load_account
+        runner = make_runner()
+        fanout = FanOut(runner, [load_account(path) for path in args.accounts])
+        scheduler.add("fanout", CYCLE_CADENCE, lambda: print(f"\n⏱️ Cycle took {fanout.run_cycle():.2f}s"))
+        for account in fanout.accounts:
+            scheduler.add(f"reconcile {account.label}", RECONCILE_CADENCE,
+                          lambda account=account: reconcile_fills(account.api, account.name))
+        scheduler.add("save_state", STATE_CADENCE, runner.save_state)
+    else:
+        from runner import STRATEGIES
+        overrides = dict(args.cadence)
+        unknown = sorted(set(overrides) - set(STRATEGIES))
+        if unknown:
+            parser.error(f"--cadence for unknown strategy {', '.join(unknown)} (one of {', '.join(STRATEGIES)})")
+        runner = make_runner()
+        groups = {}  # strategies on the same cadence run, and are sized, together
+        for module in runner.modules:
+            cadence = overrides.get(module.__name__, getattr(module, "CADENCE", CYCLE_CADENCE))
+            groups.setdefault(cadence, []).append(module)
+        for cadence, modules in groups.items():
+            name = modules[0].__name__ if len(modules) == 1 else f"strategies@{cadence}"
+            scheduler.add(name, cadence, lambda modules=modules: runner.run_group(modules))
+        scheduler.add("reconcile", RECONCILE_CADENCE, lambda: reconcile_fills(runner.api))
+        scheduler.add("save_state", STATE_CADENCE, runner.save_state)
+    scheduler.add("metrics", STATE_CADENCE, metrics.export)
+    scheduler.describe()
+    try:
+        # Decide on the bar that already closed right away, then on the clock
+        scheduler.run(catch_up=True)
+    except KeyboardInterrupt:
+        print("\n👋 Stopping.")
+    finally:
+        if fanout is not None:
+            fanout.close()
+        if runner is not None:
+            runner.close()
+        metrics.export()
+
+def reconcile_fills(api, account=None):
+    from reconcile import reconcile
+    reconcile(api, account=account)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,151 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+import pandas as pd
+import metrics
+from alpaca_trade_api.rest import TimeFrame
+from bar_store import BarStore
+from resample import closed, period_ns, resample
+from ring_buffer import BarRing
+
+LOOKBACK_MINUTES = 1000  # first sync of a symbol with an empty store
+HISTORY_BARS = 5000  # minute bars used to warm up a symbol's indicators
+BATCH_SIZE = 100  # symbols per multi-symbol request
+MAX_WORKERS = 4
+TIMEFRAME = "1Min"
+CANDLE_FREQ = "15min"
+INDICATOR_CHECKPOINT = "data/state/indicators.json"
+MINUTE_NS = 60 * 1_000_000_000
+
+_store = None
+
+
+def get_store():
+    global _store
+    if _store is None:
+        _store = BarStore()
+    return _store
+
+
+def collect_symbols(modules):
+    # Keep first-seen order, drop duplicates (pepe and sol both trade SOL/USD)
+    return list(dict.fromkeys(module.SYMBOL for module in modules))
+
+
+def _fetch_batch(api, symbols, start):
+    bars = api.get_crypto_bars(symbols, TimeFrame.Minute, start=start).df
+    if bars.empty:
+        return {}
+    return {
+        symbol: frame.drop(columns="symbol")
+        for symbol, frame in bars.groupby("symbol", sort=False)
+    }
+
+
+def fetch_bars(api, symbols, start, batch_size=BATCH_SIZE, max_workers=MAX_WORKERS):
+    symbols = list(dict.fromkeys(symbols))
+    start = pd.Timestamp(start).floor("s").isoformat()
+    batches = [symbols[i:i + batch_size] for i in range(0, len(symbols), batch_size)]
+
+    frames = {}
+    if len(batches) == 1:
+        frames.update(_fetch_batch(api, batches[0], start))
+    elif batches:
+        with ThreadPoolExecutor(max_workers=min(max_workers, len(batches))) as pool:
+            for result in pool.map(lambda batch: _fetch_batch(api, batch, start), batches):
+                frames.update(result)
+    return frames, len(batches)
+
+
+def utc_now():
+    # The clock bars are synced and candles closed by (bench.py pins it)
+    return datetime.now(timezone.utc)
+
+
+def sync(api, symbols, store=None, lookback=LOOKBACK_MINUTES):
+    store = store or get_store()
+    symbols = list(dict.fromkeys(symbols))
+    now = utc_now()
+    current_minute = pd.Timestamp(now).floor("min")
+
+    # Only ask for minutes after the newest stored bar; symbols that share
+    # a resume point share a request
+    groups = {}
+    for symbol in symbols:
+        last = store.last_timestamp(symbol, TIMEFRAME)
+        if last is None:
+            start = pd.Timestamp(now - timedelta(minutes=lookback))
+        else:
+            start = pd.Timestamp(last, tz="UTC") + pd.Timedelta(minutes=1)
+        groups.setdefault(start.floor("min"), []).append(symbol)
+
+    begin = time.perf_counter()
+    requests = 0
+    new_bars = 0
+    for start, group in groups.items():
+        if start >= current_minute:
+            continue
+        with metrics.span("bar_fetch"):
+            frames, count = fetch_bars(api, group, start)
+        requests += count
+        for symbol, frame in frames.items():
+            # The bar for the current minute is still forming
+            new_bars += store.append(symbol, TIMEFRAME, frame[frame.index < current_minute])
+
+    print(f"📡 Synced {len(symbols)} symbol(s): {new_bars} new minute bar(s) "
+          f"in {requests} request(s) ({time.perf_counter() - begin:.2f}s)")
+    return new_bars
+
+
+def load_candles(api, symbols, engine, store=None, history=None):
+    # Sync new minutes, feed newly closed candles to the indicator engine
+    # and hand back each symbol's latest candles with indicator values
+    store = store or get_store()
+    sync(api, symbols, store=store)
+    if history is not None:
+        update_history(history, symbols, store=store)
+    update_indicators(engine, symbols, store=store, history=history)
+    engine.save(INDICATOR_CHECKPOINT)
+    return {symbol: engine.tail(symbol) for symbol in dict.fromkeys(symbols)}
+
+
+def closed_candles(minutes, freq=CANDLE_FREQ, now=None):
+    # A candle is closed once its last minute is no longer the forming one
+    current_minute = pd.Timestamp(now or utc_now()).floor("min").value
+    return closed(resample(minutes, freq), freq, current_minute)
+
+
+def update_history(history, symbols, store=None):
+    # Keep each symbol's in-memory ring level with the bar store
+    store = store or get_store()
+    for symbol in dict.fromkeys(symbols):
+        ring = history.get(symbol)
+        if ring is None:
+            ring = history[symbol] = BarRing()
+            ring.extend(store.arrays(symbol, TIMEFRAME, limit=ring.capacity))
+            continue
+        last = ring.last_timestamp()
+        start = None if last is None else pd.Timestamp(last + MINUTE_NS, tz="UTC")
+        ring.extend(store.arrays(symbol, TIMEFRAME, start=start))
+    return history
+
+
+def update_indicators(engine, symbols, store=None, freq=CANDLE_FREQ, now=None, history=None):
+    # Minutes come from the symbol's ring when it reaches back far enough,
+    # otherwise (first warm-up) from the bar store
+    store = store or get_store()
+    updated = 0
+    for symbol in dict.fromkeys(symbols):
+        last = engine.last_timestamp(symbol)
+        ring = history.get(symbol) if history is not None else None
+        if last is None:
+            minutes = store.arrays(symbol, TIMEFRAME, limit=HISTORY_BARS)
+        elif ring is not None and ring.covers(last + period_ns(freq)):
+            minutes = ring.since(last + period_ns(freq))
+        else:
+            minutes = store.arrays(symbol, TIMEFRAME, start=pd.Timestamp(last, tz="UTC") + pd.Timedelta(freq))
+        with metrics.span("resample", symbol=symbol):
+            candles = closed_candles(minutes, freq, now)
+        with metrics.span("indicators", symbol=symbol):
+            updated += engine.update_candles(symbol, candles)
+    return updated
@@ -0,0 +1,182 @@
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+METRICS_FILE = "data/metrics.prom"
+METRIC_NAME = "tradingbot_stage_seconds"
+QUANTILES = (0.5, 0.95, 0.99)
+WINDOW = 4096  # most recent samples kept per series for the quantiles
+
+# The scheduler's per-job series (scheduler.py), each its own metric
+JOB_METRICS = {
+    "lateness": ("tradingbot_job_lateness_seconds", "Start of a scheduled job after its bar boundary plus settle."),
+    "deadline_miss": ("tradingbot_job_deadline_miss_seconds", "Time a scheduled job ran past its budget."),
+    "overrun": ("tradingbot_job_overrun_seconds", "Age of the run still going when a boundary was skipped."),
+}
+
+_series = {}
+_jobs = {}  # (kind, job) -> Histogram
+_lock = threading.Lock()
+_local = threading.local()
+
+
+# Count and sum over the whole run, quantiles over the last WINDOW samples
+class Histogram:
+    def __init__(self, window=WINDOW):
+        self.count = 0
+        self.total = 0.0
+        self.samples = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def observe(self, seconds):
+        with self._lock:
+            self.count += 1
+            self.total += seconds
+            self.samples.append(seconds)
+
+    def quantiles(self, qs=QUANTILES):
+        with self._lock:
+            ordered = sorted(self.samples)
+        if not ordered:
+            return {q: 0.0 for q in qs}
+        return {q: ordered[min(len(ordered) - 1, int(q * len(ordered)))] for q in qs}
+
+
+# === RECORDING ===
+
+def current_labels():
+    return getattr(_local, "labels", {})
+
+
+@contextmanager
+def labels(**values):
+    # Strategy/symbol for every span opened by this thread inside the block
+    previous = current_labels()
+    _local.labels = dict(previous, **values)
+    try:
+        yield
+    finally:
+        _local.labels = previous
+
+
+def observe(stage, seconds, strategy=None, symbol=None):
+    context = current_labels()
+    key = (stage, strategy or context.get("strategy", ""), symbol or context.get("symbol", ""))
+    histogram = _series.get(key)
+    if histogram is None:
+        with _lock:
+            histogram = _series.setdefault(key, Histogram())
+    histogram.observe(seconds)
+
+
+def job(kind, name, seconds):
+    # kind is one of JOB_METRICS
+    key = (kind, name)
+    histogram = _jobs.get(key)
+    if histogram is None:
+        with _lock:
+            histogram = _jobs.setdefault(key, Histogram())
+    histogram.observe(seconds)
+
+
+@contextmanager
+def span(stage, strategy=None, symbol=None):
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        observe(stage, time.perf_counter() - start, strategy, symbol)
+
+
+def reset():
+    with _lock:
+        _series.clear()
+        _jobs.clear()
+
+
+# === EXPORT ===
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def render():
+    # Prometheus text exposition format, one summary per stage/strategy/symbol
+    lines = [
+        f"# HELP {METRIC_NAME} Time spent in each stage of a strategy cycle.",
+        f"# TYPE {METRIC_NAME} summary",
+    ]
+    with _lock:
+        series = sorted(_series.items())
+    for (stage, strategy, symbol), histogram in series:
+        base = f'stage="{_escape(stage)}",strategy="{_escape(strategy)}",symbol="{_escape(symbol)}"'
+        for q, value in histogram.quantiles().items():
+            lines.append(f'{METRIC_NAME}{{{base},quantile="{q}"}} {value:.6f}')
+        lines.append(f"{METRIC_NAME}_sum{{{base}}} {histogram.total:.6f}")
+        lines.append(f"{METRIC_NAME}_count{{{base}}} {histogram.count}")
+    with _lock:
+        jobs = sorted(_jobs.items())
+    for kind, (name, help_text) in JOB_METRICS.items():
+        family = [(job, histogram) for (k, job), histogram in jobs if k == kind]
+        if not family:
+            continue
+        lines += [f"# HELP {name} {help_text}", f"# TYPE {name} summary"]
+        for job, histogram in family:
+            base = f'job="{_escape(job)}"'
+            for q, value in histogram.quantiles().items():
+                lines.append(f'{name}{{{base},quantile="{q}"}} {value:.6f}')
+            lines.append(f"{name}_sum{{{base}}} {histogram.total:.6f}")
+            lines.append(f"{name}_count{{{base}}} {histogram.count}")
+    return "\n".join(lines) + "\n"
+
+
+def export(path=METRICS_FILE):
+    # Written atomically so a scraper reading the file never sees half of it
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp = f"{path}.tmp"
+    with open(tmp, "w") as file:
+        file.write(render())
+    os.replace(tmp, path)
+    return path
+
+
+def report():
+    with _lock:
+        series = sorted(_series.items())
+    print(f"{'stage':<16} {'strategy':<20} {'symbol':<10} {'count':>6} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}")
+    for (stage, strategy, symbol), histogram in series:
+        q = histogram.quantiles()
+        print(f"{stage:<16} {strategy or '-':<20} {symbol or '-':<10} {histogram.count:>6} "
+              f"{q[0.5] * 1000:>9.2f} {q[0.95] * 1000:>9.2f} {q[0.99] * 1000:>9.2f}")
+    with _lock:
+        jobs = sorted(_jobs.items())
+    for (kind, job), histogram in jobs:
+        q = histogram.quantiles()
+        print(f"{kind:<16} {job:<20} {'-':<10} {histogram.count:>6} "
+              f"{q[0.5] * 1000:>9.2f} {q[0.95] * 1000:>9.2f} {q[0.99] * 1000:>9.2f}")
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split("?")[0] != "/metrics":
+            self.send_error(404)
+            return
+        body = render().encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def serve(port, host="0.0.0.0"):
+    # Prometheus endpoint at http://host:port/metrics on a daemon thread
+    server = ThreadingHTTPServer((host, port), _MetricsHandler)
+    threading.Thread(target=server.serve_forever, name="metrics", daemon=True).start()
+    return server
@@ -0,0 +1,132 @@
+import random
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+import requests
+import metrics
+from requests.adapters import HTTPAdapter
+from rate_limit import TokenBucket
+
+POOL_SIZE = 32  # pooled HTTPS connections (requests defaults to 10)
+ORDER_RATE = 200 / 60  # Alpaca allows 200 requests per minute per account
+ORDER_BURST = 25
+MAX_ATTEMPTS = 4
+BACKOFF = 0.25  # seconds, doubled after every failed attempt
+RETRY_STATUS = {429, 500, 502, 503, 504}
+
+
+def mount_pool(api, size=POOL_SIZE):
+    # Every request made through this REST client shares one keep-alive pool
+    # (clients without an HTTP session, like a simulator, are left alone)
+    session = getattr(api, "_session", None)
+    if session is None:
+        return
+    adapter = HTTPAdapter(pool_connections=size, pool_maxsize=size)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+
+
+def _status(error):
+    try:
+        return error.status_code
+    except Exception:
+        return None
+
+
+def _transient(error):
+    if isinstance(error, (requests.ConnectionError, requests.Timeout)):
+        return True
+    return _status(error) in RETRY_STATUS
+
+
+def _ambiguous(error):
+    # The broker may have accepted the order even though we saw an error
+    # (429 is a clean rejection, everything else transient is not)
+    return _transient(error) and _status(error) != 429
+
+
+def _duplicate(error):
+    return _status(error) == 422 and "client_order_id" in str(error)
+
+
+class OrderResult:
+    def __init__(self, request, order=None, error=None, latency=0.0, attempts=0, waited=0.0):
+        self.request = request
+        self.order = order
+        self.error = error
+        self.latency = latency  # seconds from submission to the broker's answer
+        self.attempts = attempts
+        self.waited = waited  # seconds spent waiting on the rate limiter
+
+    @property
+    def ok(self):
+        return self.error is None
+
+    def __repr__(self):
+        outcome = "ok" if self.ok else f"failed: {self.error}"
+        return (f"OrderResult({self.request.get('side')} {self.request.get('symbol')}, {outcome}, "
+                f"{self.latency * 1000:.0f} ms, {self.attempts} attempt(s))")
+
+
+# Submits orders over one pooled session, under a shared rate limit, with
+# client order IDs so a retried order can never be placed twice
+class OrderGateway:
+    def __init__(self, api, rate=ORDER_RATE, burst=ORDER_BURST, max_workers=POOL_SIZE,
+                 max_attempts=MAX_ATTEMPTS, backoff=BACKOFF):
+        self.api = api
+        mount_pool(api, max_workers)
+        self.bucket = TokenBucket(rate, burst)
+        self.max_attempts = max_attempts
+        self.backoff = backoff
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="order")
+
+    def _lookup(self, client_order_id):
+        try:
+            return self.api.get_order_by_client_order_id(client_order_id)
+        except Exception:
+            return None
+
+    def execute(self, order):
+        with metrics.span("order_submit", symbol=order.get("symbol")):
+            return self._execute(order)
+
+    def _execute(self, order):
+        order = dict(order)
+        order.setdefault("client_order_id", f"tb-{uuid.uuid4().hex}")
+        start = time.perf_counter()
+        waited = 0.0
+        error = None
+        for attempt in range(1, self.max_attempts + 1):
+            waited += self.bucket.acquire()
+            try:
+                placed = self.api.submit_order(**order)
+                return OrderResult(order, placed, None, time.perf_counter() - start, attempt, waited)
+            except Exception as e:
+                error = e
+            if (attempt > 1 and _duplicate(error)) or _ambiguous(error):
+                # An earlier attempt (or this one) may have gone through
+                placed = self._lookup(order["client_order_id"])
+                if placed is not None:
+                    return OrderResult(order, placed, None, time.perf_counter() - start, attempt, waited)
+            if not _transient(error):
+                break
+            if attempt < self.max_attempts:
+                time.sleep(self.backoff * 2 ** (attempt - 1) * (0.5 + random.random()))
+        return OrderResult(order, None, error, time.perf_counter() - start, attempt, waited)
+
+    def submit(self, **order):
+        # Drop-in for api.submit_order: returns the order or raises
+        result = self.execute(order)
+        retried = f", {result.attempts} attempts" if result.attempts > 1 else ""
+        if not result.ok:
+            print(f"📨 {order.get('side')} {order.get('symbol')} failed after {result.latency * 1000:.0f} ms{retried}")
+            raise result.error
+        print(f"📨 {order.get('side')} {order.get('symbol')} accepted in {result.latency * 1000:.0f} ms{retried}")
+        return result.order
+
+    def submit_many(self, orders):
+        # All orders in flight at once; results come back in the same order
+        return list(self.executor.map(self.execute, orders))
+
+    def close(self):
+        self.executor.shutdown(wait=True)
@@ -0,0 +1,220 @@
+import argparse
+import importlib
+import time
+import numpy as np
+import pandas as pd
+from bar_store import BarStore
+from resample import closed, resample
+
+TIMEFRAME = "15min"
+HISTORY_BARS = 5000  # minute bars per symbol used for a live scan
+CANDLE_COLUMNS = ("open", "high", "low", "close", "volume")
+
+# Rules work on candle arrays shaped (time,) for one symbol or
+# (time, symbols) for a whole universe; a symbol without a candle at some
+# time holds NaN there and is skipped by the indicators, so each column
+# evaluates exactly like that symbol on its own.
+
+
+# === INDICATORS (same formulas as ta / indicators.py, whole arrays at once) ===
+
+def _frame(values):
+    return pd.DataFrame(values.reshape(len(values), -1))
+
+
+def _shaped(frame, like):
+    return frame.to_numpy().reshape(like.shape)
+
+
+def ema(close, window):
+    return _shaped(_frame(close).ewm(span=window, min_periods=window, adjust=False, ignore_na=True).mean(), close)
+
+
+def rsi(close, window=14):
+    closes = _frame(close)
+    diff = closes.ffill().diff().to_numpy()
+    missing = closes.isna().to_numpy()
+    # First candle of a symbol: no previous close, counts as zero gain/loss
+    up = np.where(diff > 0, diff, 0.0)
+    down = np.where(diff < 0, -diff, 0.0)
+    up[missing] = np.nan
+    down[missing] = np.nan
+    smooth = dict(alpha=1 / window, min_periods=window, adjust=False, ignore_na=True)
+    emaup = pd.DataFrame(up).ewm(**smooth).mean().to_numpy()
+    emadn = pd.DataFrame(down).ewm(**smooth).mean().to_numpy()
+    with np.errstate(divide="ignore", invalid="ignore"):
+        strength = np.where(emadn == 0, 100.0, 100 - 100 / (1 + emaup / emadn))
+    strength[np.isnan(emadn)] = np.nan
+    return strength.reshape(close.shape)
+
+
+def _cached(candles, key, compute):
+    # Indicator arrays are kept with the candles, so parameter sweeps reuse
+    # them across combinations
+    cache = candles.setdefault("indicators", {})
+    if key not in cache:
+        cache[key] = compute()
+    return cache[key]
+
+
+def candle_ema(candles, window):
+    return _cached(candles, ("ema", window), lambda: ema(candles["close"], window))
+
+
+def candle_rsi(candles, window=14):
+    return _cached(candles, ("rsi", window), lambda: rsi(candles["close"], window))
+
+
+# === RULES: (buy, sell) boolean arrays, one entry per closed candle ===
+
+def ema_rsi_signals(candles, params):
+    fast, slow = candle_ema(candles, params["fast"]), candle_ema(candles, params["slow"])
+    strength = candle_rsi(candles)
+    buy = (fast > slow) & (strength < params["rsi_buy_below"])
+    if params["sell_needs_both"]:
+        sell = (fast < slow) & (strength > params["rsi_sell_above"])
+    else:
+        sell = (fast < slow) | (strength > params["rsi_sell_above"])
+    return buy, sell & ~buy
+
+
+def ema_stack_signals(candles, params):
+    fast, slow, trend = (candle_ema(candles, params[key]) for key in ("fast", "slow", "trend"))
+    buy = (fast > slow) & (slow > trend)
+    return buy, (fast < slow) & ~buy
+
+
+def momentum_signals(candles, params):
+    line = candle_ema(candles, params["ema"])
+    green = candles["close"] > candles["open"]
+    red = candles["close"] < candles["open"]
+    # Green streak counted over the symbol's own candles: candles since the
+    # last one that was not green (the strategies want every candle in it
+    # green, so a doji breaks it too), with missing candles neither extending
+    # nor breaking it
+    valid = ~np.isnan(candles["close"])
+    rank = np.cumsum(valid, axis=0)
+    rows = np.arange(len(green)).reshape((-1,) + (1,) * (green.ndim - 1))
+    breaks = np.where(valid & ~green, rows, -1)
+    np.maximum.accumulate(breaks, axis=0, out=breaks)
+    streak = rank - np.where(breaks >= 0, np.take_along_axis(rank, np.maximum(breaks, 0), axis=0), 0)
+    rising = np.zeros(line.shape, dtype=bool)
+    falling = np.zeros(line.shape, dtype=bool)
+    rising[1:] = line[1:] > line[:-1]
+    falling[1:] = line[1:] < line[:-1]
+    buy = green & (streak >= params["green_candles"]) & rising
+    # A doji is not red: it only sells for strategies that say so
+    sell = (~green if params.get("doji_sells") else red) | falling
+    return buy, sell & ~buy
+
+
+RULES = {
+    "ema_rsi": ema_rsi_signals,
+    "ema_stack": ema_stack_signals,
+    "momentum": momentum_signals,
+}
+
+
+def signals(module, candles, params=None):
+    return RULES[module.RULE](candles, dict(module.PARAMS, **(params or {})))
+
+
+# === PANEL ===
+
+def build_panel(per_symbol):
+    # Align per-symbol candles on the union of their timestamps
+    symbols = list(per_symbol)
+    timestamps = np.unique(np.concatenate([per_symbol[s]["timestamp"] for s in symbols])) if symbols \
+        else np.empty(0, dtype=np.int64)
+    panel = {"timestamp": timestamps, "symbols": symbols}
+    for column in CANDLE_COLUMNS:
+        panel[column] = np.full((len(timestamps), len(symbols)), np.nan)
+    for j, symbol in enumerate(symbols):
+        rows = np.searchsorted(timestamps, per_symbol[symbol]["timestamp"])
+        for column in CANDLE_COLUMNS:
+            panel[column][rows, j] = per_symbol[symbol][column]
+    return panel
+
+
+def load_panel(symbols, store=None, freq=TIMEFRAME, history=HISTORY_BARS, now=None):
+    store = store or BarStore()
+    current_minute = pd.Timestamp(now or pd.Timestamp.now(tz="UTC")).floor("min").value
+    per_symbol = {
+        symbol: closed(resample(store.arrays(symbol, "1Min", limit=history), freq), freq, current_minute)
+        for symbol in symbols
+    }
+    return build_panel(per_symbol)
+
+
+def subpanel(panel, symbols):
+    columns = [panel["symbols"].index(symbol) for symbol in symbols]
+    sub = {"timestamp": panel["timestamp"], "symbols": list(symbols)}
+    for column in CANDLE_COLUMNS:
+        sub[column] = panel[column][:, columns]
+    return sub
+
+
+def scan(assignments, panel):
+    # One vectorized pass per strategy over every symbol it is assigned to;
+    # returns the latest closed-candle signal of each symbol
+    hits = []
+    for module, symbols in assignments.items():
+        sub = subpanel(panel, symbols)
+        if len(sub["timestamp"]) == 0:
+            continue
+        buy, sell = signals(module, sub)
+        last = len(sub["timestamp"]) - 1
+        # A symbol with no candle in the last period has nothing new to say
+        fresh = ~np.isnan(sub["close"][last])
+        for side, mask in (("buy", buy[last] & fresh), ("sell", sell[last] & fresh)):
+            for j in np.flatnonzero(mask):
+                hits.append({
+                    "timestamp": int(sub["timestamp"][last]),
+                    "symbol": sub["symbols"][j],
+                    "side": side,
+                    "strategy": module.STRATEGY,
+                    "close": float(sub["close"][last, j]),
+                })
+    return hits
+
+
+def main():
+    from runner import STRATEGIES
+
+    parser = argparse.ArgumentParser(description="Evaluate strategy rules over a whole symbol universe at once")
+    parser.add_argument("--strategy", help="apply this strategy's rule to every --symbols entry")
+    parser.add_argument("--symbols", nargs="*", help="symbols to scan ('all' = every symbol in the bar store)")
+    parser.add_argument("--sync", action="store_true", help="fetch new minutes for the universe first")
+    args = parser.parse_args()
+
+    store = BarStore()
+    if args.strategy:
+        module = importlib.import_module(args.strategy)
+        symbols = store.symbols() if args.symbols in (None, ["all"]) else args.symbols
+        assignments = {module: symbols}
+    else:
+        modules = [importlib.import_module(name) for name in STRATEGIES]
+        assignments = {module: [module.SYMBOL] for module in modules}
+    universe = list(dict.fromkeys(s for symbols in assignments.values() for s in symbols))
+
+    if args.sync:
+        from client import get_api
+        from market_data import sync
+        sync(get_api(), universe, store=store)
+
+    start = time.perf_counter()
+    panel = load_panel(universe, store)
+    hits = scan(assignments, panel)
+    elapsed = time.perf_counter() - start
+
+    print(f"🔭 Scanned {len(universe)} symbol(s) × {len(panel['timestamp'])} candles in {elapsed * 1000:.1f} ms")
+    for hit in hits:
+        when = pd.Timestamp(hit["timestamp"], tz="UTC")
+        icon = "🟢" if hit["side"] == "buy" else "🔴"
+        print(f"{icon} {hit['side'].upper():<4} {hit['symbol']:<10} {hit['strategy']:<20} close {hit['close']:.6g} ({when:%Y-%m-%d %H:%M})")
+    if not hits:
+        print("🕵️ No signals on the latest candle.")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,109 +1,71 @@
-import os
-import pandas as pd
-from dotenv import load_dotenv
-from alpaca_trade_api.rest import REST, TimeFrame
-from ta.trend import EMAIndicator
-from log_trade import log_trade
-
-load_dotenv()
-
-api = REST(
-    os.getenv("APCA_API_KEY_ID"),
-    os.getenv("APCA_API_SECRET_KEY"),
-    os.getenv("APCA_API_BASE_URL")
-)
-
-symbol = "SOL/USD"
-allocation_pct = 0.05  # 5% of buying power
-
-print(f"\n📊 Fetching 15-minute historical data for {symbol}...\n")
-bars = api.get_crypto_bars(symbol, TimeFrame.Minute, limit=1000).df
-sol = bars.copy()
-
-# Resample to 15-minute candles
-sol = sol.resample("15min").agg({
-    "open": "first",
-    "high": "max",
-    "low": "min",
-    "close": "last",
-    "volume": "sum"
-}).dropna()
-
-# Calculate EMA9 and green/red candles
-sol["EMA9"] = EMAIndicator(sol["close"], window=9).ema_indicator()
-sol["Candle"] = sol["close"] > sol["open"]
-
-# Get last three candles
-latest = sol.iloc[-1]
-prev = sol.iloc[-2]
-prev2 = sol.iloc[-3]
-
-print(f"📌 Latest SOL Summary:")
-print(f"• Close Price: {latest['close']:.2f}")
-print(f"• EMA9:        {latest['EMA9']:.2f} (was {prev['EMA9']:.2f})")
-
-account = api.get_account()
-buying_power = float(account.buying_power)
-trade_amount = buying_power * allocation_pct
-
-# === SELL LOGIC ===
-if not latest["Candle"] or latest["EMA9"] < prev["EMA9"]:
-    print("\n🔴 SELL SIGNAL for SOL/USD!")
-    print("Reason: Red candle or EMA9 turning downward (momentum fading).")
-    print("→ Checking SOL position before selling...")
-
-    try:
-        positions = api.list_positions()
-        sol_position = next((p for p in positions if p.symbol == symbol), None)
-
-        if sol_position:
-            qty = sol_position.qty
-            print(f"→ Selling full SOL position: {qty} at market price.")
-
-            api.submit_order(
-                symbol=symbol,
-                qty=qty,
-                side="sell",
-                type="market",
-                time_in_force="gtc"
-            )
-            print(f"✅ Sell order submitted: Sold {qty} SOL.")
-            log_trade(symbol, "sell", "sol_daytrade", latest["close"], qty)
-        else:
-            print("ℹ️ No SOL currently held.")
-    except Exception as e:
-        print("❌ Failed to submit sell order:", e)
+import sys
+import allocator
+
+SYMBOL = "SOL/USD"
+STRATEGY = "sol_daytrade"
+
+# Rule parameters, shared with backtest.py
+RULE = "momentum"
+PARAMS = {
+    "ema": 9,
+    "green_candles": 3,
+    "allocation_pct": 0.05,  # of buying power
+    "doji_sells": True,  # a candle that closes flat sells like a red one
+}
+SIZE_FROM = "buying_power"  # allocator.py sizes the others off cash
+
+
+def decide(candles):
+    # The rule on the latest closed candle, the same for every account:
+    # "buy", "sell" or None
+    green_needed = PARAMS["green_candles"]
+    ema = f"EMA{PARAMS['ema']}"
+
+    if len(candles) < max(green_needed, 2):
+        print(f"⚠️ Not enough closed {SYMBOL} candles yet. Skipping.")
+        return None
+
+    # Mark green/red candles (the EMA comes from the engine)
+    for candle in candles:
+        candle["Candle"] = candle["close"] > candle["open"]
+    latest, prev = candles[-1], candles[-2]
+
+    print(f"📌 Latest SOL Summary:")
+    print(f"• Close Price: {latest['close']:.2f}")
+    print(f"• {ema + ':':<12} {latest[ema]:.2f} (was {prev[ema]:.2f})")
+
+    # === SELL LOGIC ===
+    red = latest["close"] < latest["open"] or (PARAMS["doji_sells"] and not latest["Candle"])
+    if red or latest[ema] < prev[ema]:
+        print("\n🔴 SELL SIGNAL for SOL/USD!")
+        print(f"Reason: Red candle or {ema} turning downward (momentum fading).")
+        return "sell"
+
+    # === BUY LOGIC ===
+    if all(candle["Candle"] for candle in candles[-green_needed:]) and latest[ema] > prev[ema]:
+        print("\n🟢 BUY SIGNAL for SOL/USD!")
+        print(f"Reason: {green_needed} green candles + {ema} rising (momentum confirmed).")
+        return "buy"
+
+    # === NO SIGNAL ===
+    print("\n🕵️ No SOL trading signal at this time.")
+    print("Waiting for better conditions.")
+    return None
 
-# === BUY LOGIC ===
-elif latest["Candle"] and prev["Candle"] and prev2["Candle"] and latest["EMA9"] > prev["EMA9"]:
-    print("\n🟢 BUY SIGNAL for SOL/USD!")
-    print("Reason: 3 green candles + EMA9 rising (momentum confirmed).")
-    print(f"→ Available buying power: ${buying_power:.2f}")
-    print(f"→ Allocating 5% (${trade_amount:.2f}) to SOL...")
 
-    try:
-        positions = api.list_positions()
-        sol_position = next((p for p in positions if p.symbol == symbol), None)
-        if sol_position:
-            print("⚠️ Already holding SOL. Skipping duplicate buy.")
-        elif trade_amount >= 1.00:
-            api.submit_order(
-                symbol=symbol,
-                notional=trade_amount,
-                side="buy",
-                type="market",
-                time_in_force="gtc"
-            )
-            print(f"✅ Buy order submitted: ${trade_amount:.2f} worth of SOL purchased.")
-            log_trade(symbol, "buy", "sol_daytrade", latest["close"], trade_amount)
-        else:
-            print("⚠️ Trade amount too small to execute. Skipping buy.")
-    except Exception as e:
-        print("❌ Failed to submit buy order:", e)
+def run(broker, candles):
+    # On its own (`python pepe_strategy.py`); the runner sizes every strategy's
+    # trade together instead
+    action = allocator.trade(broker, sys.modules[__name__], decide(candles), candles)
+    print("\n✅ SOL strategy check complete.\n")
+    return action
 
-# === NO SIGNAL ===
-else:
-    print("\n🕵️ No SOL trading signal at this time.")
-    print("Waiting for better conditions.")
 
-print("\n✅ SOL strategy check complete.\n")
+if __name__ == "__main__":
+    from client import get_api
+    from indicators import IndicatorEngine
+    from market_data import INDICATOR_CHECKPOINT, load_candles
+    from broker_state import BrokerState
+    api = get_api()
+    engine = IndicatorEngine.load(INDICATOR_CHECKPOINT)
+    run(BrokerState(api), load_candles(api, [SYMBOL], engine)[SYMBOL])
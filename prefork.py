@@ -0,0 +1,197 @@
+import argparse
+import atexit
+import json
+import os
+import signal
+import socket
+import sys
+
+SOCKET_PATH = "data/prefork.sock"
+SPARES = 2  # forked workers kept waiting for a request
+EXIT_MARK = b"\0prefork-exit:"
+
+# A warm interpreter for the strategy scripts. `prefork.py serve` imports
+# everything a strategy needs once (pandas, the Alpaca client, the bar
+# store, every strategy module) and keeps SPARES forked copies of itself
+# blocked on a Unix socket. `prefork.py run btc_strategy.py` hands a script
+# to one of them, which runs it exactly like `python btc_strategy.py` would
+# (same argv, working directory and environment) and streams its output
+# back; the server then forks a new spare. The client only imports the
+# standard library, so it starts in a few milliseconds.
+
+
+def preload_modules():
+    from runner import STRATEGIES
+    return ["pandas", "numpy", "alpaca_trade_api.rest", "dotenv", "client", "market_data",
+            "broker_state", "indicators", "journal", "log_trade", "runner"] + list(STRATEGIES)
+
+
+# === WORKER ===
+
+def handle(conn):
+    import runpy
+    import traceback
+    request = json.loads(conn.makefile("rb").readline())
+    os.chdir(request["cwd"])
+    os.environ.clear()
+    os.environ.update(request["env"])
+    sys.argv = [request["script"]] + request["args"]
+    sys.path[0] = os.path.dirname(os.path.abspath(request["script"]))
+    sys.stdout.flush()
+    sys.stderr.flush()
+    os.dup2(conn.fileno(), 1)
+    os.dup2(conn.fileno(), 2)
+    if request.get("profile"):
+        import startup_profile
+        startup_profile.begin()
+
+    code = 0
+    try:
+        runpy.run_path(request["script"], run_name="__main__")
+    except SystemExit as e:
+        if isinstance(e.code, int):
+            code = e.code
+        elif e.code is not None:
+            print(e.code, file=sys.stderr)
+            code = 1
+    except BaseException:
+        traceback.print_exc()
+        code = 1
+    # What the script registered (the journal writer, ...) still runs, as
+    # it would on a normal interpreter exit
+    atexit._run_exitfuncs()
+    sys.stdout.flush()
+    sys.stderr.flush()
+    os.write(1, EXIT_MARK + str(code).encode())
+    return code
+
+
+def _spare(listener, taken):
+    # Runs in the forked child: wait for one request, tell the server, serve it
+    signal.signal(signal.SIGINT, signal.SIG_DFL)
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    code = 1
+    try:
+        conn, _ = listener.accept()
+        os.write(taken, os.getpid().to_bytes(4, "little"))
+        listener.close()
+        code = handle(conn)
+    finally:
+        os._exit(code)
+
+
+def serve(path=SOCKET_PATH, spares=SPARES, modules=None):
+    import importlib
+    import time
+    start = time.perf_counter()
+    modules = modules or preload_modules()
+    for name in modules:
+        importlib.import_module(name)
+    loaded = time.perf_counter() - start
+
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    if os.path.exists(path):
+        os.unlink(path)  # left behind by a server that did not shut down
+    listener = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    listener.bind(path)
+    os.chmod(path, 0o600)
+    listener.listen(64)
+    taken_r, taken_w = os.pipe()
+    waiting, busy = set(), set()
+
+    def fork_spare():
+        pid = os.fork()
+        if pid == 0:
+            os.close(taken_r)
+            _spare(listener, taken_w)
+        waiting.add(pid)
+
+    for _ in range(spares):
+        fork_spare()
+    print(f"🔥 Prefork worker on {path}: {len(modules)} module(s) preloaded in {loaded:.2f}s, "
+          f"{spares} spare(s) waiting", flush=True)
+    signal.signal(signal.SIGTERM, lambda *_: sys.exit(0))
+    try:
+        while True:
+            pid = int.from_bytes(os.read(taken_r, 4), "little")  # a spare took a request
+            waiting.discard(pid)
+            busy.add(pid)
+            fork_spare()
+            while busy:
+                pid, _ = os.waitpid(-1, os.WNOHANG)
+                if pid == 0:
+                    break
+                busy.discard(pid)
+                waiting.discard(pid)
+    except (KeyboardInterrupt, SystemExit):
+        print("\n👋 Stopping prefork worker.")
+    finally:
+        # Idle spares go at once; scripts already running are let finish
+        listener.close()
+        if os.path.exists(path):
+            os.unlink(path)
+        for pid in waiting:
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+        for pid in waiting | busy:
+            try:
+                os.waitpid(pid, 0)
+            except ChildProcessError:
+                pass
+
+
+# === CLIENT ===
+
+def run(script, args=(), path=SOCKET_PATH, profile=False, out=None):
+    # Runs script on a warm worker; returns its exit code
+    if out is None:
+        sys.stdout.flush()  # keep the caller's own prints in order
+        out = sys.stdout.buffer
+    conn = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    conn.connect(path)
+    request = {"script": script, "args": list(args), "cwd": os.getcwd(), "env": dict(os.environ),
+               "profile": profile}
+    conn.sendall(json.dumps(request).encode() + b"\n")
+    tail = b""
+    keep = len(EXIT_MARK) + 8
+    while True:
+        chunk = conn.recv(65536)
+        if not chunk:
+            break
+        tail += chunk
+        if len(tail) > keep:
+            out.write(tail[:-keep])
+            out.flush()
+            tail = tail[-keep:]
+    conn.close()
+    output, mark, code = tail.rpartition(EXIT_MARK)
+    if not mark:
+        output, code = tail, b"1"  # the worker ended without reporting back
+    out.write(output)
+    out.flush()
+    return int(code)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Keep a warm interpreter ready for the strategy scripts")
+    sub = parser.add_subparsers(dest="command", required=True)
+    server = sub.add_parser("serve", help="preload the strategies and wait for scripts to run")
+    server.add_argument("--socket", default=SOCKET_PATH)
+    server.add_argument("--spares", type=int, default=SPARES)
+    client = sub.add_parser("run", help="run a script on the warm worker")
+    client.add_argument("--socket", default=SOCKET_PATH)
+    client.add_argument("--profile", action="store_true", help=argparse.SUPPRESS)
+    client.add_argument("script")
+    client.add_argument("args", nargs=argparse.REMAINDER)
+    args = parser.parse_args()
+
+    if args.command == "serve":
+        serve(args.socket, args.spares)
+    else:
+        sys.exit(run(args.script, args.args, args.socket, args.profile))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,230 @@
+import argparse
+import json
+import time
+from journal import connect, get_journal
+
+PAGE_SIZE = 100  # Alpaca's maximum for account activities
+ACTIVITY_TYPES = ["FILL", "CFEE"]
+CURSOR_KEY = "reconcile.cursor"  # ID of the last activity applied
+POSITIONS_KEY = "reconcile.positions"  # open quantity and cost per strategy/symbol
+PENDING_KEY = "reconcile.pending"  # fills seen before the journal row of their order
+PENDING_RUNS = 12  # runs a fill waits for its journal row (an hour at the 5-minute cadence)
+SQL_BATCH = 500  # order IDs per IN (...) lookup
+
+
+def _raw(activity):
+    return getattr(activity, "_raw", activity)
+
+
+def _normalize(symbol):
+    return (symbol or "").replace("/", "")
+
+
+def fetch_activities(api, cursor=None, page_size=PAGE_SIZE):
+    # Everything after the cursor, oldest first; each page resumes after the
+    # last ID of the previous one
+    activities, requests = [], 0
+    while True:
+        page = [_raw(a) for a in api.get_activities(activity_types=ACTIVITY_TYPES, direction="asc",
+                                                    page_size=page_size, page_token=cursor)]
+        requests += 1
+        activities.extend(page)
+        if len(page) < page_size:
+            return activities, requests
+        cursor = page[-1]["id"]
+
+
+def _fee_usd(activity):
+    # Crypto fees are charged in the asset bought (or USD on sells)
+    net = abs(float(activity.get("net_amount") or 0))
+    if net:
+        return net
+    return abs(float(activity.get("qty") or 0)) * float(activity.get("price") or 0)
+
+
+def _outcome(row):
+    if row["side"] == "buy":
+        return "filled"
+    return "win" if (row["realized_pnl"] or 0) > 0 else "loss"
+
+
+# Applies new broker fills and fees to the journal rows that placed them:
+# VWAP fill price, filled quantity, fees and, for sells, realized PnL against
+# the strategy's average cost. Each applied fill or fee is also appended to
+# the fills table, which analytics.py follows. Positions and the activity
+# cursor live in the journal's meta table, so a run only ever reads activity
+# it hasn't seen; a fill that arrives before the journal row of its order
+# (log_trade runs once the order call returns) is kept as pending and tried
+# again on the next runs instead of being passed over. Each trading account
+# (fanout.py) has its own cursor and positions, so accounts reconciling at
+# the same time never overwrite each other; its trades are told apart by
+# their "strategy@account" label.
+class Reconciler:
+    def __init__(self, api, journal=None, account=None):
+        self.api = api
+        self.journal = journal or get_journal()
+        self.account = account
+        self.cursor_key = CURSOR_KEY if account is None else f"{CURSOR_KEY}.{account}"
+        self.positions_key = POSITIONS_KEY if account is None else f"{POSITIONS_KEY}.{account}"
+        self.pending_key = PENDING_KEY if account is None else f"{PENDING_KEY}.{account}"
+
+    def _owns(self, key):
+        # "strategy@account|SYMBOL" keys belong to that account, the rest to the main one
+        strategy = key.split("|", 1)[0]
+        return "@" not in strategy if self.account is None else strategy.endswith(f"@{self.account}")
+
+    def _positions(self, conn):
+        stored = conn.execute("SELECT value FROM meta WHERE key = ?", (self.positions_key,)).fetchone()
+        if stored is None and self.account is not None:
+            # Positions from before each account had its own key were all kept under the main one
+            stored = conn.execute("SELECT value FROM meta WHERE key = ?", (POSITIONS_KEY,)).fetchone()
+        positions = {} if stored is None else json.loads(stored[0])
+        return {key: position for key, position in positions.items() if self._owns(key)}
+
+    def _rows(self, conn, order_ids):
+        rows = {}
+        order_ids = list(order_ids)
+        for i in range(0, len(order_ids), SQL_BATCH):
+            batch = order_ids[i:i + SQL_BATCH]
+            for row in conn.execute(
+                    "SELECT id, order_id, symbol, side, strategy, fill_price, filled_qty, fees, realized_pnl "
+                    f"FROM trades WHERE order_id IN ({', '.join('?' * len(batch))})", batch):
+                rows[row["order_id"]] = dict(row)
+        return rows
+
+    def _last_fill(self, conn, symbol):
+        # Fee posted in a later run than its fill, on one of this account's trades
+        owned = "strategy NOT GLOB '*@*'" if self.account is None else "strategy GLOB ?"
+        args = (symbol,) if self.account is None else (symbol, f"*@{self.account}")
+        row = conn.execute(
+            "SELECT id, order_id, symbol, side, strategy, fill_price, filled_qty, fees, realized_pnl "
+            f"FROM trades WHERE replace(symbol, '/', '') = ? AND filled_qty IS NOT NULL AND {owned} "
+            "ORDER BY id DESC LIMIT 1", args).fetchone()
+        return None if row is None else dict(row)
+
+    def run(self):
+        start = time.perf_counter()
+        self.journal.flush()
+        conn = connect(self.journal.path)
+        try:
+            cursor = conn.execute("SELECT value FROM meta WHERE key = ?", (self.cursor_key,)).fetchone()
+            cursor = None if cursor is None else cursor[0]
+            positions = self._positions(conn)
+            stored = conn.execute("SELECT value FROM meta WHERE key = ?", (self.pending_key,)).fetchone()
+            pending = [] if stored is None else json.loads(stored[0])
+
+            fetched, requests = fetch_activities(self.api, cursor)
+            if not fetched and not pending:
+                print(f"🧾 No new fills ({requests} request(s), {time.perf_counter() - start:.2f}s)")
+                return 0
+            activities = pending + fetched
+
+            rows = self._rows(conn, {a["order_id"] for a in activities if a.get("order_id")})
+            last_fill = {}
+            changed = {}
+            events = []
+            fills = fees = unmatched = 0
+            waiting = []
+            for activity in activities:
+                symbol = _normalize(activity.get("symbol"))
+                if activity.get("activity_type") == "FILL":
+                    row = rows.get(activity.get("order_id"))
+                    if row is None:
+                        runs = activity.get("pending_runs", 0) + 1
+                        if runs < PENDING_RUNS:
+                            waiting.append(dict(activity, pending_runs=runs))
+                        else:
+                            unmatched += 1  # not one of the bot's orders
+                        continue
+                    qty, price = float(activity["qty"]), float(activity["price"])
+                    held = row["filled_qty"] or 0.0
+                    row["fill_price"] = ((row["fill_price"] or 0.0) * held + price * qty) / (held + qty)
+                    row["filled_qty"] = held + qty
+                    position = positions.setdefault(f"{row['strategy']}|{symbol}", {"qty": 0.0, "cost": 0.0})
+                    if row["side"] == "buy":
+                        position["qty"] += qty
+                        position["cost"] += price * qty
+                        realized, cost_delta = 0.0, price * qty
+                    else:
+                        # Only the quantity with a known basis has PnL; the rest
+                        # (bought before reconciling began) counts as flat
+                        average = position["cost"] / position["qty"] if position["qty"] > 0 else price
+                        sold = min(qty, position["qty"])
+                        position["qty"] -= sold
+                        position["cost"] -= average * sold
+                        realized, cost_delta = (price - average) * sold, -average * sold
+                        row["realized_pnl"] = (row["realized_pnl"] or 0.0) + realized
+                    events.append((activity.get("transaction_time"), row["id"], row["strategy"], row["symbol"],
+                                   row["side"], "fill", qty, price, 0.0, realized, cost_delta))
+                    fills += 1
+                else:
+                    row = rows.get(activity.get("order_id")) or last_fill.get(symbol) or self._last_fill(conn, symbol)
+                    if row is None:
+                        unmatched += 1
+                        continue
+                    rows.setdefault(row["order_id"], row)
+                    fee = _fee_usd(activity)
+                    row["fees"] = (row["fees"] or 0.0) + fee
+                    realized = cost_delta = 0.0
+                    if row["side"] == "sell":
+                        row["realized_pnl"] = (row["realized_pnl"] or 0.0) - fee
+                        realized = -fee
+                    else:
+                        position = positions.setdefault(f"{row['strategy']}|{symbol}", {"qty": 0.0, "cost": 0.0})
+                        if position["qty"] > 0:
+                            position["cost"] += fee
+                            cost_delta = fee
+                    events.append((activity.get("transaction_time") or activity.get("date"), row["id"],
+                                   row["strategy"], row["symbol"], row["side"], "fee", 0.0, 0.0, fee, realized,
+                                   cost_delta))
+                    fees += 1
+                last_fill[symbol] = row
+                changed[row["id"]] = row
+
+            # One transaction: the journal rows, the fill events, the positions,
+            # the pending fills and the cursor
+            with conn:
+                conn.executemany(
+                    "INSERT INTO fills (timestamp, trade_id, strategy, symbol, side, kind, qty, price, fee, "
+                    "realized_pnl, cost_delta) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", events)
+                conn.executemany(
+                    "UPDATE trades SET fill_price = ?, filled_qty = ?, fees = ?, realized_pnl = ?, outcome = ? "
+                    "WHERE id = ?",
+                    [(row["fill_price"], row["filled_qty"], row["fees"], row["realized_pnl"], _outcome(row), row["id"])
+                     for row in changed.values()])
+                conn.executemany(
+                    "INSERT INTO meta (key, value) VALUES (?, ?) ON CONFLICT(key) DO UPDATE SET value = excluded.value",
+                    [(self.cursor_key, fetched[-1]["id"] if fetched else cursor),
+                     (self.positions_key, json.dumps({k: p for k, p in positions.items() if p["qty"] > 1e-12})),
+                     (self.pending_key, json.dumps(waiting))])
+        finally:
+            conn.close()
+
+        print(f"🧾 Reconciled {fills} fill(s) and {fees} fee(s) into {len(changed)} trade(s) "
+              f"from {len(activities)} activit(ies) in {requests} request(s)"
+              + (f", {unmatched} unmatched" if unmatched else "")
+              + (f", {len(waiting)} waiting for their trade" if waiting else "")
+              + f" ({time.perf_counter() - start:.2f}s)")
+        return len(changed)
+
+
+def reconcile(api, journal=None, account=None):
+    return Reconciler(api, journal, account).run()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Apply broker fills and fees to the trade journal")
+    parser.add_argument("--every", type=float, help="keep running, reconciling every N seconds")
+    args = parser.parse_args()
+
+    from client import get_api
+    api = get_api()
+    while True:
+        reconcile(api)
+        if not args.every:
+            return
+        time.sleep(args.every)
+
+
+if __name__ == "__main__":
+    main()
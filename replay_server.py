@@ -0,0 +1,101 @@
+import argparse
+import asyncio
+import zlib
+import msgpack
+import numpy as np
+import pandas as pd
+import websockets
+from bar_store import BarStore
+
+# Local stand-in for Alpaca's crypto market-data websocket. It speaks the
+# same msgpack protocol (connected → auth → subscribe → "b" bar messages)
+# and replays minute bars from the local bar store, or a synthetic random
+# walk, at a configurable speed.
+
+
+def synthetic_bars(symbol, minutes, end=None):
+    end = pd.Timestamp(end or pd.Timestamp.now(tz="UTC")).floor("min")
+    index = pd.date_range(end=end, periods=minutes, freq="min")
+    rng = np.random.default_rng(zlib.crc32(symbol.encode()))
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.001, minutes)))
+    open_ = np.concatenate([[close[0]], close[:-1]])
+    return pd.DataFrame({
+        "open": open_,
+        "high": np.maximum(open_, close) * (1 + rng.random(minutes) * 0.0005),
+        "low": np.minimum(open_, close) * (1 - rng.random(minutes) * 0.0005),
+        "close": close,
+        "volume": rng.random(minutes) * 10,
+    }, index=index)
+
+
+class ReplayServer:
+    def __init__(self, store=None, minutes=240, speed=60.0, start=None):
+        self.store = store
+        self.minutes = minutes
+        self.speed = speed  # replayed minutes per real second
+        self.start = start
+
+    def _bars(self, symbol):
+        if self.store is not None:
+            bars = self.store.read(symbol, "1Min", start=self.start)
+            if not bars.empty:
+                return bars.iloc[:self.minutes] if self.start else bars.iloc[-self.minutes:]
+        return synthetic_bars(symbol, self.minutes)
+
+    def _messages(self, symbols):
+        rows = []
+        for symbol in symbols:
+            bars = self._bars(symbol)
+            for timestamp, bar in zip(bars.index.as_unit("ns").asi8, bars.to_dict("records")):
+                rows.append((int(timestamp), {
+                    "T": "b", "S": symbol,
+                    "o": bar["open"], "h": bar["high"], "l": bar["low"], "c": bar["close"], "v": bar["volume"],
+                    "t": msgpack.Timestamp.from_unix_nano(int(timestamp)),
+                }))
+        rows.sort(key=lambda row: row[0])
+        batch, batch_time = [], None
+        for timestamp, message in rows:
+            if batch and timestamp != batch_time:
+                yield batch
+                batch = []
+            batch_time = timestamp
+            batch.append(message)
+        if batch:
+            yield batch
+
+    async def handle(self, websocket, path=None):
+        await websocket.send(msgpack.packb([{"T": "success", "msg": "connected"}]))
+        msgpack.unpackb(await websocket.recv())
+        await websocket.send(msgpack.packb([{"T": "success", "msg": "authenticated"}]))
+        request = msgpack.unpackb(await websocket.recv())
+        symbols = request.get("bars", [])
+        await websocket.send(msgpack.packb([{"T": "subscription", "bars": symbols}]))
+
+        print(f"▶️ Replaying {self.minutes} minute(s) of bars for {', '.join(symbols)}")
+        for batch in self._messages(symbols):
+            await websocket.send(msgpack.packb(batch, datetime=False))
+            await asyncio.sleep(60 / self.speed)
+        print("⏹️ Replay finished")
+
+    async def serve(self, host="127.0.0.1", port=8765):
+        async with websockets.serve(self.handle, host, port):
+            print(f"🛰️ Replay server listening on ws://{host}:{port}")
+            await asyncio.Future()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay minute bars over an Alpaca-compatible websocket")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--minutes", type=int, default=240, help="minutes of bars to replay per symbol")
+    parser.add_argument("--speed", type=float, default=60.0, help="replayed minutes per second")
+    parser.add_argument("--start", help="replay stored bars from this UTC time instead of the latest ones")
+    parser.add_argument("--synthetic", action="store_true", help="replay a random walk instead of the bar store")
+    args = parser.parse_args()
+
+    store = None if args.synthetic else BarStore()
+    server = ReplayServer(store, minutes=args.minutes, speed=args.speed, start=args.start)
+    asyncio.run(server.serve(port=args.port))
+
+
+if __name__ == "__main__":
+    main()
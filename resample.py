@@ -0,0 +1,118 @@
+from functools import lru_cache
+import numpy as np
+import pandas as pd
+
+MINUTE_NS = 60 * 1_000_000_000
+PYRAMID = ("5min", "15min", "1h", "4h")
+
+# Bars and candles here are dicts of equal-length arrays: timestamp (int64
+# ns, bucket start) plus open/high/low/close/volume. Buckets are aligned to
+# the epoch, like pandas' default for periods that divide a day.
+
+
+@lru_cache(maxsize=None)
+def period_ns(freq):
+    return pd.Timedelta(freq).value
+
+
+def resample(bars, freq):
+    # Segmented reductions over sorted bars of any finer timeframe; empty
+    # buckets never appear, which matches pandas' resample(...).dropna()
+    timestamps = np.asarray(bars["timestamp"])
+    if len(timestamps) == 0:
+        return {column: np.asarray(values) for column, values in bars.items()}
+    period = period_ns(freq)
+    bucket = timestamps - timestamps % period
+    starts = np.flatnonzero(np.concatenate([[True], bucket[1:] != bucket[:-1]]))
+    ends = np.append(starts[1:], len(timestamps)) - 1
+    return {
+        "timestamp": bucket[starts],
+        "open": np.asarray(bars["open"])[starts],
+        "high": np.maximum.reduceat(bars["high"], starts),
+        "low": np.minimum.reduceat(bars["low"], starts),
+        "close": np.asarray(bars["close"])[ends],
+        "volume": np.add.reduceat(bars["volume"], starts),
+    }
+
+
+def closed(candles, freq, current_minute):
+    # Candles whose last minute is before the forming one; only the newest
+    # candle can still be open, so this is a slice, not a copy
+    ends = np.asarray(candles["timestamp"]) + period_ns(freq)
+    keep = int(np.searchsorted(ends, current_minute, side="right"))
+    return {column: values[:keep] for column, values in candles.items()}
+
+
+def pyramid(minutes, freqs=PYRAMID):
+    # One pass over the minutes for the finest timeframe, then each coarser
+    # one is built from the level below it (first/max/min/last/sum compose)
+    levels = {}
+    source, source_period = minutes, MINUTE_NS
+    for freq in sorted(freqs, key=period_ns):
+        period = period_ns(freq)
+        if period % source_period:
+            raise ValueError(f"{freq} is not a multiple of the timeframe below it")
+        source = levels[freq] = resample(source, freq)
+        source_period = period
+    return levels
+
+
+# Folds bars into fixed candles and closes a candle as soon as its last
+# input bar arrives (or, if that bar never traded, on the next one)
+class CandleBuilder:
+    def __init__(self, freq, step=MINUTE_NS):
+        self.period = period_ns(freq)
+        self.step = step  # period of the bars fed in
+        self._open = {}
+
+    def add(self, symbol, timestamp, bar):
+        closed = []
+        bucket = timestamp - timestamp % self.period
+        current = self._open.get(symbol)
+        if current is not None and current[0] != bucket:
+            closed.append(current)
+            current = None
+        if current is None:
+            current = (bucket, dict(bar))
+            self._open[symbol] = current
+        else:
+            candle = current[1]
+            candle["high"] = max(candle["high"], bar["high"])
+            candle["low"] = min(candle["low"], bar["low"])
+            candle["close"] = bar["close"]
+            candle["volume"] += bar["volume"]
+        if timestamp + self.step == bucket + self.period:
+            closed.append(self._open.pop(symbol))
+        return closed
+
+    def forming(self, symbol):
+        current = self._open.get(symbol)
+        return None if current is None else (current[0], dict(current[1]))
+
+
+# Incremental version of pyramid(): each minute bar updates the finest
+# builder, and every candle it closes is fed to the next timeframe up
+class CandlePyramid:
+    def __init__(self, freqs=PYRAMID):
+        self.freqs = sorted(freqs, key=period_ns)
+        self.builders = []
+        step = MINUTE_NS
+        for freq in self.freqs:
+            if period_ns(freq) % step:
+                raise ValueError(f"{freq} is not a multiple of the timeframe below it")
+            self.builders.append(CandleBuilder(freq, step))
+            step = period_ns(freq)
+
+    def add(self, symbol, timestamp, bar):
+        # Returns {freq: [(bucket, candle), ...]} for every candle closed by this bar
+        result = {}
+        inputs = [(timestamp, bar)]
+        for freq, builder in zip(self.freqs, self.builders):
+            finished = []
+            for ts, candle in inputs:
+                finished.extend(builder.add(symbol, ts, candle))
+            if not finished:
+                break
+            result[freq] = finished
+            inputs = finished
+        return result
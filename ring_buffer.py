@@ -0,0 +1,88 @@
+import numpy as np
+import pandas as pd
+
+RING_CAPACITY = 1440  # minute bars per symbol (one day)
+FIELDS = ("open", "high", "low", "close", "volume")
+
+
+def bytes_per_symbol(capacity=RING_CAPACITY, dtype=np.float64):
+    # Every bar is stored twice (see BarRing): int64 timestamp + 5 values
+    return 2 * capacity * (8 + len(FIELDS) * np.dtype(dtype).itemsize)
+
+
+# Fixed-capacity minute history for one symbol. Each bar is written at slot
+# i and again at slot i + capacity, so the latest N bars always sit in one
+# contiguous range and last(n) hands out plain views, never copies.
+#
+# Memory is fixed at creation: 2 * capacity * (8 + 5 * itemsize) bytes, i.e.
+# 96 bytes per bar with float64 values (~135 KiB for a day of minutes) or 56
+# with float32 (~79 KiB). float32 keeps ~7 significant digits, fine for
+# screening but not for the indicator engine, which expects float64.
+class BarRing:
+    def __init__(self, capacity=RING_CAPACITY, dtype=np.float64):
+        self.capacity = capacity
+        self.timestamp = np.zeros(2 * capacity, dtype=np.int64)
+        self.values = np.zeros((len(FIELDS), 2 * capacity), dtype=dtype)
+        self.count = 0  # bars ever appended
+
+    def __len__(self):
+        return min(self.count, self.capacity)
+
+    @property
+    def nbytes(self):
+        return self.timestamp.nbytes + self.values.nbytes
+
+    def append(self, timestamp, bar):
+        slot = self.count % self.capacity
+        for i in (slot, slot + self.capacity):
+            self.timestamp[i] = timestamp
+            self.values[:, i] = [bar[field] for field in FIELDS]
+        self.count += 1
+
+    def extend(self, bars):
+        # Bars as arrays (timestamp + FIELDS); only the newest `capacity` fit
+        timestamps = np.asarray(bars["timestamp"])[-self.capacity:]
+        n = len(timestamps)
+        if n == 0:
+            return 0
+        slots = (self.count + np.arange(n)) % self.capacity
+        for offset in (0, self.capacity):
+            self.timestamp[slots + offset] = timestamps
+            for row, field in enumerate(FIELDS):
+                self.values[row, slots + offset] = np.asarray(bars[field])[-n:]
+        self.count += n
+        return n
+
+    def last(self, n=None):
+        size = len(self)
+        n = size if n is None else min(n, size)
+        end = self.count % self.capacity + self.capacity
+        view = {"timestamp": self.timestamp[end - n:end]}
+        for row, field in enumerate(FIELDS):
+            view[field] = self.values[row, end - n:end]
+        return view
+
+    def since(self, timestamp):
+        view = self.last()
+        start = int(np.searchsorted(view["timestamp"], timestamp, side="left"))
+        return {column: values[start:] for column, values in view.items()}
+
+    def covers(self, timestamp):
+        # True when every stored bar at or after `timestamp` is still here.
+        # Nothing is known before the oldest bar held (a ring seeded with the
+        # newest `capacity` bars of a longer store has never seen them), so
+        # only timestamps from there on count
+        if self.count == 0:
+            return False
+        return timestamp >= self.timestamp[self.count % self.capacity if self.count >= self.capacity else 0]
+
+    def last_timestamp(self):
+        if self.count == 0:
+            return None
+        return int(self.timestamp[(self.count - 1) % self.capacity])
+
+    def to_frame(self, n=None):
+        # Copies out of the ring; only for callers that really want pandas
+        view = self.last(n)
+        index = pd.DatetimeIndex(view["timestamp"].view("datetime64[ns]"), tz="UTC", name="timestamp")
+        return pd.DataFrame({field: view[field].copy() for field in FIELDS}, index=index)
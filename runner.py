@@ -0,0 +1,234 @@
+import importlib
+import io
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+import allocator
+import checkpoint
+import metrics
+from broker_state import BrokerState
+from indicators import EMA_WINDOWS, IndicatorEngine
+from market_data import (INDICATOR_CHECKPOINT, collect_symbols, load_candles, sync, update_history,
+                         update_indicators)
+
+# Strategy modules run inside one long-lived process
+STRATEGIES = [
+    "btc_strategy",
+    "eth_strategy",
+    "shib_strategy",
+    "pepe_strategy",
+    "sol_strategy"
+]
+DECIDE_TIMEOUT = 60.0  # seconds a strategy's sync and decision get before its group trades without it
+
+
+def ema_windows(modules):
+    # Every EMA window a strategy's PARAMS refers to must be tracked
+    windows = set(EMA_WINDOWS)
+    for module in modules:
+        windows.update(module.PARAMS[key] for key in ("fast", "slow", "trend", "ema") if key in module.PARAMS)
+    return tuple(sorted(windows))
+
+
+# Routes print() from each worker thread into its own buffer so the
+# concurrent strategies don't interleave their output
+class _ThreadOutput:
+    def __init__(self, stream):
+        self._stream = stream
+        self._local = threading.local()
+
+    def capture(self):
+        self._local.buffer = io.StringIO()
+
+    def release(self):
+        buffer = self._local.buffer
+        self._local.buffer = None
+        return buffer.getvalue()
+
+    def write(self, text):
+        buffer = getattr(self._local, "buffer", None)
+        return (buffer or self._stream).write(text)
+
+    def flush(self):
+        self._stream.flush()
+
+
+class StrategyRunner:
+    def __init__(self, api, names=STRATEGIES, max_workers=None, checkpoint_file=checkpoint.CHECKPOINT_FILE):
+        self.api = api
+        self.broker = BrokerState(api)
+        self.modules = [importlib.import_module(name) for name in names]
+        self.symbols = collect_symbols(self.modules)
+        self.engine = IndicatorEngine.load(INDICATOR_CHECKPOINT, ema_windows=ema_windows(self.modules))
+        self.history = {}  # symbol -> BarRing of recent minute bars
+        self.decisions = {}  # strategy -> {"candle": timestamp decided on, "action": "buy"/"sell"/None
+                             # placed, or per account {label: action} under fanout.py}
+        self.executor = ThreadPoolExecutor(max_workers=max_workers or len(self.modules))
+        self._output = None
+        self._output_lock = threading.Lock()
+        self._state_lock = threading.RLock()  # engine, rings and checkpoint
+        self._broker_lock = threading.Lock()  # one group's snapshot, sizing and orders at a time
+        self._symbol_locks = {symbol: threading.Lock() for symbol in self.symbols}
+        self._running = {}  # strategy -> its sync and decision under run_group, until it ends
+        self.checkpoint_file = checkpoint_file
+        if checkpoint_file:
+            state = checkpoint.load(checkpoint_file)
+            if state is not None:
+                checkpoint.restore(self, state)
+                behind = (time.time_ns() - max(filter(None, state["last_bar"].values()), default=time.time_ns())) / 60e9
+                print(f"♻️ Restored checkpoint from {time.time() - state['saved_at']:.0f}s ago: "
+                      f"{len(self.history)} symbol(s), {len(self.decisions)} decision(s), ~{behind:.0f} min of bars to fetch")
+
+    def _decide_one(self, module, candles):
+        self._output.capture()
+        start = time.perf_counter()
+        signal = None
+        try:
+            with metrics.labels(strategy=module.STRATEGY, symbol=module.SYMBOL), metrics.span("decide"):
+                signal = module.decide(candles[module.SYMBOL])
+        except Exception as e:
+            print(f"❌ {module.__name__} failed: {e}")
+        elapsed = time.perf_counter() - start
+        return signal, self._output.release(), elapsed
+
+    def modules_for(self, symbol):
+        return [module for module in self.modules if module.SYMBOL == symbol]
+
+    def capture_output(self):
+        # Installs the per-thread print() buffers once; see _ThreadOutput
+        with self._output_lock:
+            if not isinstance(sys.stdout, _ThreadOutput):
+                sys.stdout = _ThreadOutput(sys.stdout)
+            self._output = sys.stdout
+        return self._output
+
+    def undecided(self, modules, candles):
+        # A strategy decides once per candle, also across restarts
+        pending = []
+        for module in modules:
+            decided = self.decisions.get(module.STRATEGY)
+            latest = candles[module.SYMBOL][-1]["timestamp"] if candles[module.SYMBOL] else None
+            if decided is not None and latest is not None and decided["candle"] == latest:
+                action = decided["action"]
+                if isinstance(action, dict):
+                    action = ", ".join(f"{label}: {side or 'no trade'}" for label, side in action.items())
+                print(f"\n⏭️ Skipped: {module.__name__} already decided on this candle ({action or 'no trade'})")
+            else:
+                pending.append(module)
+        return pending
+
+    def run_modules(self, modules, candles):
+        # Every strategy decides on its own thread; their trades are then
+        # sized together by allocator.py and go out as one batch, so none is
+        # sized off cash another one has already spent
+        self.capture_output()
+        pending = self.undecided(modules, candles)
+        futures = [(m, self.executor.submit(self._decide_one, m, candles)) for m in pending]
+        signals = {}
+        for module, future in futures:
+            signals[module], output, elapsed = future.result()
+            print(f"\n🌀 Ran: {module.__name__} ({elapsed:.2f}s)")
+            print(output)
+        return self.execute(signals, candles)
+
+    def execute(self, signals, candles):
+        # Sizes and places the signals' trades together; records what each
+        # strategy decided on its latest candle
+        intents = [allocator.strategy_intent(module, signal, candles[module.SYMBOL])
+                   for module, signal in signals.items() if signal]
+        actions = {}
+        if intents:
+            # Groups on other cadences may be placing orders too: each takes a
+            # fresh snapshot and sizes against it only once the last has placed
+            # its orders, so neither clears the other's snapshot nor spends its cash
+            try:
+                with self._broker_lock, metrics.span("execute"):
+                    self.broker.begin_cycle()
+                    actions = allocator.placed(allocator.execute(self.broker, intents))
+            except Exception as e:
+                print(f"❌ Orders failed: {e}")
+        for module in signals:
+            if candles[module.SYMBOL]:
+                self.decisions[module.STRATEGY] = {"candle": candles[module.SYMBOL][-1]["timestamp"],
+                                                   "action": actions.get(module.STRATEGY)}
+        return actions
+
+    def run_cycle(self):
+        start = time.perf_counter()
+        with metrics.span("cycle"):
+            self.run_modules(self.modules, self.update())
+        self.save_checkpoint()
+        print(f"🗃️ Broker cache: {self.broker.stats()}")
+        return time.perf_counter() - start
+
+    def update(self):
+        # Every symbol synced and its indicators brought up to date; returns
+        # the closed candles of each
+        with self._state_lock:
+            return load_candles(self.api, self.symbols, self.engine, history=self.history)
+
+    def _sync_and_decide(self, module):
+        # One strategy's symbol synced and updated, then its decision; returns
+        # (candles, signal, pending, output, elapsed), pending False when it
+        # already decided on this candle or could not get it
+        self._output.capture()
+        start = time.perf_counter()
+        symbol = module.SYMBOL
+        candles, signal, pending = {symbol: []}, None, False
+        try:
+            with self._symbol_locks[symbol]:
+                sync(self.api, [symbol])
+                with self._state_lock:
+                    update_history(self.history, [symbol])
+                    update_indicators(self.engine, [symbol], history=self.history)
+                    candles = {symbol: self.engine.tail(symbol)}
+            pending = bool(self.undecided([module], candles))
+            if pending:
+                with metrics.labels(strategy=module.STRATEGY, symbol=symbol), metrics.span("decide"):
+                    signal = module.decide(candles[symbol])
+        except Exception as e:
+            print(f"❌ {module.__name__} failed: {e}")
+        return candles, signal, pending, self._output.release(), time.perf_counter() - start
+
+    def run_group(self, modules, timeout=DECIDE_TIMEOUT):
+        # Strategies on one cadence (scheduler.py): each syncs only its own
+        # symbol and decides on its own thread, so a slow fetch for one coin
+        # never holds up another. Whatever is ready within the timeout is
+        # sized together; a strategy still fetching sits this cycle out and
+        # decides on a later one. Strategies sharing a symbol take turns on it
+        self.capture_output()
+        futures = {}
+        for module in modules:
+            running = self._running.get(module.STRATEGY)
+            if running is not None and not running.done():
+                print(f"\n⏭️ Skipped: {module.__name__} is still on its previous run")
+                continue
+            futures[module] = self._running[module.STRATEGY] = self.executor.submit(self._sync_and_decide, module)
+        wait(futures.values(), timeout=timeout)
+        signals, candles = {}, {}
+        for module, future in futures.items():
+            if not future.done():
+                print(f"\n⌛ {module.__name__} not ready after {timeout:.0f}s; trading without it this cycle")
+                continue
+            ready, signal, pending, output, elapsed = future.result()
+            print(f"\n🌀 Ran: {module.__name__} ({elapsed:.2f}s)")
+            print(output)
+            if pending:
+                signals[module] = signal
+                candles.update(ready)
+        return self.execute(signals, candles)
+
+    def save_checkpoint(self):
+        if self.checkpoint_file:
+            with self._state_lock, metrics.span("checkpoint"):
+                checkpoint.save(self, self.checkpoint_file)
+
+    def save_state(self):
+        with self._state_lock:
+            self.engine.save(INDICATOR_CHECKPOINT)
+            self.save_checkpoint()
+
+    def close(self):
+        self.executor.shutdown(wait=True)
+        self.save_checkpoint()
@@ -0,0 +1,360 @@
+import argparse
+import contextlib
+import importlib
+import io
+import ipaddress
+import multiprocessing
+import os
+import queue
+import secrets
+import socket
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing.managers import BaseManager
+import numpy as np
+import pandas as pd
+import panel
+from bar_store import BarStore
+from runner import STRATEGIES
+
+MAX_WORKERS = os.cpu_count() or 1
+SHARDS_PER_WORKER = 4  # smaller shards even out slow ones
+MAX_SHARD = 100  # symbols per shard: at most one multi-symbol bars request (market_data.BATCH_SIZE)
+QUEUE_PORT = 50_505
+AUTHKEY = os.getenv("SCANNER_AUTHKEY")  # shared by the coordinator and its nodes
+SHARD_TIMEOUT = 120  # seconds to wait for a shard before handing it out again
+SCAN_STRATEGY = "scanner"  # journal label for orders placed from scan hits
+SCAN_NOTIONAL = 10  # fixed dollars per buy
+BENCH_WORKERS = (1, 2, 4, 8)
+LATENCY = 0.05  # seconds per fake API response in the benchmark
+
+# Splits the tradable universe into shards and evaluates every strategy's
+# rule over each shard in its own process (panel.scan, one vectorized pass
+# per rule). Shards go to a local process pool, or, with --serve, onto a
+# task queue that `scanner.py --connect HOST` nodes on other machines pull
+# from. Workers sync their shard's minute bars, scan, and send back only the
+# hits; the coordinator merges them into one signal per symbol and side.
+
+
+def tradable_universe(api):
+    return sorted(asset.symbol for asset in api.list_assets(status="active", asset_class="crypto")
+                  if asset.tradable)
+
+
+def shards(symbols, workers):
+    # Every worker gets shards even for a small universe; each shard's
+    # symbols still go out in one multi-symbol request
+    count = max(1, min(len(symbols), max(workers * SHARDS_PER_WORKER, -(-len(symbols) // MAX_SHARD))))
+    return [list(shard) for shard in np.array_split(np.array(symbols, dtype=object), count) if len(shard)]
+
+
+# === WORKER ===
+
+def scan_shard(task):
+    # task: (cycle, shard index, symbols, strategy module names, now in ns,
+    # whether to sync bars first, bar store root)
+    cycle, index, symbols, strategies, now, sync_bars, root = task
+    start = time.perf_counter()
+    store = BarStore(root)
+    new_bars = 0
+    if sync_bars:
+        from client import get_api
+        from market_data import sync
+        with contextlib.redirect_stdout(io.StringIO()):
+            new_bars = sync(get_api(), symbols, store=store)
+    modules = [importlib.import_module(name) for name in strategies]
+    candles = panel.load_panel(symbols, store, now=pd.Timestamp(now, tz="UTC"))
+    hits = panel.scan({module: symbols for module in modules}, candles)
+    stats = {"symbols": len(symbols), "new_bars": new_bars, "seconds": time.perf_counter() - start,
+             "node": socket.gethostname(), "pid": os.getpid()}
+    return cycle, index, hits, stats
+
+
+# === QUEUES (multi-host) ===
+
+# The queues pickle what goes through them, so whoever holds the authkey can
+# run code on the coordinator and its nodes: serving beyond this machine
+# needs SCANNER_AUTHKEY set, and a loopback coordinator without it makes up
+# a random key and prints it for its nodes.
+
+class QueueManager(BaseManager):
+    pass
+
+
+def _loopback(host):
+    try:
+        return ipaddress.ip_address(socket.gethostbyname(host)).is_loopback
+    except (OSError, ValueError):
+        return False
+
+
+def serve_authkey(address, authkey=AUTHKEY):
+    if authkey:
+        return authkey.encode() if isinstance(authkey, str) else authkey
+    if not _loopback(address[0]):
+        raise ValueError(f"set SCANNER_AUTHKEY to serve on {address[0]}:{address[1]} "
+                         "(anyone who can reach the queues with the key can run code here)")
+    authkey = secrets.token_hex(16)
+    print(f"🔑 No SCANNER_AUTHKEY set; nodes connect with SCANNER_AUTHKEY={authkey}")
+    return authkey.encode()
+
+
+def serve_queues(address, authkey=AUTHKEY):
+    # Hosts the task and result queues on a thread of this process
+    authkey = serve_authkey(address, authkey)
+    tasks, results = queue.Queue(), queue.Queue()
+    QueueManager.register("tasks", callable=lambda: tasks)
+    QueueManager.register("results", callable=lambda: results)
+    server = QueueManager(address=address, authkey=authkey).get_server()
+    threading.Thread(target=server.serve_forever, name="scanner-queues", daemon=True).start()
+    return tasks, results
+
+
+def connect_queues(address, authkey=AUTHKEY):
+    if not authkey:
+        raise ValueError("set SCANNER_AUTHKEY to the coordinator's key")
+    authkey = authkey.encode() if isinstance(authkey, str) else authkey
+    QueueManager.register("tasks")
+    QueueManager.register("results")
+    manager = QueueManager(address=address, authkey=authkey)
+    manager.connect()
+    return manager.tasks(), manager.results()
+
+
+def _node_worker(address, authkey):
+    tasks, results = connect_queues(address, authkey)
+    while True:
+        try:
+            task = tasks.get()
+        except (EOFError, ConnectionError):
+            return  # coordinator went away
+        try:
+            results.put(scan_shard(task))
+        except Exception as e:
+            print(f"❌ Shard {task[1]} failed on {socket.gethostname()}: {e}", flush=True)
+
+
+def run_node(address, workers=MAX_WORKERS, authkey=AUTHKEY):
+    # One process per worker, each pulling shards until the coordinator goes away
+    print(f"🛰️ Scanner node {socket.gethostname()}: {workers} worker(s) on {address[0]}:{address[1]}")
+    processes = [multiprocessing.Process(target=_node_worker, args=(address, authkey), daemon=True)
+                 for _ in range(workers)]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join()
+
+
+# === COORDINATOR ===
+
+def merge_hits(hits):
+    # One signal per symbol and side, listing every strategy that fired;
+    # when strategies disagree on a symbol the side more of them back wins,
+    # and a tie drops it
+    merged = {}
+    for hit in hits:
+        signal = merged.setdefault((hit["symbol"], hit["side"]), dict(hit, strategies=[]))
+        if hit["strategy"] not in signal["strategies"]:
+            signal["strategies"].append(hit["strategy"])
+        signal["timestamp"] = max(signal["timestamp"], hit["timestamp"])
+    signals, conflicts = [], 0
+    for (symbol, side), signal in merged.items():
+        other = merged.get((symbol, "sell" if side == "buy" else "buy"))
+        if other is not None:
+            conflicts += side == "buy"
+            if len(other["strategies"]) >= len(signal["strategies"]):
+                continue
+        del signal["strategy"]
+        signals.append(signal)
+    return signals, conflicts
+
+
+class Scanner:
+    def __init__(self, strategies=STRATEGIES, workers=MAX_WORKERS, root="data/bars", sync_bars=True,
+                 serve=None, authkey=AUTHKEY):
+        self.strategies = tuple(strategies)
+        self.workers = workers
+        self.root = root
+        self.sync_bars = sync_bars
+        self.cycle = 0
+        self.seen = {}  # (symbol, side) -> latest candle already handed to order handling
+        if serve:
+            self.pool = None
+            self.tasks, self.results = serve_queues(serve, authkey)
+        else:
+            self.pool = ProcessPoolExecutor(max_workers=workers)
+
+    def _gather(self, tasks):
+        if self.pool is not None:
+            return list(self.pool.map(scan_shard, tasks))
+        # Shards not back within SHARD_TIMEOUT are queued once more; a
+        # shard answered twice counts once
+        done = {}
+        for task in tasks:
+            self.tasks.put(task)
+        for attempt in range(2):
+            deadline = time.monotonic() + SHARD_TIMEOUT
+            while len(done) < len(tasks) and time.monotonic() < deadline:
+                try:
+                    cycle, index, hits, stats = self.results.get(timeout=max(0.0, deadline - time.monotonic()))
+                except queue.Empty:
+                    break
+                if cycle == self.cycle:
+                    done.setdefault(index, (cycle, index, hits, stats))
+            missing = [task for task in tasks if task[1] not in done]
+            if not missing:
+                break
+            if attempt == 0:
+                print(f"⚠️ {len(missing)} shard(s) not back after {SHARD_TIMEOUT}s; handing them out again")
+                for task in missing:
+                    self.tasks.put(task)
+            else:
+                print(f"❌ {len(missing)} shard(s) lost; their symbols were not scanned this cycle")
+        return [done[index] for index in sorted(done)]
+
+    def scan(self, symbols, now=None):
+        self.cycle += 1
+        now = pd.Timestamp(now or pd.Timestamp.now(tz="UTC")).value
+        parts = shards(list(dict.fromkeys(symbols)), self.workers)
+        tasks = [(self.cycle, i, part, self.strategies, now, self.sync_bars, self.root)
+                 for i, part in enumerate(parts)]
+        start = time.perf_counter()
+        results = self._gather(tasks)
+        elapsed = time.perf_counter() - start
+
+        signals, conflicts = merge_hits([hit for _, _, hits, _ in results for hit in hits])
+        fresh = [s for s in signals if s["timestamp"] > self.seen.get((s["symbol"], s["side"]), -1)]
+        self.seen.update(((s["symbol"], s["side"]), s["timestamp"]) for s in fresh)
+        scanned = sum(stats["symbols"] for _, _, _, stats in results)
+        nodes = len({(stats["node"], stats["pid"]) for _, _, _, stats in results})
+        print(f"🔭 Scanned {scanned} symbol(s) in {len(results)} shard(s) on {nodes} worker(s) in {elapsed:.2f}s "
+              f"({scanned / elapsed:,.0f} symbols/s): {len(fresh)} new signal(s)"
+              + (f" ({conflicts} symbol(s) with disagreeing strategies)" if conflicts else ""))
+        return fresh
+
+    def close(self):
+        if self.pool is not None:
+            self.pool.shutdown()
+
+
+# === ORDER HANDLING ===
+
+def execute(broker, signals, notional=SCAN_NOTIONAL, reserved=()):
+    # Buys a fixed notional when flat, sells the whole position when held,
+    # all sized together by allocator.py; symbols a strategy module already
+    # trades are left to that strategy
+    import allocator
+    broker.begin_cycle()
+    intents = [allocator.intent(SCAN_STRATEGY, signal["symbol"], signal["side"], signal["close"], notional=notional)
+               for signal in signals if signal["symbol"] not in reserved]
+    sized = allocator.execute(broker, intents, verbose=False)
+    for item, signal in zip(sized, (s for s in signals if s["symbol"] not in reserved)):
+        result = item.get("result")
+        if result is None:
+            continue
+        if result.ok:
+            print(f"✅ {signal['side'].upper()} {signal['symbol']} ({', '.join(signal['strategies'])})")
+        else:
+            print(f"❌ {signal['side'].upper()} {signal['symbol']} failed: {result.error}")
+    return sum(1 for item in sized if item["order"] is not None)
+
+
+def print_signals(signals):
+    for signal in sorted(signals, key=lambda s: (s["side"], s["symbol"])):
+        when = pd.Timestamp(signal["timestamp"], tz="UTC")
+        icon = "🟢" if signal["side"] == "buy" else "🔴"
+        print(f"{icon} {signal['side'].upper():<4} {signal['symbol']:<12} close {signal['close']:<12.6g} "
+              f"{when:%Y-%m-%d %H:%M}  {', '.join(signal['strategies'])}")
+
+
+# === BENCHMARK ===
+
+def benchmark(counts=BENCH_WORKERS, assets=200, latency=LATENCY):
+    # Against fake_alpaca.py: a cold scan (every symbol's first sync) and a
+    # warm one of `assets` pairs at 1..N workers, each on a scratch bar store
+    import tempfile
+    import fake_alpaca
+    server = fake_alpaca.serve(latency=latency, assets=assets)
+    url = f"http://127.0.0.1:{server.server_port}"
+    os.environ.update({"APCA_API_KEY_ID": "bench", "APCA_API_SECRET_KEY": "bench",
+                       "APCA_API_BASE_URL": url, "APCA_API_DATA_URL": url})
+    symbols = server.fake.symbols[:assets]
+    print(f"🔭 {len(symbols)} symbol(s), {latency * 1000:.0f} ms per API response, {os.cpu_count()} CPU(s)")
+    first = None
+    for workers in counts:
+        with tempfile.TemporaryDirectory(prefix="scanner-") as root:
+            scanner = Scanner(workers=workers, root=root)
+            timings = []
+            with contextlib.redirect_stdout(io.StringIO()):
+                for _ in range(2):
+                    start = time.perf_counter()
+                    scanner.scan(symbols)
+                    timings.append(time.perf_counter() - start)
+            scanner.close()
+        cold, warm = timings
+        first = first or warm
+        print(f"⚙️ {workers} worker(s), {len(shards(symbols, workers))} shard(s): "
+              f"cold {cold:.2f}s ({len(symbols) / cold:,.0f} symbols/s), "
+              f"warm {warm:.2f}s ({len(symbols) / warm:,.0f} symbols/s, {first / warm:.2f}x)")
+    server.shutdown()
+
+
+def _address(value):
+    host, _, port = value.rpartition(":")
+    return (host or value, int(port)) if port.isdigit() else (value, QUEUE_PORT)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Scan every tradable crypto pair with the strategies' rules")
+    parser.add_argument("--symbols", nargs="*", help="symbols to scan (default: every tradable crypto pair)")
+    parser.add_argument("--workers", type=int, default=MAX_WORKERS, help="worker processes (per node with --connect)")
+    parser.add_argument("--no-sync", action="store_true", help="scan the bar store as it is")
+    parser.add_argument("--trade", action="store_true", help="place orders for new signals (default: print them)")
+    parser.add_argument("--every", type=float, help="keep running, scanning every N seconds")
+    parser.add_argument("--serve", metavar="HOST:PORT", help="hand shards to --connect nodes instead of a local pool")
+    parser.add_argument("--connect", metavar="HOST:PORT", help="run as a worker node for a --serve coordinator")
+    parser.add_argument("--bench", action="store_true", help="time scans at 1, 2, 4 and 8 workers against a local fake API")
+    args = parser.parse_args()
+
+    if args.bench:
+        benchmark()
+        return
+
+    if args.connect:
+        if not AUTHKEY:
+            parser.error("set SCANNER_AUTHKEY to the key the --serve coordinator uses")
+        run_node(_address(args.connect), args.workers)
+        return
+    if args.serve and not AUTHKEY and not _loopback(_address(args.serve)[0]):
+        parser.error(f"set SCANNER_AUTHKEY to serve on {args.serve}: anyone who can reach the queues "
+                     "with the key can run code on this machine")
+
+    from client import get_api
+    from market_data import collect_symbols
+    api = get_api()
+    symbols = args.symbols or tradable_universe(api)
+    scanner = Scanner(workers=args.workers, sync_bars=not args.no_sync,
+                      serve=_address(args.serve) if args.serve else None)
+    broker = None
+    if args.trade:
+        from broker_state import BrokerState
+        broker = BrokerState(api)
+        reserved = set(collect_symbols([importlib.import_module(name) for name in STRATEGIES]))
+    else:
+        print("🧪 Dry run: signals are printed, not traded (pass --trade to place orders)")
+    try:
+        while True:
+            signals = scanner.scan(symbols)
+            print_signals(signals)
+            if broker is not None and signals:
+                execute(broker, signals, reserved=reserved)
+            if not args.every:
+                return
+            time.sleep(args.every)
+    finally:
+        scanner.close()
+
+
+if __name__ == "__main__":
+    main()
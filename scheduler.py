@@ -0,0 +1,128 @@
+import math
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+import pandas as pd
+import metrics
+
+SETTLE = 3.0  # seconds after a boundary before firing, so the bar that just closed is published
+
+# Fires each job on the wall-clock boundaries of its own cadence (every
+# 15 minutes means :00/:15/:30/:45 UTC, the same buckets resample() makes),
+# each on its own thread, so a slow job never holds up another. A job is
+# expected to finish within its budget (its cadence by default). The budget
+# is only monitored, never enforced: Python can't stop a thread, so a job
+# past it is reported and keeps running, and a boundary that finds it still
+# running is skipped (and reported) rather than queued. Recorded per job in
+# metrics.py (metrics.job): lateness (start vs boundary + settle), deadline
+# misses (time over budget) and overruns (skipped boundaries).
+
+
+def period(cadence):
+    # Seconds between a cadence's boundaries ("5min", "1h"); ValueError
+    # unless it is a positive duration
+    try:
+        seconds = pd.Timedelta(cadence).total_seconds()
+    except (TypeError, ValueError):
+        seconds = None
+    if not seconds or not seconds > 0:
+        raise ValueError(f"not a cadence: {cadence!r} (e.g. 5min, 1h)")
+    return seconds
+
+
+class Job:
+    def __init__(self, name, cadence, fn, budget=None):
+        self.name = name
+        self.cadence = cadence
+        self.period = period(cadence)
+        self.fn = fn
+        self.budget = budget or self.period  # seconds a run is expected to take
+        self.next_boundary = None
+        self.future = None
+        self.boundary = None  # boundary of the current (or last) run
+        self.deadline = None  # boundary + budget of the current run
+        self.flagged = False  # over-budget warning already printed for the current run
+        self.runs = 0
+        self.misses = 0
+
+
+class Scheduler:
+    def __init__(self, settle=SETTLE):
+        self.settle = settle
+        self.jobs = []
+        self.executor = None
+        self._stop = threading.Event()
+
+    def add(self, name, cadence, fn, budget=None):
+        job = Job(name, cadence, fn, budget)
+        self.jobs.append(job)
+        return job
+
+    @staticmethod
+    def next_boundary(period, now):
+        return (math.floor(now / period) + 1) * period
+
+    def _run(self, job, boundary):
+        start = time.time()
+        metrics.job("lateness", job.name, start - boundary - self.settle)
+        try:
+            job.fn()
+        except Exception as e:
+            print(f"❌ Job {job.name} failed: {e}")
+        finished = time.time()
+        job.runs += 1
+        if finished > job.deadline:
+            job.misses += 1
+            metrics.job("deadline_miss", job.name, finished - job.deadline)
+            print(f"⌛ Job {job.name} finished {finished - job.deadline:.1f}s over its budget")
+
+    def _warn(self, job):
+        # Still running at its deadline; the miss is recorded once it ends
+        # (a job that never ends shows up as overruns)
+        job.flagged = True
+        print(f"⏰ Job {job.name} has run past its {job.budget:.0f}s budget; it keeps running and "
+              f"its next boundaries are skipped until it ends")
+
+    def _fire(self, job, boundary):
+        if job.future is not None and not job.future.done():
+            metrics.job("overrun", job.name, time.time() - job.boundary)
+            print(f"⏭️ Job {job.name} still running; skipping its "
+                  f"{pd.Timestamp(boundary, unit='s', tz='UTC'):%H:%M:%S} run")
+            return
+        job.boundary = boundary
+        job.deadline = boundary + job.budget
+        job.flagged = False
+        job.future = self.executor.submit(self._run, job, boundary)
+
+    def run(self, catch_up=False):
+        # Blocks until stop(). Every job first runs at its next boundary, or
+        # with catch_up, at once for the boundary just passed
+        now = time.time()
+        for job in self.jobs:
+            job.next_boundary = self.next_boundary(job.period, now) - (job.period if catch_up else 0)
+        # One thread per job: a job never waits for a free worker
+        self.executor = ThreadPoolExecutor(max_workers=max(1, len(self.jobs)), thread_name_prefix="job")
+        try:
+            while not self._stop.is_set():
+                now = time.time()
+                for job in self.jobs:
+                    if now >= job.next_boundary + self.settle:
+                        self._fire(job, job.next_boundary)
+                        job.next_boundary = self.next_boundary(job.period, now)
+                    elif job.future is not None and not job.future.done() and not job.flagged \
+                            and now > job.deadline:
+                        self._warn(job)
+                wake = min([job.next_boundary + self.settle for job in self.jobs]
+                           + [job.deadline for job in self.jobs
+                              if job.future is not None and not job.future.done() and not job.flagged])
+                self._stop.wait(max(0.0, wake - time.time()))
+        finally:
+            self.executor.shutdown(wait=False)
+
+    def stop(self):
+        self._stop.set()
+
+    def describe(self):
+        for job in self.jobs:
+            first = pd.Timestamp(self.next_boundary(job.period, time.time()) + self.settle, unit="s", tz="UTC")
+            print(f"• {job.name:<20} every {job.cadence:<6} budget {job.budget:.0f}s, first at {first:%H:%M:%S} UTC")
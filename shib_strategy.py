@@ -1,118 +1,70 @@
-import os
-import pandas as pd
-from dotenv import load_dotenv
-from alpaca_trade_api.rest import REST, TimeFrame
-from log_trade import log_trade
-import ta
-
-load_dotenv()
-
-api = REST(
-    os.getenv("APCA_API_KEY_ID"),
-    os.getenv("APCA_API_SECRET_KEY"),
-    os.getenv("APCA_API_BASE_URL")
-)
-
-# === FETCH 15-MINUTE SHIB DATA ===
-print("\n\U0001F4CA Fetching 15-minute historical data for SHIB/USD...")
-bars = api.get_crypto_bars("SHIB/USD", TimeFrame.Minute, limit=1000).df
-shib = bars.copy()
-
-# Resample to 15-minute candles
-shib = shib.resample("15min").agg({
-    "open": "first",
-    "high": "max",
-    "low": "min",
-    "close": "last",
-    "volume": "sum"
-}).dropna()
-
-# === CALCULATE INDICATORS ===
-shib["EMA5"] = ta.trend.ema_indicator(shib["close"], window=5)
-shib["EMA20"] = ta.trend.ema_indicator(shib["close"], window=20)
-shib["RSI"] = ta.momentum.RSIIndicator(shib["close"], window=14).rsi()
-
-# Pull latest data point
-latest = shib.iloc[-1]
-
-print("\n\U0001F4CC Latest SHIB Summary:")
-print(f"• Close Price: {latest['close']}")
-print(f"• EMA5:        {latest['EMA5']}")
-print(f"• EMA20:       {latest['EMA20']}")
-print(f"• RSI:         {latest['RSI']:.2f}")
-
-# === CALCULATE AVAILABLE FUNDS ===
-account = api.get_account()
-balance = float(account.cash)
-allocation_pct = 0.05  # 5%
-notional = round(balance * allocation_pct, 2)
-
-print(f"\n\U0001F4B3 Account Cash: ${balance:.2f}")
-print(f"✅ Allocating 5% (${notional}) for trade")
-
-MIN_ORDER = 1.00
-
-# === BUY LOGIC ===
-buy_condition = latest["EMA5"] > latest["EMA20"] and latest["RSI"] < 35
-
-if buy_condition:
-    if notional >= MIN_ORDER:
+import sys
+import allocator
+
+SYMBOL = "SHIB/USD"
+STRATEGY = "shib_daytrade"
+
+# Rule parameters, shared with backtest.py
+RULE = "ema_rsi"
+PARAMS = {
+    "fast": 5,
+    "slow": 20,
+    "rsi_buy_below": 35,
+    "rsi_sell_above": 70,
+    "sell_needs_both": False,  # EMA cross-down OR overbought
+    "allocation_pct": 0.05,
+}
+
+
+def decide(candles):
+    # The rule on the latest closed candle, the same for every account:
+    # "buy", "sell" or None
+    # === LATEST 15-MINUTE SHIB CANDLE ===
+    if not candles:
+        print(f"⚠️ No closed {SYMBOL} candles yet. Skipping.")
+        return None
+
+    # Pull latest data point (indicators are kept up to date by the engine)
+    latest = candles[-1]
+    fast, slow = f"EMA{PARAMS['fast']}", f"EMA{PARAMS['slow']}"
+
+    print("\n\U0001F4CC Latest SHIB Summary:")
+    print(f"• Close Price: {latest['close']}")
+    print(f"• {fast + ':':<12} {latest[fast]}")
+    print(f"• {slow + ':':<12} {latest[slow]}")
+    print(f"• RSI:         {latest['RSI']:.2f}")
+
+    # === BUY LOGIC ===
+    if latest[fast] > latest[slow] and latest["RSI"] < PARAMS["rsi_buy_below"]:
         print("\n\U0001F7E2 BUY SIGNAL for SHIB/USD!")
-        print("Reason: EMA5 > EMA20 and RSI < 35 (oversold with bullish crossover)")
-
-        try:
-            positions = api.list_positions()
-            shib_position = next((p for p in positions if p.symbol == "SHIB/USD"), None)
-
-            if shib_position:
-                print("ℹ️ SHIB already held. Skipping duplicate buy.")
-            else:
-                print(f"\u2192 Placing market buy order for ${notional} of SHIB...")
-                api.submit_order(
-                    symbol="SHIB/USD",
-                    notional=notional,
-                    side="buy",
-                    type="market",
-                    time_in_force="gtc"
-                )
-                print(f"✅ Buy order submitted: ${notional} worth of SHIB purchased.")
-                log_trade("SHIB/USD", "buy", "shib_daytrade", latest["close"], notional)
-        except Exception as e:
-            print("❌ Failed to submit buy order:", e)
-    else:
-        print(f"\n🚫 Trade skipped: ${notional} is below minimum trade amount of ${MIN_ORDER}.")
+        print(f"Reason: {fast} > {slow} and RSI < {PARAMS['rsi_buy_below']} (oversold with bullish crossover)")
+        return "buy"
 
-# === SELL LOGIC ===
-elif latest["EMA5"] < latest["EMA20"] or latest["RSI"] > 70:
-    print("\n\U0001F534 SELL SIGNAL for SHIB/USD!")
-    print("Reason: EMA5 < EMA20 or RSI > 70 (overbought or bearish crossover).")
-    print("→ Checking SHIB position before selling...")
+    # === SELL LOGIC ===
+    if latest[fast] < latest[slow] or latest["RSI"] > PARAMS["rsi_sell_above"]:
+        print("\n\U0001F534 SELL SIGNAL for SHIB/USD!")
+        print(f"Reason: {fast} < {slow} or RSI > {PARAMS['rsi_sell_above']} (overbought or bearish crossover).")
+        return "sell"
 
-    try:
-        positions = api.list_positions()
-        shib_position = next((p for p in positions if p.symbol == "SHIB/USD"), None)
+    # === NO SIGNAL ===
+    print("\n\U0001F575️ No SHIB trading signal at this time.")
+    print("Waiting for EMA crossover and volume confirmation or reversal.")
+    return None
 
-        if shib_position:
-            qty = shib_position.qty
-            print(f"\u2192 Selling SHIB position: {qty} SHIB at market price.")
 
-            api.submit_order(
-                symbol="SHIB/USD",
-                qty=qty,
-                side="sell",
-                type="market",
-                time_in_force="gtc"
-            )
-            print(f"✅ Sell order submitted: Sold {qty} SHIB.")
-            log_trade("SHIB/USD", "sell", "shib_daytrade", latest["close"], qty)
-        else:
-            print("ℹ️ No SHIB currently held.")
-    except Exception as e:
-        print("❌ Failed to submit sell order:", e)
+def run(broker, candles):
+    # On its own (`python shib_strategy.py`); the runner sizes every strategy's
+    # trade together instead
+    action = allocator.trade(broker, sys.modules[__name__], decide(candles), candles)
+    print("\n✅ SHIB strategy check complete.")
+    return action
 
-# === NO SIGNAL ===
-else:
-    print("\n\U0001F575️ No SHIB trading signal at this time.")
-    print("Waiting for EMA crossover and volume confirmation or reversal.")
 
-print("\n✅ SHIB strategy check complete.")
+if __name__ == "__main__":
+    from client import get_api
+    from indicators import IndicatorEngine
+    from market_data import INDICATOR_CHECKPOINT, load_candles
+    from broker_state import BrokerState
+    api = get_api()
+    engine = IndicatorEngine.load(INDICATOR_CHECKPOINT)
+    run(BrokerState(api), load_candles(api, [SYMBOL], engine)[SYMBOL])
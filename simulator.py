@@ -0,0 +1,330 @@
+import argparse
+import contextlib
+import hashlib
+import importlib
+import io
+import os
+import time
+import numpy as np
+import pandas as pd
+import allocator
+from bar_store import COLUMNS, BarStore
+from broker_state import BrokerState
+from indicators import IndicatorEngine
+from journal import Journal, use_journal
+from market_data import CANDLE_FREQ
+from order_gateway import OrderGateway
+from resample import period_ns, resample
+from runner import STRATEGIES, ema_windows
+
+INITIAL_CASH = 100_000.0
+FEE_RATE = 0.0025  # Alpaca crypto taker fee
+SLIPPAGE_BPS = 5  # half spread paid on every fill
+IMPACT = 0.1  # extra slippage per unit of the bar's volume taken (VolumeSlippage)
+WARMUP_DAYS = 2  # minute history fed to the indicators before the replayed day
+REPLAY_JOURNAL = "data/replay/journal.db"
+
+# In-memory stand-in for the Alpaca REST calls the strategies make
+# (submit_order, list_positions, get_account, get_clock), filling market
+# orders against replayed minute bars: at the open of the first bar at or
+# after the replay clock, adjusted by a slippage model, with fees from a fee
+# model taken out of cash. Nothing depends on the wall clock or on chance,
+# so the same bars and orders always give the same fills.
+
+
+class SimulatedError(Exception):
+    # Carries status_code like alpaca_trade_api's APIError, so the order
+    # gateway treats it the same way
+    def __init__(self, status_code, message):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+class Entity:
+    # Attribute access over a dict, like alpaca_trade_api's entities
+    def __init__(self, raw):
+        self._raw = raw
+
+    def __getattr__(self, key):
+        try:
+            return self._raw[key]
+        except KeyError:
+            raise AttributeError(key) from None
+
+    def __repr__(self):
+        return f"{type(self).__name__}({self._raw!r})"
+
+
+# === COST MODELS ===
+
+class FixedSlippage:
+    def __init__(self, bps=SLIPPAGE_BPS):
+        self.rate = bps / 10_000
+
+    def price(self, side, price, qty, volume):
+        return price * (1 + self.rate) if side == "buy" else price * (1 - self.rate)
+
+
+class VolumeSlippage(FixedSlippage):
+    # The fixed spread plus impact in proportion to the share of the bar's
+    # volume the order takes
+    def __init__(self, bps=SLIPPAGE_BPS, impact=IMPACT):
+        super().__init__(bps)
+        self.impact = impact
+
+    def price(self, side, price, qty, volume):
+        rate = self.rate + self.impact * min(1.0, qty / volume if volume > 0 else 1.0)
+        return price * (1 + rate) if side == "buy" else price * (1 - rate)
+
+
+class PercentFee:
+    def __init__(self, rate=FEE_RATE, minimum=0.0):
+        self.rate = rate
+        self.minimum = minimum
+
+    def __call__(self, notional):
+        return max(self.minimum, notional * self.rate)
+
+
+# === BROKER ===
+
+class SimulatedBroker:
+    def __init__(self, minutes, cash=INITIAL_CASH, slippage=None, fee=None):
+        self.minutes = minutes  # symbol -> minute bar arrays (bar store layout)
+        self.cash = float(cash)
+        self.slippage = slippage or FixedSlippage()
+        self.fee = fee or PercentFee()
+        self.now = None  # replay clock, ns since epoch (UTC)
+        self.positions = {}  # "BTCUSD" -> {"symbol", "qty", "cost"}
+        self.orders = []
+        self.by_client_id = {}
+        self.fills = []  # (timestamp, symbol, side, qty, price, fee)
+
+    def advance(self, now):
+        self.now = int(pd.Timestamp(now).value)
+
+    def _iso(self, ns=None):
+        return pd.Timestamp(self.now if ns is None else ns, tz="UTC").isoformat()
+
+    def _fill_bar(self, symbol):
+        bars = self.minutes.get(symbol)
+        if bars is None or not len(bars["timestamp"]):
+            raise SimulatedError(422, f"no bars to fill {symbol} against")
+        i = int(np.searchsorted(bars["timestamp"], self.now, side="left"))
+        if i < len(bars["timestamp"]):
+            return float(bars["open"][i]), float(bars["volume"][i]), int(bars["timestamp"][i])
+        # Past the end of the data: the last close
+        return float(bars["close"][-1]), float(bars["volume"][-1]), int(bars["timestamp"][-1]) + 60_000_000_000
+
+    def mark(self, symbol):
+        # Close of the last minute finished by the replay clock
+        bars = self.minutes.get(symbol)
+        if bars is None or not len(bars["timestamp"]):
+            return None
+        i = int(np.searchsorted(bars["timestamp"], self.now, side="left")) - 1
+        return float(bars["close"][i]) if i >= 0 else float(bars["open"][0])
+
+    def equity(self):
+        return self.cash + sum(p["qty"] * (self.mark(p["symbol"]) or p["cost"] / p["qty"])
+                               for p in self.positions.values())
+
+    # === REST SURFACE ===
+
+    def submit_order(self, symbol, qty=None, notional=None, side="buy", type="market", time_in_force="gtc",
+                     client_order_id=None, **kwargs):
+        if type != "market":
+            raise SimulatedError(422, f"{type} orders are not simulated")
+        if client_order_id is not None and client_order_id in self.by_client_id:
+            raise SimulatedError(422, "client_order_id must be unique")
+        open_, volume, filled_at = self._fill_bar(symbol)
+        if notional is not None:
+            qty = float(notional) / open_
+        qty = float(qty)
+        if qty <= 0:
+            raise SimulatedError(422, "qty must be > 0")
+        price = self.slippage.price(side, open_, qty, volume)
+        key = symbol.replace("/", "")
+        held = self.positions.get(key)
+
+        if side == "buy":
+            if notional is not None:
+                qty = float(notional) / price
+            fee = self.fee(qty * price)
+            if qty * price + fee > self.cash + 1e-9:
+                raise SimulatedError(403, "insufficient balance for USD")
+            self.cash -= qty * price + fee
+            held = self.positions.setdefault(key, {"symbol": symbol, "qty": 0.0, "cost": 0.0})
+            held["qty"] += qty
+            held["cost"] += qty * price
+        else:
+            if held is None or qty > held["qty"] + 1e-12:
+                raise SimulatedError(403, f"insufficient balance for {key}")
+            fee = self.fee(qty * price)
+            self.cash += qty * price - fee
+            held["cost"] *= 1 - qty / held["qty"]
+            held["qty"] -= qty
+            if held["qty"] <= 1e-12:
+                del self.positions[key]
+
+        order = Entity({
+            "id": f"sim-{len(self.orders) + 1:06d}", "client_order_id": client_order_id or f"sim-{len(self.orders) + 1}",
+            "symbol": symbol, "asset_class": "crypto", "side": side, "type": type, "time_in_force": time_in_force,
+            "qty": repr(qty), "notional": notional, "filled_qty": repr(qty), "filled_avg_price": repr(price),
+            "status": "filled", "submitted_at": self._iso(), "filled_at": self._iso(filled_at),
+        })
+        self.orders.append(order)
+        self.by_client_id[order.client_order_id] = order
+        self.fills.append((filled_at, symbol, side, qty, price, fee))
+        return order
+
+    def get_order_by_client_order_id(self, client_order_id):
+        order = self.by_client_id.get(client_order_id)
+        if order is None:
+            raise SimulatedError(404, "order not found")
+        return order
+
+    def list_positions(self):
+        positions = []
+        for key, p in self.positions.items():
+            price = self.mark(p["symbol"])
+            positions.append(Entity({
+                "symbol": key, "asset_class": "crypto", "qty": repr(p["qty"]),
+                "avg_entry_price": repr(p["cost"] / p["qty"]), "current_price": repr(price),
+                "market_value": repr(price * p["qty"]), "cost_basis": repr(p["cost"]),
+                "unrealized_pl": repr(price * p["qty"] - p["cost"]),
+            }))
+        return positions
+
+    def get_account(self):
+        equity = self.equity()
+        return Entity({"id": "simulated", "status": "ACTIVE", "currency": "USD",
+                       "cash": f"{self.cash:.2f}", "buying_power": f"{self.cash:.2f}",
+                       "non_marginable_buying_power": f"{self.cash:.2f}",
+                       "equity": f"{equity:.2f}", "portfolio_value": f"{equity:.2f}"})
+
+    def get_clock(self):
+        now = self._iso()
+        return Entity({"timestamp": now, "is_open": True, "next_open": now, "next_close": now})
+
+    def digest(self):
+        # Fingerprint of every fill, for checking that a replay is repeatable
+        return hashlib.sha1(repr(self.fills).encode()).hexdigest()[:12]
+
+
+# === REPLAY ===
+
+def load_minutes(symbols, start, end, store=None, synthetic=False):
+    # [start, end) of minute bars per symbol, from the bar store or from the
+    # deterministic generator fake_alpaca.py serves
+    start, end = pd.Timestamp(start).value, pd.Timestamp(end).value
+    minutes = {}
+    for symbol in dict.fromkeys(symbols):
+        if synthetic:
+            from fake_alpaca import synthetic_minute_arrays
+            minutes[symbol] = synthetic_minute_arrays(symbol, start, end)
+            continue
+        data = (store or BarStore()).arrays(symbol, "1Min", start=pd.Timestamp(start, tz="UTC"))
+        stop = int(np.searchsorted(data["timestamp"], end, side="left"))
+        minutes[symbol] = {column: np.array(data[column][:stop], dtype=COLUMNS[column]) for column in COLUMNS}
+    return minutes
+
+
+def replay(minutes, start, end, strategies=STRATEGIES, broker=None, freq=CANDLE_FREQ, journal=None, verbose=False):
+    # Runs every strategy at each candle close in (start, end], the way the
+    # live loop does (decisions, then one allocator.py batch), against a
+    # SimulatedBroker; earlier minutes only warm up the indicators
+    modules = [importlib.import_module(name) for name in strategies]
+    broker = broker or SimulatedBroker(minutes)
+    state = BrokerState(broker, gateway=OrderGateway(broker, rate=1e9, burst=1e9, max_workers=1))
+    engine = IndicatorEngine(ema_windows=ema_windows(modules))
+    period = period_ns(freq)
+    start, end = pd.Timestamp(start).value, pd.Timestamp(end).value
+
+    candles = {symbol: resample(bars, freq) for symbol, bars in minutes.items()}
+    ends = {symbol: c["timestamp"] + period for symbol, c in candles.items()}
+    fed = {}
+    for symbol, c in candles.items():
+        fed[symbol] = int(np.searchsorted(ends[symbol], start, side="right"))
+        engine.update_candles(symbol, {column: values[:fed[symbol]] for column, values in c.items()})
+    steps = np.unique(np.concatenate([e[(e > start) & (e <= end)] for e in ends.values()] or [np.empty(0, np.int64)]))
+
+    previous = use_journal(journal or Journal(REPLAY_JOURNAL))
+    output = io.StringIO()
+    decisions = 0
+    try:
+        for close in steps.tolist():
+            broker.advance(close)
+            state.begin_cycle()
+            for symbol, c in candles.items():
+                upto = int(np.searchsorted(ends[symbol], close, side="right"))
+                if upto > fed[symbol]:
+                    engine.update_candles(symbol, {column: values[fed[symbol]:upto] for column, values in c.items()})
+                    fed[symbol] = upto
+            # As StrategyRunner.run_modules: every strategy decides, then the
+            # cycle's trades are sized together and placed as one batch
+            intents = []
+            with contextlib.redirect_stdout(output):
+                for module in modules:
+                    tail = engine.tail(module.SYMBOL)
+                    try:
+                        signal = module.decide(tail)
+                        if signal:
+                            intents.append(allocator.strategy_intent(module, signal, tail))
+                    except Exception as e:
+                        print(f"❌ {module.__name__} failed: {e}")
+                    decisions += 1
+                if intents:
+                    allocator.execute(state, intents)
+    finally:
+        use_journal(previous).close()
+        state.gateway.close()
+    if verbose:
+        print(output.getvalue())
+    return broker, len(steps), decisions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay a day of every strategy against a local fill simulator")
+    parser.add_argument("--date", help="UTC day to replay (default: yesterday)")
+    parser.add_argument("--synthetic", action="store_true", help="use generated bars instead of the bar store")
+    parser.add_argument("--cash", type=float, default=INITIAL_CASH)
+    parser.add_argument("--fee", type=float, default=FEE_RATE)
+    parser.add_argument("--slippage-bps", type=float, default=SLIPPAGE_BPS)
+    parser.add_argument("--impact", type=float, help="add volume-based impact (VolumeSlippage)")
+    parser.add_argument("--journal", default=REPLAY_JOURNAL, help="journal the replayed trades go to (recreated)")
+    parser.add_argument("--verbose", action="store_true", help="print the strategies' output")
+    args = parser.parse_args()
+
+    day = pd.Timestamp(args.date, tz="UTC") if args.date else pd.Timestamp.now(tz="UTC").floor("D") - pd.Timedelta(days=1)
+    modules = [importlib.import_module(name) for name in STRATEGIES]
+    symbols = list(dict.fromkeys(module.SYMBOL for module in modules))
+    minutes = load_minutes(symbols, day - pd.Timedelta(days=WARMUP_DAYS), day + pd.Timedelta(days=1),
+                           synthetic=args.synthetic)
+    missing = [symbol for symbol, bars in minutes.items() if not len(bars["timestamp"])]
+    if missing:
+        print(f"⚠️ No stored bars for {', '.join(missing)} on {day:%Y-%m-%d}; run a backfill or pass --synthetic.")
+
+    slippage = VolumeSlippage(args.slippage_bps, args.impact) if args.impact is not None \
+        else FixedSlippage(args.slippage_bps)
+    broker = SimulatedBroker(minutes, cash=args.cash, slippage=slippage, fee=PercentFee(args.fee))
+    for suffix in ("", "-wal", "-shm"):
+        if os.path.exists(args.journal + suffix):
+            os.remove(args.journal + suffix)
+
+    start = time.perf_counter()
+    broker, steps, decisions = replay(minutes, day, day + pd.Timedelta(days=1), broker=broker,
+                                      journal=Journal(args.journal), verbose=args.verbose)
+    elapsed = time.perf_counter() - start
+
+    print(f"🧪 Replayed {day:%Y-%m-%d}: {steps} candle close(s), {decisions} decision(s), "
+          f"{len(broker.fills)} fill(s) in {elapsed:.2f}s")
+    for filled_at, symbol, side, qty, price, fee in broker.fills:
+        icon = "🟢" if side == "buy" else "🔴"
+        print(f"{icon} {pd.Timestamp(filled_at, tz='UTC'):%H:%M} {side.upper():<4} {qty:.8g} {symbol} "
+              f"@ {price:.6g} (fee ${fee:.2f})")
+    print(f"💰 Cash ${broker.cash:,.2f}, equity ${broker.equity():,.2f} "
+          f"({broker.equity() / args.cash - 1:+.3%}), fills digest {broker.digest()}")
+
+
+if __name__ == "__main__":
+    main()
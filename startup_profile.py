@@ -0,0 +1,153 @@
+import os
+import sys
+import time
+
+# Only the standard library modules every run needs are imported up here:
+# anything else would be counted as interpreter start-up in the profile
+MARK = "startup_profile:"
+RUNS = 5
+TOP_IMPORTS = 12
+DEFAULT_SCRIPT = "btc_strategy.py"
+
+# Measures how long a script takes from launching its interpreter to its
+# first network connection (the first API call), split into interpreter
+# start, imports (per package, from -X importtime) and the setup between
+# them and the call. The script is stopped at that connection, before a
+# byte is sent, so profiling a strategy never places an order. --prefork
+# runs the same script through a warm prefork.py worker for comparison.
+
+
+def stop_at_first_connection():
+    # The first name lookup or connect ends the process
+    def hook(event, args):
+        if event in ("socket.getaddrinfo", "socket.connect"):
+            print(f"{MARK} connect {time.time():.6f}", file=sys.stderr, flush=True)
+            os._exit(0)
+    sys.addaudithook(hook)
+
+
+def begin():
+    print(f"{MARK} begin {time.time():.6f}", file=sys.stderr, flush=True)
+    stop_at_first_connection()
+
+
+def run_child(script, args):
+    import runpy
+    begin()
+    sys.argv = [script] + list(args)
+    runpy.run_path(script, run_name="__main__")
+    print(f"{MARK} done {time.time():.6f}", file=sys.stderr, flush=True)
+
+
+# === MEASURING ===
+
+def parse(output):
+    import re
+    line_format = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \| +(\S+)")
+    marks, imports, started = {}, {}, False
+    for line in output.splitlines():
+        if line.startswith(MARK):
+            _, event, value = line.split()
+            marks[event] = float(value)
+            started = started or event == "begin"
+            continue
+        match = line_format.match(line)
+        if started and match:
+            package = match.group(3).split(".")[0]
+            imports[package] = imports.get(package, 0) + int(match.group(1)) / 1e6
+    return marks, imports
+
+
+def measure(command, env=None):
+    import subprocess
+    launched = time.time()
+    result = subprocess.run(command, capture_output=True, text=True, env=env)
+    marks, imports = parse(result.stdout + "\n" + result.stderr)
+    if "begin" not in marks or "connect" not in marks:
+        raise RuntimeError(f"no API call seen from {' '.join(command)}:\n{result.stdout[-2000:]}{result.stderr[-2000:]}")
+    imported = sum(imports.values())
+    return {
+        "phases": {
+            "interpreter start": marks["begin"] - launched,
+            "imports": imported,
+            "setup": marks["connect"] - marks["begin"] - imported,
+        },
+        "total": marks["connect"] - launched,
+        "imports": imports,
+    }
+
+
+def profile(command, runs=RUNS, env=None):
+    import statistics
+    measure(command, env)  # warm the file cache; not counted
+    results = sorted((measure(command, env) for _ in range(runs)), key=lambda r: r["total"])
+    median = results[len(results) // 2]
+    median["spread"] = (results[0]["total"], results[-1]["total"])
+    median["mean"] = statistics.fmean(r["total"] for r in results)
+    return median
+
+
+def print_profile(label, result):
+    low, high = result["spread"]
+    print(f"\n⏱️ {label}: first API call after {result['total'] * 1000:.0f} ms "
+          f"(median; {low * 1000:.0f}-{high * 1000:.0f} ms)")
+    for phase, seconds in result["phases"].items():
+        print(f"• {phase:<18} {seconds * 1000:8.1f} ms")
+    if result["imports"]:
+        print("📦 Slowest imports (own time per package):")
+        for package, seconds in sorted(result["imports"].items(), key=lambda item: -item[1])[:TOP_IMPORTS]:
+            print(f"• {package:<18} {seconds * 1000:8.1f} ms")
+
+
+# === PREFORK ===
+
+def start_prefork(path):
+    import subprocess
+    server = subprocess.Popen([sys.executable, "prefork.py", "serve", "--socket", path],
+                              stdout=subprocess.DEVNULL)
+    deadline = time.time() + 120
+    while not os.path.exists(path):
+        if server.poll() is not None or time.time() > deadline:
+            server.kill()
+            raise RuntimeError("prefork worker did not start")
+        time.sleep(0.05)
+    return server
+
+
+def main():
+    if len(sys.argv) > 2 and sys.argv[1] == "--child":
+        run_child(sys.argv[2], sys.argv[3:])
+        return
+
+    import argparse
+    parser = argparse.ArgumentParser(description="Time a script's start-up up to its first API call")
+    parser.add_argument("script", nargs="?", default=DEFAULT_SCRIPT)
+    parser.add_argument("args", nargs=argparse.REMAINDER, help="arguments for the script")
+    parser.add_argument("--runs", type=int, default=RUNS)
+    parser.add_argument("--prefork", action="store_true", help="also time the script through a prefork.py worker")
+    parser.add_argument("--socket", help="use this running prefork.py worker (default: start a temporary one)")
+    args = parser.parse_args()
+
+    cold = profile([sys.executable, "-X", "importtime", __file__, "--child", args.script] + args.args, args.runs)
+    print_profile(f"{args.script}, fresh interpreter", cold)
+    if not args.prefork:
+        return
+
+    import tempfile
+    path = args.socket or os.path.join(tempfile.mkdtemp(), "prefork.sock")
+    server = None if args.socket else start_prefork(path)
+    try:
+        warm = profile([sys.executable, "prefork.py", "run", "--socket", path, "--profile", args.script] + args.args,
+                       args.runs)
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait()
+    warm["phases"] = {"client and hand-off": warm["phases"]["interpreter start"],
+                      "setup": warm["phases"]["setup"]}
+    print_profile(f"{args.script}, prefork worker", warm)
+    print(f"\n🚀 {cold['total'] / warm['total']:.1f}x faster to the first API call")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+import asyncio
+import os
+import time
+import pandas as pd
+from alpaca_trade_api.common import URL
+from alpaca_trade_api.stream import Stream
+import metrics
+from market_data import (CANDLE_FREQ, INDICATOR_CHECKPOINT, TIMEFRAME, get_store, sync, update_history,
+                         update_indicators)
+from resample import CandleBuilder
+from ring_buffer import FIELDS
+
+
+def _to_ns(value):
+    if hasattr(value, "to_unix_nano"):  # msgpack Timestamp
+        return value.to_unix_nano()
+    if isinstance(value, int):
+        return value
+    return pd.Timestamp(value).value
+
+
+class StreamRunner:
+    def __init__(self, runner, stream_url=None):
+        self.runner = runner
+        self.engine = runner.engine
+        self.store = get_store()
+        self.builder = CandleBuilder(CANDLE_FREQ)
+        self.stream_url = stream_url
+        self.stream = Stream(
+            os.getenv("APCA_API_KEY_ID"),
+            os.getenv("APCA_API_SECRET_KEY"),
+            base_url=URL(os.getenv("APCA_API_BASE_URL")),
+            data_stream_url=URL(stream_url) if stream_url else None,
+            raw_data=True
+        )
+
+    def warm_up(self):
+        # Bring the store and indicators up to date before the first live bar
+        history = self.runner.history
+        sync(self.runner.api, self.runner.symbols, store=self.store)
+        update_history(history, self.runner.symbols, store=self.store)
+        update_indicators(self.engine, self.runner.symbols, store=self.store, history=history)
+
+        # Seed the forming candle with the minutes already stored
+        bucket_start = pd.Timestamp.now(tz="UTC").floor(CANDLE_FREQ).value
+        for symbol in self.runner.symbols:
+            bars = history[symbol].since(bucket_start)
+            for timestamp, *values in zip(bars["timestamp"].tolist(), *(bars[f].tolist() for f in FIELDS)):
+                self.builder.add(symbol, timestamp, dict(zip(FIELDS, values)))
+
+    async def on_bar(self, msg):
+        received = time.perf_counter()
+        symbol = msg["S"]
+        timestamp = _to_ns(msg["t"])
+        bar = {"open": msg["o"], "high": msg["h"], "low": msg["l"], "close": msg["c"], "volume": msg["v"]}
+
+        loop = asyncio.get_running_loop()
+        with metrics.span("resample", symbol=symbol):
+            closed = self.builder.add(symbol, timestamp, bar)
+        for bucket, candle in closed:
+            with metrics.span("indicators", symbol=symbol):
+                row = self.engine.update(symbol, bucket, candle)
+            if row is None:
+                continue
+            modules = self.runner.modules_for(symbol)
+            await loop.run_in_executor(None, self.runner.run_modules, modules, {symbol: self.engine.tail(symbol)})
+            closed_at = pd.Timestamp(bucket + self.builder.period, tz="UTC")
+            metrics.observe("bar_to_decision", time.perf_counter() - received, symbol=symbol)
+            print(f"⚡ {symbol} candle closed at {closed_at:%H:%M} → decision in "
+                  f"{(time.perf_counter() - received) * 1000:.1f} ms")
+            self.engine.save(INDICATOR_CHECKPOINT)
+            self.runner.save_checkpoint()
+            metrics.export()
+
+        frame = pd.DataFrame([bar], index=pd.DatetimeIndex([pd.Timestamp(timestamp, tz="UTC")]))
+        if self.store.append(symbol, TIMEFRAME, frame):
+            ring = self.runner.history.get(symbol)
+            if ring is not None:
+                ring.append(timestamp, bar)
+
+    async def on_trade_update(self, update):
+        self.runner.broker.on_trade_update(update)
+
+    def run(self):
+        self.warm_up()
+        print(f"📡 Streaming minute bars for {', '.join(self.runner.symbols)}...")
+        if self.stream_url is None:
+            # Fills on the live account refresh the broker snapshot
+            self.stream.subscribe_trade_updates(self.on_trade_update)
+        self.stream.subscribe_crypto_bars(self.on_bar, *self.runner.symbols)
+        self.stream.run()
@@ -0,0 +1,151 @@
+import argparse
+import importlib
+import itertools
+import os
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+import pandas as pd
+import backtest
+import panel
+from bar_store import BarStore
+from resample import resample
+
+# Values tried for each parameter; anything not listed keeps the module's PARAMS
+GRIDS = {
+    "ema_rsi": {
+        "fast": [5, 7, 9, 12],
+        "slow": [20, 21, 26, 34, 50],
+        "rsi_buy_below": [30, 35, 40, 45],
+        "rsi_sell_above": [60, 65, 70, 75, 80],
+        "sell_needs_both": [True, False],
+        "allocation_pct": [0.05, 0.075, 0.10],
+        "timeframe": ["5min", "15min", "30min", "1h"],
+    },
+    "ema_stack": {
+        "fast": [5, 7, 9, 12],
+        "slow": [15, 20, 21, 26],
+        "trend": [40, 50, 75, 100, 200],
+        "allocation_pct": [0.05, 0.10],
+        "timeframe": ["5min", "15min", "30min", "1h"],
+    },
+    "momentum": {
+        "ema": [5, 9, 13, 21],
+        "green_candles": [2, 3, 4, 5],
+        "allocation_pct": [0.05, 0.075, 0.10],
+        "timeframe": ["5min", "15min", "30min", "1h"],
+    },
+}
+CHUNK_SIZE = 64  # combinations per task
+RESULTS_FILE = "sweep_results.csv.gz"
+
+# Worker-process state: memory-mapped minute arrays and candles per timeframe
+_minutes = None
+_candles = {}
+
+
+def _init_worker(root, symbol, start, end):
+    global _minutes
+    # Every worker maps the same column files; nothing is pickled across
+    _minutes = backtest.load_minutes(symbol, start, end, BarStore(root))
+    _candles.clear()
+
+
+def _run_chunk(module_name, combos):
+    module = importlib.import_module(module_name)
+    rows = []
+    for combo in combos:
+        params = dict(module.PARAMS, **combo)
+        timeframe = params.pop("timeframe", backtest.TIMEFRAME)
+        candles = _candles.get(timeframe)
+        if candles is None:
+            candles = _candles[timeframe] = resample(_minutes, timeframe)
+        buy, sell = panel.RULES[module.RULE](candles, params)
+        trades, equity = backtest.simulate(candles, buy, sell,
+                                           allocation_pct=params.get("allocation_pct"),
+                                           notional=params.get("notional"))
+        rows.append(dict(combo, **backtest.summarize(trades, equity)))
+    return rows
+
+
+def combinations(module, grid=None):
+    grid = grid or GRIDS[module.RULE]
+    if module.PARAMS.get("notional") is not None:
+        # Fixed-dollar buys (sol_strategy.py) ignore allocation_pct
+        grid = {key: values for key, values in grid.items() if key != "allocation_pct"}
+    keys = list(grid)
+    for values in itertools.product(*(grid[key] for key in keys)):
+        combo = dict(zip(keys, values))
+        params = dict(module.PARAMS, **combo)
+        if "slow" in params and params["fast"] >= params["slow"]:
+            continue
+        if "trend" in params and params["slow"] >= params["trend"]:
+            continue
+        if "rsi_buy_below" in params and params["rsi_buy_below"] >= params["rsi_sell_above"]:
+            continue
+        yield combo
+
+
+def sweep(module_name, root, symbol, start=None, end=None, workers=None, rank_by="return"):
+    module = importlib.import_module(module_name)
+    combos = list(combinations(module))
+    chunks = [combos[i:i + CHUNK_SIZE] for i in range(0, len(combos), CHUNK_SIZE)]
+    workers = workers or os.cpu_count()
+
+    print(f"🧪 Sweeping {len(combos):,} {module.STRATEGY} combinations on {symbol} "
+          f"across {workers} worker(s)...")
+    begin = time.perf_counter()
+    rows = []
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                             initargs=(root, symbol, start, end)) as pool:
+        for result in pool.map(_run_chunk, itertools.repeat(module_name), chunks):
+            rows.extend(result)
+    elapsed = time.perf_counter() - begin
+    print(f"⏱️ {len(rows):,} backtests in {elapsed:.1f}s ({len(rows) / elapsed:,.0f}/s)")
+
+    results = pd.DataFrame(rows)
+    results.insert(0, "strategy", module.STRATEGY)
+    results.insert(1, "symbol", symbol)
+    return results.sort_values([rank_by, "max_drawdown"], ascending=[False, False], ignore_index=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Grid-search strategy parameters on a process pool")
+    parser.add_argument("strategies", nargs="*", default=backtest.STRATEGIES)
+    parser.add_argument("--symbol", help="override the strategy's symbol")
+    parser.add_argument("--start")
+    parser.add_argument("--end")
+    parser.add_argument("--workers", type=int)
+    parser.add_argument("--rank-by", default="return", choices=["return", "pnl", "win_rate", "max_drawdown"])
+    parser.add_argument("--output", default=RESULTS_FILE)
+    parser.add_argument("--synthetic", type=float, metavar="YEARS", help="sweep over YEARS of synthetic minutes")
+    args = parser.parse_args()
+
+    root = BarStore().root
+    tmp = None
+    if args.synthetic:
+        # Synthetic data goes through a throwaway bar store so the workers
+        # memory-map it exactly like real data
+        tmp = tempfile.TemporaryDirectory()
+        root = tmp.name
+        minutes = backtest.synthetic_minutes(int(args.synthetic * 365 * 24 * 60))
+        frame = pd.DataFrame({k: v for k, v in minutes.items() if k != "timestamp"},
+                             index=pd.to_datetime(minutes["timestamp"], utc=True))
+        for name in args.strategies:
+            BarStore(root).append(args.symbol or importlib.import_module(name).SYMBOL, "1Min", frame)
+
+    results = []
+    for name in args.strategies:
+        symbol = args.symbol or importlib.import_module(name).SYMBOL
+        ranked = sweep(name, root, symbol, args.start, args.end, args.workers, args.rank_by)
+        print(ranked.head(5).to_string(index=False))
+        results.append(ranked)
+
+    pd.concat(results, ignore_index=True).to_csv(args.output, index=False, float_format="%.6g")
+    print(f"\n💾 Results written to {args.output}")
+    if tmp is not None:
+        tmp.cleanup()
+
+
+if __name__ == "__main__":
+    main()